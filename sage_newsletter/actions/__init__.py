@@ -1,3 +1,3 @@
-from .newsletter import NewsletterSubscriptionActions
+from .newsletter import NewsletterIssueActions, NewsletterSubscriptionActions
 
-__all__ = ["NewsletterSubscriptionActions"]
+__all__ = ["NewsletterIssueActions", "NewsletterSubscriptionActions"]
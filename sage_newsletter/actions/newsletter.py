@@ -1,15 +1,97 @@
+from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
+
+from ..metrics import instrument
+from ..services import enqueue_issue, export_response, update_in_batches
 
 
 class NewsletterSubscriptionActions:
+    @staticmethod
+    def _report(modeladmin, request, message, updated, batches):
+        """Tells the admin user how many subscribers an action changed."""
+        if modeladmin is not None:
+            modeladmin.message_user(
+                request,
+                message % {"count": updated, "batches": batches},
+                messages.SUCCESS,
+            )
+
     @staticmethod
     def confirm_subscriptions(modeladmin, request, queryset):
-        queryset.update(confirmed=True)
+        with instrument(
+            "admin.action", using=queryset.db, action="confirm_subscriptions"
+        ) as measurement:
+            updated, batches = update_in_batches(queryset, {"confirmed": True})
+            measurement.rows = updated
+        NewsletterSubscriptionActions._report(
+            modeladmin,
+            request,
+            ngettext(
+                "Confirmed %(count)d subscription in %(batches)d batch(es).",
+                "Confirmed %(count)d subscriptions in %(batches)d batch(es).",
+                updated,
+            ),
+            updated,
+            batches,
+        )
 
     confirm_subscriptions.short_description = _("Confirm selected subscriptions")
 
     @staticmethod
     def deactivate_subscriptions(modeladmin, request, queryset):
-        queryset.update(is_active=False)
+        with instrument(
+            "admin.action", using=queryset.db, action="deactivate_subscriptions"
+        ) as measurement:
+            updated, batches = update_in_batches(queryset, {"is_active": False})
+            measurement.rows = updated
+        NewsletterSubscriptionActions._report(
+            modeladmin,
+            request,
+            ngettext(
+                "Deactivated %(count)d subscription in %(batches)d batch(es).",
+                "Deactivated %(count)d subscriptions in %(batches)d batch(es).",
+                updated,
+            ),
+            updated,
+            batches,
+        )
 
     deactivate_subscriptions.short_description = _("Deactivate selected subscriptions")
+
+    @staticmethod
+    def export_subscribers_csv(modeladmin, request, queryset):
+        return export_response(queryset, "csv")
+
+    export_subscribers_csv.short_description = _("Export selected subscribers as CSV")
+
+    @staticmethod
+    def export_subscribers_jsonl(modeladmin, request, queryset):
+        return export_response(queryset, "jsonl")
+
+    export_subscribers_jsonl.short_description = _(
+        "Export selected subscribers as JSON Lines"
+    )
+
+
+class NewsletterIssueActions:
+    @staticmethod
+    def enqueue_issues(modeladmin, request, queryset):
+        with instrument(
+            "admin.action", using=queryset.db, action="enqueue_issues"
+        ) as measurement:
+            queued = sum(enqueue_issue(issue) for issue in queryset)
+            measurement.rows = queued
+        if modeladmin is not None:
+            modeladmin.message_user(
+                request,
+                ngettext(
+                    "Queued %(count)d delivery.",
+                    "Queued %(count)d deliveries.",
+                    queued,
+                )
+                % {"count": queued},
+                messages.SUCCESS,
+            )
+
+    enqueue_issues.short_description = _("Queue selected issues for delivery")
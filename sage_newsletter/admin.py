@@ -1,8 +1,21 @@
+from django.conf import settings
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .actions import NewsletterSubscriptionActions
-from .models import NewsletterSubscriber
+from .actions import NewsletterIssueActions, NewsletterSubscriptionActions
+from .helpers.changelist import (
+    CachedBooleanFieldListFilter,
+    CachedChoicesFieldListFilter,
+    CachedPreferencesListFilter,
+    SegmentCountPaginator,
+    get_changelist_filters,
+)
+from .models import (
+    NewsletterDelivery,
+    NewsletterIssue,
+    NewsletterSubscriber,
+    NewsletterSuppression,
+)
 
 
 @admin.register(NewsletterSubscriber)
@@ -14,33 +27,129 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
         "email",
         "date_subscribed",
         "confirmed",
-        "preferences",
+        "preference_labels",
         "frequency",
         "language",
         "is_active",
     )
     list_filter = (
-        "confirmed",
-        "preferences",
-        "frequency",
-        "language",
-        "is_active",
-        "gdpr_consent",
+        ("confirmed", CachedBooleanFieldListFilter),
+        ("preferences", CachedPreferencesListFilter),
+        ("frequency", CachedChoicesFieldListFilter),
+        ("language", CachedChoicesFieldListFilter),
+        ("is_active", CachedBooleanFieldListFilter),
+        ("gdpr_consent", CachedBooleanFieldListFilter),
     )
+    show_full_result_count = False
     search_fields = ("email",)
-    readonly_fields = ("date_subscribed", "unsubscribe_token", "last_sent")
+    search_help_text = _(
+        "Search a complete address, the beginning of an address or @domain."
+    )
+    readonly_fields = (
+        "date_subscribed",
+        "unsubscribe_token",
+        "send_hour",
+        "last_sent",
+        "last_opened",
+        "open_count",
+        "click_count",
+    )
     fieldsets = (
         (
             _("Subscriber Information"),
             {"fields": ("email", "date_subscribed", "confirmed")},
         ),
-        (_("Preferences"), {"fields": ("preferences", "frequency", "language")}),
+        (
+            _("Preferences"),
+            {
+                "fields": (
+                    "preferences",
+                    "frequency",
+                    "language",
+                    "timezone",
+                    "send_hour",
+                )
+            },
+        ),
         (
             _("Subscription Status"),
             {"fields": ("is_active", "gdpr_consent", "unsubscribe_token", "last_sent")},
         ),
+        (_("Engagement"), {"fields": ("last_opened", "open_count", "click_count")}),
     )
     actions = [
         NewsletterSubscriptionActions.confirm_subscriptions,
         NewsletterSubscriptionActions.deactivate_subscriptions,
+        NewsletterSubscriptionActions.export_subscribers_csv,
+        NewsletterSubscriptionActions.export_subscribers_jsonl,
     ]
+
+    @admin.display(description=_("Content Preferences"), ordering="preferences")
+    def preference_labels(self, obj):
+        return ", ".join(str(label) for label in obj.preferences.labels)
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True
+    ):
+        """Counts the changelist through the segment count cache.
+
+        Set ``NEWSLETTER_ADMIN_ESTIMATED_COUNT = True`` to let the unfiltered
+        changelist use PostgreSQL's row estimate on very large tables.
+
+        """
+        return SegmentCountPaginator(
+            queryset,
+            per_page,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            filters=get_changelist_filters(request),
+            estimate=getattr(settings, "NEWSLETTER_ADMIN_ESTIMATED_COUNT", False),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Searches by exact address, address prefix or domain.
+
+        Unlike the default ``icontains`` search every mode can use an index,
+        see :meth:`NewsletterSubscriberQuerySet.search_email`.
+
+        """
+        return queryset.search_email(search_term), False
+
+
+@admin.register(NewsletterIssue)
+class NewsletterIssueAdmin(admin.ModelAdmin):
+    """Newsletter Issue Admin."""
+
+    list_display = ("subject", "created_at")
+    search_fields = ("subject",)
+    readonly_fields = ("created_at",)
+    actions = [NewsletterIssueActions.enqueue_issues]
+
+
+@admin.register(NewsletterDelivery)
+class NewsletterDeliveryAdmin(admin.ModelAdmin):
+    """Newsletter Delivery Admin."""
+
+    list_display = ("issue", "subscriber", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    list_select_related = ("issue", "subscriber")
+    raw_id_fields = ("issue", "subscriber")
+    readonly_fields = (
+        "attempts",
+        "leased_until",
+        "lease_token",
+        "sent_at",
+        "last_error",
+    )
+    show_full_result_count = False
+
+
+@admin.register(NewsletterSuppression)
+class NewsletterSuppressionAdmin(admin.ModelAdmin):
+    """Newsletter Suppression Admin."""
+
+    list_display = ("email", "reason", "created_at")
+    list_filter = ("reason",)
+    search_fields = ("email",)
+    readonly_fields = ("created_at",)
+    show_full_result_count = False
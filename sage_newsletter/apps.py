@@ -6,3 +6,6 @@ class NewsletterConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sage_newsletter"
     verbose_name = _("Newsletter")
+
+    def ready(self):
+        from . import receivers  # noqa: F401
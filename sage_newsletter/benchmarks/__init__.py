@@ -0,0 +1,19 @@
+from .suite import (
+    BenchmarkResult,
+    benchmark_actions,
+    benchmark_admin,
+    benchmark_signup,
+    measure,
+)
+from .synthetic import BENCHMARK_DOMAIN, clear_subscribers, generate_subscribers
+
+__all__ = [
+    "BENCHMARK_DOMAIN",
+    "BenchmarkResult",
+    "benchmark_actions",
+    "benchmark_admin",
+    "benchmark_signup",
+    "clear_subscribers",
+    "generate_subscribers",
+    "measure",
+]
@@ -0,0 +1,61 @@
+import asyncio
+import statistics
+import time
+
+from django.test import AsyncClient, override_settings
+
+from .synthetic import BENCHMARK_DOMAIN
+
+SIGNUP_PATHS = {"sync": "/sync/", "async": "/async/"}
+
+
+async def _signup_load(path, requests, concurrency, prefix):
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def signup(number):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                path, {"email": f"{prefix}{number}@{BENCHMARK_DOMAIN}"}
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            return response.status_code
+
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(signup(number) for number in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(status != 302 for status in statuses),
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1],
+    }
+
+
+def run_signup_load(mode, requests=500, concurrency=50):
+    """Posts `requests` signups concurrently to the sync or async signup view.
+
+    Both views are served through Django's ASGI request handler, the way a
+    project deployed under ASGI serves them: the synchronous view runs in the
+    sync-to-async thread pool while the asynchronous one stays on the event
+    loop.
+
+    Args:
+        mode (str): ``"sync"`` or ``"async"``.
+        requests (int): Total number of signups to post.
+        concurrency (int): Maximum number of in-flight requests.
+
+    Returns:
+        dict: Throughput, latency percentiles and the number of failed
+        requests.
+
+    """
+    with override_settings(ROOT_URLCONF="sage_newsletter.benchmarks.urls"):
+        return asyncio.run(
+            _signup_load(SIGNUP_PATHS[mode], requests, concurrency, f"{mode}-signup")
+        )
@@ -0,0 +1,220 @@
+import math
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from itertools import count
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..actions import NewsletterSubscriptionActions
+from ..forms import NewsletterSubscriptionForm
+from ..helpers.text_choices import FrequencyPreferences
+from ..models import NewsletterSubscriber
+from ..services.segments import invalidate_segment_counts
+from .synthetic import BENCHMARK_DOMAIN
+
+CHANGELIST_PATH = "/admin/sage_newsletter/newslettersubscriber/"
+
+
+@dataclass
+class BenchmarkResult:
+    """Latency and database work of one benchmarked operation.
+
+    Latencies are in milliseconds. ``queries`` is the highest number of
+    queries a single run issued, ``rows`` the number of rows the last run
+    returned or changed.
+
+    """
+
+    name: str
+    runs: int
+    median_ms: float
+    p95_ms: float
+    min_ms: float
+    max_ms: float
+    queries: int
+    rows: int = 0
+
+    def as_dict(self):
+        return asdict(self)
+
+    def __str__(self):
+        return (
+            f"{self.name}: median {self.median_ms:.2f}ms, p95 {self.p95_ms:.2f}ms, "
+            f"min {self.min_ms:.2f}ms, max {self.max_ms:.2f}ms, "
+            f"{self.queries} queries, {self.rows} rows"
+        )
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank `percent` percentile of `values`."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def measure(name, func, repeat=5, setup=None, using="default"):
+    """Times `repeat` calls of `func` and counts the queries each one issues.
+
+    Args:
+        name (str): Label of the result.
+        func (callable): The operation to time. May return the number of rows
+            it returned or changed.
+        repeat (int): Number of timed runs.
+        setup (callable, optional): Called before every run, outside the
+            timing and the query count, to reset the data `func` changes.
+        using (str): Database alias whose queries are counted.
+
+    Returns:
+        BenchmarkResult: The latency distribution and the query count.
+
+    """
+    timings, queries, rows = [], 0, 0
+    for _run in range(repeat):
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connections[using]) as context:
+            started = time.perf_counter()
+            rows = func() or 0
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(context.captured_queries))
+    return BenchmarkResult(
+        name=name,
+        runs=repeat,
+        median_ms=statistics.median(timings),
+        p95_ms=percentile(timings, 95),
+        min_ms=min(timings),
+        max_ms=max(timings),
+        queries=queries,
+        rows=rows,
+    )
+
+
+def benchmark_signup(repeat=5, using="default"):
+    """Measures a signup through the form and through the view's ``post()``.
+
+    The form scenarios validate the form and store the subscription with
+    :meth:`NewsletterSubscriptionForm.subscribe`, as the view does. New
+    addresses are inserted on every run, an address that is already
+    subscribed exercises the rejection path.
+
+    """
+    numbers = count()
+
+    def signup_form(email=None):
+        form = NewsletterSubscriptionForm(
+            data={"email": email or f"form-signup{next(numbers)}@{BENCHMARK_DOMAIN}"}
+        )
+        form.is_valid()
+        return int(form.subscribe())
+
+    client = Client()
+
+    def signup_view():
+        client.post(
+            "/sync/", {"email": f"view-signup{next(numbers)}@{BENCHMARK_DOMAIN}"}
+        )
+        return 1
+
+    existing = f"subscriber0@{BENCHMARK_DOMAIN}"
+    signup_form(existing)
+    with override_settings(ROOT_URLCONF="sage_newsletter.benchmarks.urls"):
+        return [
+            measure("form signup", signup_form, repeat, using=using),
+            measure(
+                "form signup (already active)",
+                lambda: signup_form(existing),
+                repeat,
+                using=using,
+            ),
+            measure("view signup", signup_view, repeat, using=using),
+        ]
+
+
+def benchmark_admin(repeat=5, using="default"):
+    """Measures the subscriber changelist unfiltered, filtered and searched.
+
+    The changelist is requested from :class:`NewsletterSubscriberAdmin` by a
+    superuser and fully rendered, so the figures include pagination, facet
+    counts and templates.
+
+    """
+    model_admin = admin.site._registry[NewsletterSubscriber]
+    user = get_user_model()(is_active=True, is_staff=True, is_superuser=True)
+    factory = RequestFactory()
+
+    def changelist(params):
+        def view():
+            request = factory.get(CHANGELIST_PATH, params)
+            request.user = user
+            response = model_admin.changelist_view(request)
+            response.render()
+            return len(response.context_data["cl"].result_list)
+
+        return view
+
+    scenarios = {
+        "admin changelist": {},
+        "admin changelist filtered": {
+            "frequency__exact": FrequencyPreferences.WEEKLY,
+            "is_active__exact": "1",
+        },
+        "admin search": {"q": f"subscriber12345@{BENCHMARK_DOMAIN}"},
+    }
+    with override_settings(ROOT_URLCONF="sage_newsletter.benchmarks.urls"):
+        return [
+            measure(name, changelist(params), repeat, using=using)
+            for name, params in scenarios.items()
+        ]
+
+
+def benchmark_actions(repeat=5, using="default"):
+    """Measures the subscriber admin actions on a "select all" of a segment.
+
+    The actions run on every daily subscriber, the way an admin filters the
+    changelist and selects all matching rows. Rows are reset before each run
+    so every run changes the whole segment, and the segment counters, which
+    the resets bypass, are invalidated afterwards.
+
+    """
+    segment = NewsletterSubscriber.objects.using(using).filter(
+        email__endswith=f"@{BENCHMARK_DOMAIN}",
+        frequency=FrequencyPreferences.DAILY,
+    )
+    actions = NewsletterSubscriptionActions
+    rows = segment.count()
+
+    def update(action):
+        def func():
+            action(None, None, segment.all())
+            return rows
+
+        return func
+
+    def export():
+        response = actions.export_subscribers_csv(None, None, segment.all())
+        # One line per row plus the header.
+        return sum(chunk.count(b"\n") for chunk in response.streaming_content) - 1
+
+    results = [
+        measure(
+            "action confirm",
+            update(actions.confirm_subscriptions),
+            repeat,
+            setup=lambda: segment.update(confirmed=False),
+            using=using,
+        ),
+        measure(
+            "action deactivate",
+            update(actions.deactivate_subscriptions),
+            repeat,
+            setup=lambda: segment.update(is_active=True),
+            using=using,
+        ),
+        measure("action export csv", export, repeat, using=using),
+    ]
+    invalidate_segment_counts(total=True)
+    return results
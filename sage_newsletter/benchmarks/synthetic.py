@@ -0,0 +1,108 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone as tz
+
+from ..helpers.text_choices import ContentPreferences, FrequencyPreferences
+from ..models import NewsletterSubscriber
+from ..services.segments import invalidate_segment_counts
+
+BENCHMARK_DOMAIN = "bench.invalid"
+
+FREQUENCY_WEIGHTS = {
+    FrequencyPreferences.DAILY: 15,
+    FrequencyPreferences.WEEKLY: 60,
+    FrequencyPreferences.MONTHLY: 25,
+}
+# The probability that a subscriber wants each content type.
+PREFERENCE_RATES = {
+    ContentPreferences.NEWS: 0.7,
+    ContentPreferences.DEALS: 0.35,
+    ContentPreferences.TIPS: 0.2,
+}
+
+
+def generate_subscribers(count, batch_size=10000, seed=0, using="default"):
+    """Bulk inserts `count` synthetic subscribers.
+
+    Addresses live under ``BENCHMARK_DOMAIN`` so they can be removed again with
+    :func:`clear_subscribers`. Frequencies, preferences, languages and
+    activity flags follow a skewed, production-like distribution, and
+    ``last_sent`` is spread over the last 45 days so every frequency window has
+    both due and not-yet-due rows.
+
+    Args:
+        count (int): Number of rows to insert.
+        batch_size (int): Rows per ``bulk_create`` batch.
+        seed (int): Seed for the random generator, for reproducible runs.
+        using (str): Database alias to write to.
+
+    Returns:
+        int: The number of inserted rows.
+
+    """
+    rng = random.Random(seed)
+    now = tz.now()
+    frequencies = list(FREQUENCY_WEIGHTS)
+    frequency_weights = list(FREQUENCY_WEIGHTS.values())
+    languages = [code for code, _name in settings.LANGUAGES][:12]
+    language_weights = [2**-i for i in range(len(languages))]
+
+    inserted = 0
+    while inserted < count:
+        size = min(batch_size, count - inserted)
+        batch = []
+        for offset in range(size):
+            number = inserted + offset
+            last_sent = None
+            if rng.random() < 0.9:
+                last_sent = now - timedelta(minutes=rng.randrange(45 * 24 * 60))
+            batch.append(
+                NewsletterSubscriber(
+                    email=f"subscriber{number}@{BENCHMARK_DOMAIN}",
+                    date_subscribed=now - timedelta(days=rng.randrange(3 * 365)),
+                    confirmed=rng.random() < 0.85,
+                    unsubscribe_token=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    preferences=[
+                        preference
+                        for preference, rate in PREFERENCE_RATES.items()
+                        if rng.random() < rate
+                    ]
+                    or [ContentPreferences.NEWS],
+                    frequency=rng.choices(frequencies, frequency_weights)[0],
+                    language=rng.choices(languages, language_weights)[0],
+                    gdpr_consent=rng.random() < 0.7,
+                    last_sent=last_sent,
+                    is_active=rng.random() < 0.92,
+                )
+            )
+        NewsletterSubscriber.objects.using(using).bulk_create(batch)
+        inserted += size
+    invalidate_segment_counts(total=True)
+    return inserted
+
+
+def clear_subscribers(using="default"):
+    """Deletes every subscriber created by :func:`generate_subscribers`.
+
+    The rows are removed with a single raw ``DELETE`` without collecting them,
+    cascading or sending per-row signals, which only suits the synthetic
+    benchmark rows: they never have deliveries or tracking events.
+
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(NewsletterSubscriber._meta.db_table)
+    column = connection.ops.quote_name(
+        NewsletterSubscriber._meta.get_field("email").column
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {column} LIKE %s",
+            [f"%@{BENCHMARK_DOMAIN}"],
+        )
+        deleted = cursor.rowcount
+    invalidate_segment_counts(total=True)
+    return deleted
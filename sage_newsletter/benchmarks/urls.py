@@ -0,0 +1,10 @@
+from django.contrib import admin
+from django.urls import path
+
+from .views import AsyncSignupView, SyncSignupView
+
+urlpatterns = [
+    path("sync/", SyncSignupView.as_view(), name="sync-signup"),
+    path("async/", AsyncSignupView.as_view(), name="async-signup"),
+    path("admin/", admin.site.urls),
+]
@@ -0,0 +1,19 @@
+from django.views.generic import TemplateView
+
+from ..views import AsyncNewsletterViewMixin, NewsletterViewMixin
+
+
+class SyncSignupView(NewsletterViewMixin, TemplateView):
+    """Signup endpoint served by the synchronous mixin."""
+
+    template_name = "sage_newsletter/benchmark.html"
+    newsletter_success_url_name = "sync-signup"
+    newsletter_throttle_rates = {}
+
+
+class AsyncSignupView(AsyncNewsletterViewMixin, TemplateView):
+    """Signup endpoint served by the asynchronous mixin."""
+
+    template_name = "sage_newsletter/benchmark.html"
+    newsletter_success_url_name = "async-signup"
+    newsletter_throttle_rates = {}
@@ -1,7 +1,11 @@
 from django import forms
 from django.core.exceptions import ValidationError
 
+from .helpers.fields import normalize_email
+from .helpers.text_choices import SubscriptionStatus
+from .metrics import instrument
 from .models import NewsletterSubscriber
+from .services import asubscribe, subscribe
 
 
 class NewsletterSubscriptionForm(forms.ModelForm):
@@ -9,7 +13,10 @@ class NewsletterSubscriptionForm(forms.ModelForm):
 
     This form is associated with the NewsletterSubscriber model and is used for
     subscribing users to a newsletter service. It handles both new subscriptions
-    and the reactivation of existing but inactive subscriptions.
+    and the reactivation of existing but inactive subscriptions. After a
+    successful :meth:`subscribe`, `status` holds the :class:`SubscriptionStatus`
+    of the signup and `reactivated` tells whether an inactive subscription was
+    revived.
 
     The form only exposes the 'email' field for input, as it's the primary field
     required for newsletter subscriptions.
@@ -25,33 +32,100 @@ class NewsletterSubscriptionForm(forms.ModelForm):
         fields = ["email"]
 
     def clean_email(self):
-        """Validates and processes the email field input.
+        """Validates the email field input.
 
-        Checks if the provided email already exists in the database. If it does, the method
-        determines whether the associated subscription is active or inactive. Active
-        subscriptions will cause the method to raise a ValidationError, indicating that
-        the email is already in use. Inactive subscriptions will be reactivated.
+        Only the address itself is checked here, so validating the form never
+        writes to the database. :meth:`subscribe` or :meth:`asubscribe` store
+        the subscription afterwards with an insert-or-reactivate statement
+        (see :func:`sage_newsletter.services.subscribe`).
 
         Returns:
-            str: The cleaned email data.
+            str: The email address in its canonical, lowercased form.
+
+        """
+        return normalize_email(self.cleaned_data.get("email"))
+
+    def get_subscription_fields(self):
+        """Returns the cleaned values stored along with the email address."""
+        return {
+            name: value
+            for name, value in self.cleaned_data.items()
+            if name != "email" and name in self._meta.fields
+        }
+
+    def subscribe(self):
+        """Stores the subscription of a valid form.
+
+        Active subscriptions add an error to the email field, indicating that
+        the address is already in use, and so do suppressed addresses.
+        Inactive subscriptions are reactivated.
+
+        Returns:
+            bool: False if the address is already subscribed and active or is
+            suppressed, in which case the error is added to the email field.
+
+        """
+        with instrument("signup.subscribe") as measurement:
+            result = subscribe(
+                self.cleaned_data["email"], **self.get_subscription_fields()
+            )
+            measurement.rows = 1
+        return self._set_subscription(*result)
+
+    async def asubscribe(self):
+        """Asynchronous version of :meth:`subscribe` using the async ORM."""
+        return self._set_subscription(
+            *await asubscribe(
+                self.cleaned_data["email"], **self.get_subscription_fields()
+            )
+        )
+
+    def _set_subscription(self, subscriber, status):
+        if status == SubscriptionStatus.ALREADY_ACTIVE:
+            self.add_error(
+                "email",
+                ValidationError("This email address is already subscribed and active."),
+            )
+            return False
+        if status == SubscriptionStatus.SUPPRESSED:
+            self.add_error(
+                "email", ValidationError("This email address cannot be subscribed.")
+            )
+            return False
+        self.instance = subscriber
+        self.status = status
+        self.reactivated = status == SubscriptionStatus.REACTIVATED
+        return True
+
+    def _get_validation_exclusions(self):
+        """Skips the case-insensitive constraint query on the email as well.
+
+        The email field already validated the address and the upsert in
+        :meth:`subscribe` enforces the constraint.
+
+        """
+        return super()._get_validation_exclusions() | {"email"}
+
+    def validate_unique(self):
+        """Skips the uniqueness query, the upsert in subscribe() enforces it."""
+
+    def save(self, commit=True):
+        """Stores the subscription and returns the subscriber.
+
+        Args:
+            commit (bool): If False, the unsaved instance is returned and
+                :meth:`subscribe` is left to the caller.
 
         Raises:
-            ValidationError: If the email address is already subscribed and active.
+            ValueError: If the form is invalid or the address cannot be
+                subscribed.
 
         """
-        email = self.cleaned_data.get("email")
-        try:
-            subscriber = NewsletterSubscriber.objects.get(email=email)
-            if subscriber.is_active:
-                raise ValidationError(
-                    "This email address is already subscribed and active."
-                )
-            else:
-                # Mark the subscriber as reactivated and save
-                self.instance = subscriber
-                self.instance.is_active = True
-                self.instance.save()
-        except NewsletterSubscriber.DoesNotExist:
-            # Email not found, it's a new subscriber
-            pass
-        return email
+        if self.errors:
+            raise ValueError(
+                f"The {self.instance._meta.object_name} could not be created "
+                "because the data didn't validate."
+            )
+        if commit and not self.subscribe():
+            raise ValueError(" ".join(self.errors["email"]))
+        return self.instance
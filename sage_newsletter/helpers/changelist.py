@@ -0,0 +1,161 @@
+from django.contrib import admin
+from django.contrib.admin.views.main import (
+    ALL_VAR,
+    ERROR_FLAG,
+    IS_POPUP_VAR,
+    ORDER_VAR,
+    PAGE_VAR,
+    SEARCH_VAR,
+    TO_FIELD_VAR,
+)
+from django.core.paginator import Paginator
+from django.db import models
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from ..services import segments
+from .text_choices import ContentPreferences
+
+NON_FILTER_PARAMS = {
+    ALL_VAR,
+    ERROR_FLAG,
+    IS_POPUP_VAR,
+    ORDER_VAR,
+    PAGE_VAR,
+    TO_FIELD_VAR,
+    "_facets",
+    "_changelist_filters",
+}
+
+
+def get_changelist_filters(request):
+    """Returns the changelist filter parameters of `request`.
+
+    Returns None when the changelist is searched, since search results are not
+    a segment and are always counted live.
+
+    """
+    if request.GET.get(SEARCH_VAR):
+        return None
+    return {
+        key: value
+        for key, value in request.GET.items()
+        if key not in NON_FILTER_PARAMS and key != SEARCH_VAR
+    }
+
+
+class SegmentCountPaginator(Paginator):
+    """A paginator counting the changelist through the segment count cache.
+
+    Args:
+        filters (dict): The changelist filters, or None to count live.
+        estimate (bool): Whether the unfiltered count may be the database's
+            row estimate instead of an exact count.
+
+    """
+
+    def __init__(self, *args, filters=None, estimate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.filters = filters
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.filters is None:
+            return super().count
+        if not self.filters and self.estimate:
+            return segments.get_estimated_count(self.object_list.db)
+        return segments.get_filtered_count(self.filters, self.object_list)
+
+
+class CachedFacetsMixin:
+    """Serves the facet counts of a field list filter from the segment cache.
+
+    Facets of an otherwise unfiltered changelist come from the per-value
+    counters; with other filters applied they are computed once and cached
+    until the next change to the subscribers.
+
+    """
+
+    def get_facet_queryset(self, changelist):
+        filters = get_changelist_filters(self.request)
+        if filters is None:
+            return super().get_facet_queryset(changelist)
+        other_filters = {
+            key: value
+            for key, value in filters.items()
+            if key not in self.expected_parameters()
+        }
+        if other_filters:
+            return segments.get_cached(
+                ("facets", self.field_path, sorted(other_filters.items())),
+                lambda: super(CachedFacetsMixin, self).get_facet_queryset(changelist),
+            )
+        counts = segments.get_segment_counts(self.field_path)
+        return self.facets_from_counts(counts)
+
+
+class CachedBooleanFieldListFilter(CachedFacetsMixin, admin.BooleanFieldListFilter):
+    def facets_from_counts(self, counts):
+        return {
+            "true__c": counts[True],
+            "false__c": counts[False],
+            "null__c": 0,
+        }
+
+
+class CachedChoicesFieldListFilter(CachedFacetsMixin, admin.ChoicesFieldListFilter):
+    def facets_from_counts(self, counts):
+        return {
+            f"{index}__c": counts.get(value, 0)
+            for index, (value, _label) in enumerate(self.field.flatchoices)
+        }
+
+
+class CachedPreferencesListFilter(CachedFacetsMixin, admin.FieldListFilter):
+    """Filters a :class:`PreferencesField` by one content preference.
+
+    A choice matches every subscriber wanting that content type, whatever
+    else they want, through the ``has_any`` lookup.
+
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__has_any"
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {
+            f"{index}__c": models.Count(
+                pk_attname, filter=models.Q((self.lookup_kwarg, value))
+            )
+            for index, value in enumerate(ContentPreferences.values)
+        }
+
+    def facets_from_counts(self, counts):
+        return {
+            f"{index}__c": counts.get(value, 0)
+            for index, value in enumerate(ContentPreferences.values)
+        }
+
+    def choices(self, changelist):
+        # Facets were added to the admin in Django 5.0.
+        add_facets = getattr(changelist, "add_facets", False)
+        facet_counts = self.get_facet_queryset(changelist) if add_facets else None
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "display": _("All"),
+        }
+        for index, (value, title) in enumerate(ContentPreferences.choices):
+            if facet_counts is not None:
+                title = f"{title} ({facet_counts[f'{index}__c']})"
+            yield {
+                "selected": self.lookup_val is not None and value in self.lookup_val,
+                "query_string": changelist.get_query_string({self.lookup_kwarg: value}),
+                "display": title,
+            }
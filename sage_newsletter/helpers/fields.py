@@ -0,0 +1,284 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models.lookups import In
+from django.db.models.query_utils import DeferredAttribute
+from django.utils import translation
+
+from .text_choices import ContentPreferences
+from .timezones import get_send_hour
+
+
+def normalize_email(email):
+    """Returns the canonical, case-insensitive form of an email address.
+
+    Addresses are stripped and lowercased as a whole. The local part is
+    case-sensitive in theory, but no mail provider treats it that way, and
+    storing ``Foo@x.com`` and ``foo@x.com`` as two subscribers only doubles
+    the mail they receive.
+
+    """
+    if not email:
+        return email
+    return email.strip().lower()
+
+
+class EmailDomain(models.Func):
+    """The domain of an email column, e.g. ``EmailDomain("email")``.
+
+    The ``"@"`` is part of the SQL rather than a query parameter, so the
+    expression compiles to the same SQL in queries as in the functional index
+    declared on the subscriber model and the database can match the two.
+
+    """
+
+    template = "SUBSTR(%(expressions)s, INSTR(%(expressions)s, '@') + 1)"
+    output_field = models.CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="SUBSTR(%(expressions)s, STRPOS(%(expressions)s, '@') + 1)",
+            **extra_context,
+        )
+
+
+def normalize_language(code):
+    """Returns the canonical form of a language code.
+
+    Codes are lowercased with ``-`` separators and mapped to the closest
+    variant in ``settings.LANGUAGES``, so ``"en_US"``, ``"EN-us"`` and
+    ``"en-us"`` all become ``"en"`` when only ``"en"`` is configured. Unknown
+    codes are only lowercased.
+
+    """
+    if not code:
+        return code
+    code = code.strip().replace("_", "-").lower()
+    try:
+        return translation.get_supported_language_variant(code)
+    except LookupError:
+        return code
+
+
+class LanguageCodeField(models.CharField):
+    """A CharField storing normalized language codes.
+
+    Values are normalized with :func:`normalize_language` on every write,
+    including ``bulk_create()`` and ``update()``, and in lookups, so grouping
+    and filtering by language never splits one language into several rows.
+
+    """
+
+    def pre_save(self, model_instance, add):
+        value = normalize_language(super().pre_save(model_instance, add))
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def get_prep_value(self, value):
+        return normalize_language(super().get_prep_value(value))
+
+
+class EmailAddressField(models.EmailField):
+    """An EmailField storing canonical email addresses.
+
+    Values are normalized with :func:`normalize_email` on every write,
+    including ``bulk_create()`` and ``update()``, and in lookups, so any
+    spelling of an address finds the one stored row.
+
+    """
+
+    def pre_save(self, model_instance, add):
+        value = normalize_email(super().pre_save(model_instance, add))
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def get_prep_value(self, value):
+        return normalize_email(super().get_prep_value(value))
+
+
+class PreferenceSet(frozenset):
+    """The content preferences of a subscriber, stored as a bitmask.
+
+    Every :class:`ContentPreferences` value owns one bit, in declaration
+    order, so new preferences must be appended and never reordered. The set
+    prints as its comma separated codes, e.g. ``"NEWS,DEALS"``, which is also
+    what :meth:`parse` reads back.
+
+    """
+
+    BITS = {value: 1 << index for index, value in enumerate(ContentPreferences.values)}
+
+    @classmethod
+    def parse(cls, value):
+        """Builds a set from a mask, a comma separated string or an iterable.
+
+        Raises:
+            ValidationError: If a code is not a :class:`ContentPreferences`.
+
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, int):
+            return cls.from_mask(value)
+        if isinstance(value, str):
+            value = value.split(",")
+        codes = {str(code).strip().upper() for code in value} - {""}
+        unknown = codes - cls.BITS.keys()
+        if unknown:
+            raise ValidationError(
+                f"Invalid preferences {', '.join(sorted(unknown))}.", code="invalid"
+            )
+        return cls(codes)
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls(code for code, bit in cls.BITS.items() if mask & bit)
+
+    @property
+    def mask(self):
+        return sum(self.BITS[code] for code in self)
+
+    @property
+    def labels(self):
+        """The translated labels, in declaration order."""
+        return [label for code, label in ContentPreferences.choices if code in self]
+
+    def __str__(self):
+        return ",".join(code for code in self.BITS if code in self)
+
+    def __repr__(self):
+        return f"PreferenceSet({str(self)!r})"
+
+
+class PreferencesFormField(forms.MultipleChoiceField):
+    """Checkboxes of the :class:`ContentPreferences`."""
+
+    widget = forms.CheckboxSelectMultiple
+
+    def prepare_value(self, value):
+        if isinstance(value, PreferenceSet):
+            return [code for code in PreferenceSet.BITS if code in value]
+        return value
+
+
+class PreferencesDescriptor(DeferredAttribute):
+    """Converts the values assigned to a :class:`PreferencesField`."""
+
+    def __set__(self, instance, value):
+        if value is not None:
+            try:
+                value = PreferenceSet.parse(value)
+            except ValidationError:
+                # Left for full_clean() to report.
+                pass
+        instance.__dict__[self.field.attname] = value
+
+
+class PreferencesField(models.PositiveSmallIntegerField):
+    """Stores a :class:`PreferenceSet` as an integer bitmask.
+
+    Model instances hold a :class:`PreferenceSet`; masks, comma separated
+    strings and iterables of codes are converted on assignment and accepted in
+    ``bulk_create()``, ``update()`` and lookups. Filter with the ``has_any``
+    and ``has_all`` lookups, e.g. ``preferences__has_any=["NEWS", "DEALS"]``.
+    They compile to an ``IN`` list of the matching masks, which an index on
+    the column serves, rather than to a bitwise expression that no index can.
+    The list holds at most ``2 ** len(ContentPreferences)`` values.
+
+    """
+
+    descriptor_class = PreferencesDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else PreferenceSet.from_mask(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        return PreferenceSet.parse(value)
+
+    def get_prep_value(self, value):
+        value = super(models.IntegerField, self).get_prep_value(value)
+        if value is None or isinstance(value, int):
+            return value
+        return PreferenceSet.parse(value).mask
+
+    def get_default(self):
+        return self.to_python(super().get_default())
+
+    def pre_save(self, model_instance, add):
+        value = self.to_python(super().pre_save(model_instance, add))
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def validate(self, value, model_instance):
+        super().validate(value, model_instance)
+        if not value and not self.blank:
+            raise ValidationError(self.error_messages["blank"], code="blank")
+
+    def run_validators(self, value):
+        super().run_validators(None if value is None else value.mask)
+
+    def value_to_string(self, obj):
+        return str(self.value_from_object(obj))
+
+    def formfield(self, **kwargs):
+        # Skips the min_value and max_value of the integer form fields.
+        return super(models.IntegerField, self).formfield(
+            **{
+                "form_class": PreferencesFormField,
+                "choices": ContentPreferences.choices,
+                **kwargs,
+            }
+        )
+
+
+class PreferencesLookup(In):
+    """Matches the masks holding the preferences of the right-hand side."""
+
+    def get_prep_lookup(self):
+        mask = PreferenceSet.parse(self.rhs).mask
+        self.rhs = [
+            value
+            for value in range(1 << len(PreferenceSet.BITS))
+            if self.matches(value, mask)
+        ]
+        return super().get_prep_lookup()
+
+
+@PreferencesField.register_lookup
+class HasAnyPreference(PreferencesLookup):
+    lookup_name = "has_any"
+
+    @staticmethod
+    def matches(value, mask):
+        return value & mask
+
+
+@PreferencesField.register_lookup
+class HasAllPreferences(PreferencesLookup):
+    lookup_name = "has_all"
+
+    @staticmethod
+    def matches(value, mask):
+        return value & mask == mask
+
+
+class SendHourField(models.PositiveSmallIntegerField):
+    """The UTC hour in which a subscriber's local send window opens.
+
+    The value is computed on every save from the ``timezone`` and
+    ``language`` of the instance (see
+    :func:`~sage_newsletter.helpers.timezones.get_send_hour`), which covers
+    ``save()``, ``bulk_create()`` and the signup upsert. Rows changed with
+    ``update()`` and buckets moved by daylight saving time are caught up by
+    :func:`~sage_newsletter.services.scheduling.schedule_send_hours`.
+
+    """
+
+    def pre_save(self, model_instance, add):
+        value = get_send_hour(model_instance.timezone, model_instance.language)
+        setattr(model_instance, self.attname, value)
+        return value
@@ -15,6 +15,39 @@ class FrequencyPreferences(models.TextChoices):
 
 
 class LanguagePreferences(models.TextChoices):
-    EN = "EN", _("English")
-    ES = "FA", _("Spanish")
-    FR = "AR", _("Arabic")
+    EN = "en", _("English")
+    ES = "es", _("Spanish")
+    FR = "fr", _("French")
+    FA = "fa", _("Persian")
+    AR = "ar", _("Arabic")
+
+
+class SubscriptionStatus(models.TextChoices):
+    NEW = "NEW", _("New")
+    REACTIVATED = "REACTIVATED", _("Reactivated")
+    ALREADY_ACTIVE = "ALREADY_ACTIVE", _("Already active")
+    SUPPRESSED = "SUPPRESSED", _("Suppressed")
+
+
+class ConfirmationStatus(models.TextChoices):
+    CONFIRMED = "CONFIRMED", _("Confirmed")
+    ALREADY_CONFIRMED = "ALREADY_CONFIRMED", _("Already confirmed")
+    EXPIRED = "EXPIRED", _("Expired")
+    INVALID = "INVALID", _("Invalid")
+
+
+class DeliveryStatus(models.TextChoices):
+    PENDING = "PENDING", _("Pending")
+    SENDING = "SENDING", _("Sending")
+    SENT = "SENT", _("Sent")
+    FAILED = "FAILED", _("Failed")
+
+
+class SuppressionReason(models.TextChoices):
+    BOUNCE = "BOUNCE", _("Bounce")
+    COMPLAINT = "COMPLAINT", _("Complaint")
+
+
+class TrackingEventKind(models.TextChoices):
+    OPEN = "OPEN", _("Open")
+    CLICK = "CLICK", _("Click")
@@ -0,0 +1,71 @@
+import zoneinfo
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone as tz
+
+
+def get_local_send_hour():
+    """Returns the local hour (0-23) at which newsletters should arrive."""
+    return getattr(settings, "NEWSLETTER_LOCAL_SEND_HOUR", 9)
+
+
+def validate_timezone(value):
+    """Raises ValidationError unless `value` is an IANA time zone name."""
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f"Unknown time zone {value!r}.", code="invalid")
+
+
+def resolve_timezone(name, language):
+    """Returns the time zone of a subscriber.
+
+    The subscriber's own time zone wins, then the zone of its language in the
+    ``NEWSLETTER_LANGUAGE_TIMEZONES`` setting, e.g. ``{"fa": "Asia/Tehran"}``,
+    then ``TIME_ZONE``. Unknown names are skipped.
+
+    Args:
+        name (str): The stored time zone name, may be empty.
+        language (str): The normalized language code of the subscriber.
+
+    Returns:
+        tzinfo: The resolved zone, UTC if none of the names is known.
+
+    """
+    candidates = (
+        name,
+        getattr(settings, "NEWSLETTER_LANGUAGE_TIMEZONES", {}).get(language),
+        settings.TIME_ZONE,
+    )
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            return zoneinfo.ZoneInfo(candidate)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            continue
+    return dt_timezone.utc
+
+
+def get_send_hour(name, language, now=None):
+    """Returns the UTC hour in which a subscriber's local send window opens.
+
+    The window opens at ``NEWSLETTER_LOCAL_SEND_HOUR`` local time. Zones whose
+    offset is not a whole hour are bucketed into the UTC hour the local send
+    time falls in, e.g. 09:00 in Asia/Kolkata (03:30 UTC) into hour 3. The
+    offset is taken at `now`, so buckets move with daylight saving time.
+
+    Args:
+        name (str): The stored time zone name, may be empty.
+        language (str): The normalized language code of the subscriber.
+        now (datetime, optional): The reference time. Defaults to now.
+
+    Returns:
+        int: The UTC hour, 0 to 23.
+
+    """
+    local = (now or tz.now()).astimezone(resolve_timezone(name, language))
+    opens = local.replace(hour=get_local_send_hour(), minute=0, second=0, microsecond=0)
+    return opens.astimezone(dt_timezone.utc).hour
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+
+
+def build_absolute_url(viewname, args=None):
+    """Returns the absolute URL of a view for use outside a request.
+
+    Links in emails are built against the ``NEWSLETTER_SITE_URL`` setting,
+    e.g. ``"https://example.com"``.
+
+    Raises:
+        ImproperlyConfigured: If ``NEWSLETTER_SITE_URL`` is not set.
+
+    """
+    site_url = getattr(settings, "NEWSLETTER_SITE_URL", None)
+    if not site_url:
+        raise ImproperlyConfigured(
+            "NEWSLETTER_SITE_URL must be set to build links in newsletter emails."
+        )
+    return site_url.rstrip("/") + reverse(viewname, args=args)
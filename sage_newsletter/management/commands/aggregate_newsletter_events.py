@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from sage_newsletter.services import aggregate_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll recorded newsletter opens and clicks into the subscribers' "
+        "last_opened, open_count and click_count. Safe to run concurrently "
+        "and on a schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of events aggregated per transaction.",
+        )
+        parser.add_argument(
+            "--database",
+            default=None,
+            help="Database alias of the events.",
+        )
+
+    def handle(self, *args, **options):
+        result = aggregate_events(
+            batch_size=options["batch_size"], using=options["database"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Aggregated {result.events} events into {result.subscribers} "
+                f"subscribers in {result.batches} batches."
+            )
+        )
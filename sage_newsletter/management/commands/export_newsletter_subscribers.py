@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+
+from sage_newsletter.helpers.text_choices import (
+    ContentPreferences,
+    FrequencyPreferences,
+)
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream subscribers to a CSV or JSON Lines file, optionally filtered."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            default="csv",
+            help="Output format.",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Output file path, '-' for standard output.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows fetched per database round-trip.",
+        )
+        parser.add_argument(
+            "--active",
+            choices=["yes", "no"],
+            help="Only export active (or inactive) subscribers.",
+        )
+        parser.add_argument(
+            "--confirmed",
+            choices=["yes", "no"],
+            help="Only export confirmed (or unconfirmed) subscribers.",
+        )
+        parser.add_argument("--frequency", choices=FrequencyPreferences.values)
+        parser.add_argument(
+            "--preferences",
+            choices=ContentPreferences.values,
+            action="append",
+            help="Only export subscribers wanting this content type; repeatable.",
+        )
+        parser.add_argument("--language", help="Only export this language code.")
+
+    def handle(self, *args, **options):
+        filters = {}
+        for option, lookup in (("active", "is_active"), ("confirmed", "confirmed")):
+            if options[option]:
+                filters[lookup] = options[option] == "yes"
+        for name in ("frequency", "language"):
+            if options[name]:
+                filters[name] = options[name]
+        if options["preferences"]:
+            filters["preferences__has_any"] = options["preferences"]
+        queryset = NewsletterSubscriber.objects.filter(**filters)
+        lines = iter_export(
+            queryset, options["format"], chunk_size=options["chunk_size"]
+        )
+
+        if options["output"] == "-":
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as stream:
+            stream.writelines(lines)
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sage_newsletter.services import SubscriberImporter, iter_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream subscribers from a CSV (with a header row) or JSON Lines file "
+        "into the database in batches. Recognized columns are email, "
+        "preferences (comma separated), frequency, language, timezone, "
+        "confirmed, gdpr_consent and is_active."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the file to import.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            default=None,
+            help="File format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of records validated and written per transaction.",
+        )
+        parser.add_argument(
+            "--database",
+            default=None,
+            help="Database alias to import into.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt == "json":
+            fmt = "jsonl"
+        if fmt not in ("csv", "jsonl"):
+            raise CommandError(
+                f"Cannot infer the format of {path}, pass --format csv or jsonl."
+            )
+
+        importer = SubscriberImporter(
+            batch_size=options["batch_size"], using=options["database"]
+        )
+        with path.open(newline="", encoding="utf-8-sig") as stream:
+            result = importer.run(iter_records(stream, fmt))
+
+        for line, error in result.errors:
+            self.stderr.write(f"Record {line}: {error}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {result.processed} records: {result.written} written, "
+                f"{result.duplicates} duplicates, {result.skipped} skipped."
+            )
+        )
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sage_newsletter.services import (
+    ingest_events,
+    iter_jsonl_events,
+    iter_payload_events,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Suppress the addresses of bounce and complaint events read from a "
+        "JSON webhook payload (a list of events or an object holding them "
+        "under 'events') or a JSON Lines file with one event per line, and "
+        "deactivate the matching subscribers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the file to ingest.")
+        parser.add_argument(
+            "--format",
+            choices=["json", "jsonl"],
+            default=None,
+            help="File format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of events applied per batch.",
+        )
+        parser.add_argument(
+            "--database",
+            default=None,
+            help="Database alias to write to.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in ("json", "jsonl"):
+            raise CommandError(
+                f"Cannot infer the format of {path}, pass --format json or jsonl."
+            )
+
+        with path.open(encoding="utf-8-sig") as stream:
+            try:
+                if fmt == "json":
+                    events = iter_payload_events(json.load(stream))
+                else:
+                    events = iter_jsonl_events(stream)
+                result = ingest_events(
+                    events,
+                    batch_size=options["batch_size"],
+                    using=options["database"],
+                )
+            except ValueError as error:
+                raise CommandError(f"Invalid event file {path}: {error}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Received {result.received} events: {result.suppressed} addresses "
+                f"suppressed, {result.deactivated} subscribers deactivated, "
+                f"{result.ignored} ignored."
+            )
+        )
@@ -0,0 +1,189 @@
+import json
+import platform
+import time
+from importlib import metadata
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone as tz
+
+from sage_newsletter.benchmarks import (
+    benchmark_actions,
+    benchmark_admin,
+    benchmark_signup,
+    clear_subscribers,
+    generate_subscribers,
+    measure,
+)
+from sage_newsletter.benchmarks.signup import run_signup_load
+from sage_newsletter.services import NewsletterDispatcher
+
+SCENARIOS = ["due", "form", "admin", "actions", "signup"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the newsletter against synthetic data. The 'due' scenario "
+        "prints the plan and latency of the due-for-send query, 'form' times "
+        "signups through the form and the view, 'admin' the subscriber "
+        "changelist, filtered and searched, 'actions' the admin bulk actions "
+        "on a whole segment, and 'signup' compares sync and async signup "
+        "throughput under concurrency. 'all' runs every scenario on one data "
+        "set; --json writes the results in a machine-readable form."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            choices=SCENARIOS + ["all"],
+            default="due",
+            help="Which benchmark to run.",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Number of synthetic subscribers to generate.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timed runs per measurement.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Chunk size used by the dispatcher query.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Number of signups posted per view in the signup scenario.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of in-flight signups in the signup scenario.",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to benchmark.",
+        )
+        parser.add_argument(
+            "--json",
+            dest="json_path",
+            default=None,
+            help="Write the results and run metadata as JSON to this path.",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the synthetic subscribers after the run.",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        scenarios = SCENARIOS if options["scenario"] == "all" else [options["scenario"]]
+        self.results = []
+        try:
+            if scenarios != ["signup"]:
+                self.generate(options)
+            for scenario in scenarios:
+                getattr(self, f"benchmark_{scenario}")(options)
+        finally:
+            if not options["keep"]:
+                clear_subscribers(using=using)
+        if options["json_path"]:
+            self.write_json(options, scenarios)
+
+    def generate(self, options):
+        using = options["database"]
+        vendor = connections[using].vendor
+        self.stdout.write(f"Generating {options['rows']} subscribers on {vendor}...")
+        started = time.perf_counter()
+        generate_subscribers(options["rows"], using=using)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  done in {elapsed:.2f}s")
+        self.results.append(
+            {"name": "generate", "rows": options["rows"], "elapsed_s": elapsed}
+        )
+        if vendor == "postgresql":
+            with connections[using].cursor() as cursor:
+                cursor.execute("ANALYZE sage_newsletter_subscriber")
+
+    def benchmark_due(self, options):
+        using = options["database"]
+        repeat = options["repeat"]
+
+        dispatcher = NewsletterDispatcher(None, chunk_size=options["chunk_size"])
+        due = dispatcher.get_due_queryset(tz.now()).using(using)
+        first_chunk = due.only(*dispatcher.only_fields).order_by("pk")[
+            : dispatcher.chunk_size
+        ]
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Due chunk query plan:"))
+        self.stdout.write(first_chunk.explain())
+        self.stdout.write(self.style.MIGRATE_HEADING("Due count query plan:"))
+        self.stdout.write(due.explain())
+
+        self.report(
+            measure("due chunk", lambda: len(first_chunk.all()), repeat, using=using)
+        )
+        self.report(measure("due count", due.count, repeat, using=using))
+
+    def benchmark_form(self, options):
+        for result in benchmark_signup(options["repeat"], using=options["database"]):
+            self.report(result)
+
+    def benchmark_admin(self, options):
+        for result in benchmark_admin(options["repeat"], using=options["database"]):
+            self.report(result)
+
+    def benchmark_actions(self, options):
+        for result in benchmark_actions(options["repeat"], using=options["database"]):
+            self.report(result)
+
+    def benchmark_signup(self, options):
+        for mode in ("sync", "async"):
+            stats = run_signup_load(
+                mode,
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+            )
+            self.results.append({"name": f"{mode} signup load", **stats})
+            self.stdout.write(
+                f"{mode} signup: {stats['throughput_rps']:.1f} req/s, "
+                f"p50 {stats['p50_ms']:.2f}ms, p95 {stats['p95_ms']:.2f}ms, "
+                f"{stats['errors']} errors "
+                f"({stats['requests']} requests, concurrency {stats['concurrency']})"
+            )
+
+    def report(self, result):
+        self.results.append(result.as_dict())
+        self.stdout.write(str(result))
+
+    def write_json(self, options, scenarios):
+        try:
+            version = metadata.version("django-sage-newsletter")
+        except metadata.PackageNotFoundError:
+            version = None
+        document = {
+            "version": version,
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "database": connections[options["database"]].vendor,
+            "rows": options["rows"],
+            "repeat": options["repeat"],
+            "scenarios": scenarios,
+            "created_at": tz.now().isoformat(),
+            "results": self.results,
+        }
+        with open(options["json_path"], "w", encoding="utf-8") as stream:
+            json.dump(document, stream, indent=2)
+        self.stdout.write(f"Results written to {options['json_path']}")
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+
+from sage_newsletter.services import DeliveryWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued newsletter deliveries. Any number of workers can run "
+        "concurrently, on one or many hosts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of deliveries claimed at once.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=None,
+            help="Number of threads sending a claimed batch.",
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=None,
+            help="Seconds after which deliveries of a crashed worker are reclaimed.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit as soon as the queue is drained instead of polling.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            "--database",
+            default=None,
+            help="Database alias of the queue.",
+        )
+
+    def handle(self, *args, **options):
+        worker = DeliveryWorker(
+            batch_size=options["batch_size"],
+            threads=options["threads"],
+            lease=options["lease"],
+            using=options["database"],
+        )
+        try:
+            result = worker.run(
+                once=options["once"], poll_interval=options["poll_interval"]
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {result.sent} deliveries in {result.batches} batches "
+                f"({result.retried} retried, {result.failed} failed)."
+            )
+        )
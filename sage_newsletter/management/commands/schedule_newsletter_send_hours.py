@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from sage_newsletter.services import schedule_send_hours
+
+
+class Command(BaseCommand):
+    help = (
+        "Move subscribers into the UTC send hour bucket of their time zone. "
+        "Run daily so daylight saving time changes and bulk updates are "
+        "picked up by local-time delivery."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=None,
+            help="Database alias of the subscribers.",
+        )
+
+    def handle(self, *args, **options):
+        moved = schedule_send_hours(using=options["database"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Moved {moved} subscribers to another send hour.")
+        )
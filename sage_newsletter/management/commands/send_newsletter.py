@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from sage_newsletter.services import NewsletterDispatcher, get_unsubscribe_url
+
+
+class Command(BaseCommand):
+    help = "Send a newsletter to every subscriber that is due for one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subject", required=True, help="Subject line.")
+        parser.add_argument(
+            "--template",
+            required=True,
+            help=(
+                "Template rendered for each subscriber as the HTML body, with the "
+                "subscriber and unsubscribe_url context variables."
+            ),
+        )
+        parser.add_argument(
+            "--from-email",
+            default=None,
+            help="Sender address. Defaults to DEFAULT_FROM_EMAIL.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Number of subscribers loaded and sent per chunk.",
+        )
+        parser.add_argument(
+            "--local-time",
+            action="store_true",
+            default=None,
+            help=(
+                "Only send to subscribers whose local send window opens in the "
+                "current hour; run the command hourly. Defaults to "
+                "NEWSLETTER_LOCAL_TIME_DELIVERY."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        subject = options["subject"]
+        template = options["template"]
+        from_email = options["from_email"] or settings.DEFAULT_FROM_EMAIL
+
+        def build_message(subscriber):
+            context = {"subscriber": subscriber}
+            if getattr(settings, "NEWSLETTER_SITE_URL", None):
+                context["unsubscribe_url"] = get_unsubscribe_url(subscriber)
+            html = render_to_string(template, context)
+            message = EmailMultiAlternatives(
+                subject, strip_tags(html), from_email, [subscriber.email]
+            )
+            message.attach_alternative(html, "text/html")
+            return message
+
+        dispatcher = NewsletterDispatcher(
+            build_message,
+            chunk_size=options["chunk_size"],
+            local_time=options["local_time"],
+        )
+        result = dispatcher.dispatch()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {result.sent} newsletters in {result.chunks} chunks "
+                f"({result.failed} failed)."
+            )
+        )
@@ -0,0 +1,219 @@
+from collections import namedtuple
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import models
+
+from .helpers.fields import EmailDomain, normalize_email
+from .helpers.text_choices import FrequencyPreferences
+
+FREQUENCY_WINDOWS = {
+    FrequencyPreferences.DAILY: timedelta(days=1),
+    FrequencyPreferences.WEEKLY: timedelta(weeks=1),
+    FrequencyPreferences.MONTHLY: timedelta(days=30),
+}
+
+# Columns needed to build and address a newsletter message.
+CHUNK_FIELDS = (
+    "id",
+    "email",
+    "language",
+    "preferences",
+    "frequency",
+    "unsubscribe_token",
+)
+
+LanguageSegment = namedtuple("LanguageSegment", ["language", "count", "queryset"])
+
+
+class NewsletterSubscriberQuerySet(models.QuerySet):
+    """QuerySet of :class:`NewsletterSubscriber` with the segment queries.
+
+    The filters chain in any order, e.g.
+    ``NewsletterSubscriber.objects.due(now).for_language("fa")``, and are
+    shaped to be served by the partial indexes declared on the model.
+
+    """
+
+    def active(self):
+        """Returns the subscribers whose subscription is active."""
+        return self.filter(is_active=True)
+
+    def confirmed(self):
+        """Returns the subscribers who confirmed their email address."""
+        return self.filter(confirmed=True)
+
+    def due(self, now):
+        """Returns the subscribers that should receive a newsletter at `now`.
+
+        Args:
+            now (datetime): The reference time of the dispatch run.
+
+        Returns:
+            QuerySet: Active, confirmed subscribers whose frequency window has
+            elapsed since their last delivery.
+
+        """
+        due = models.Q(last_sent__isnull=True)
+        for frequency, window in FREQUENCY_WINDOWS.items():
+            due |= models.Q(frequency=frequency, last_sent__lte=now - window)
+        return self.active().confirmed().filter(due)
+
+    def in_send_window(self, now):
+        """Returns the subscribers whose local send window opens at `now`.
+
+        The UTC hour of `now` is matched against the precomputed
+        ``send_hour`` bucket, so no time zone math runs per row and the
+        partial ``newsletter_send_hour_idx`` index serves the lookup.
+
+        """
+        return self.filter(send_hour=now.astimezone(dt_timezone.utc).hour)
+
+    def for_language(self, language):
+        """Returns the subscribers preferring `language`.
+
+        The code is normalized like the stored values, so ``"EN_us"`` matches
+        subscribers stored as ``"en"``.
+
+        """
+        return self.filter(language=language)
+
+    def for_preference(self, preference):
+        """Returns the subscribers wanting the `preference` content type."""
+        return self.has_any_preference(preference)
+
+    def has_any_preference(self, *preferences):
+        """Returns the subscribers wanting at least one of `preferences`.
+
+        The bitmask test is compiled to an ``IN`` list of the matching masks
+        (see :class:`~sage_newsletter.helpers.fields.PreferencesField`), which
+        the partial ``newsletter_preference_idx`` index serves for active,
+        confirmed subscribers.
+
+        """
+        return self.filter(preferences__has_any=preferences)
+
+    def has_all_preferences(self, *preferences):
+        """Returns the subscribers wanting every one of `preferences`."""
+        return self.filter(preferences__has_all=preferences)
+
+    def for_email(self, email):
+        """Returns the subscriber of `email`, in any letter case."""
+        return self.filter(email=email)
+
+    def for_domain(self, domain):
+        """Returns the subscribers whose address is at `domain`.
+
+        The lookup is served by the functional ``newsletter_email_domain_idx``
+        index instead of a ``LIKE '%@domain'`` scan.
+
+        """
+        return self.alias(email_domain=EmailDomain("email")).filter(
+            email_domain=normalize_email(domain).lstrip("@")
+        )
+
+    def search_email(self, term):
+        """Returns the subscribers matching an admin search `term`.
+
+        Every mode is an index lookup: ``@example.com`` finds a domain, a
+        complete address finds that subscriber and anything else is an
+        address prefix (served on PostgreSQL by the ``varchar_pattern_ops``
+        index Django creates next to the unique index).
+
+        """
+        term = normalize_email(term)
+        if not term:
+            return self
+        if term.startswith("@"):
+            return self.for_domain(term)
+        try:
+            validate_email(term)
+        except ValidationError:
+            return self.filter(email__startswith=term)
+        return self.for_email(term)
+
+    def iter_chunks(self, size, fields=CHUNK_FIELDS):
+        """Yields lists of subscribers using keyset pagination on the pk.
+
+        Unlike ``OFFSET`` pagination every chunk is an index range scan, so
+        the cost of fetching a chunk does not grow with its position, and rows
+        inserted or deleted while walking never shift later chunks.
+
+        Args:
+            size (int): Maximum number of subscribers per chunk.
+            fields (tuple, optional): The columns loaded with ``only()``.
+                Defaults to the columns needed to send a newsletter.
+
+        Yields:
+            list: Up to `size` subscribers ordered by primary key.
+
+        """
+        queryset = self.only(*fields).order_by("pk")
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(page[:size])
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < size:
+                return
+            last_pk = chunk[-1].pk
+
+    def mark_sent(self, pks, when):
+        """Stamps ``last_sent`` on the given subscribers with a single UPDATE.
+
+        Returns:
+            int: The number of updated rows.
+
+        """
+        if not pks:
+            return 0
+        return self.filter(pk__in=pks).update(last_sent=when)
+
+    def due_counts_by_language(self, now):
+        """Counts the due subscribers of every language with one GROUP BY.
+
+        Returns:
+            dict: Due subscriber count keyed by language code, for languages
+            with at least one due subscriber.
+
+        """
+        rows = (
+            self.due(now)
+            .order_by("language")
+            .values_list("language")
+            .annotate(count=models.Count("pk"))
+        )
+        return dict(rows)
+
+    def due_by_language(self, now):
+        """Splits the due subscribers into one segment per language.
+
+        Returns:
+            list: :class:`LanguageSegment` tuples of the language code, its
+            number of due subscribers and a queryset of them, ordered by
+            language.
+
+        """
+        return [
+            LanguageSegment(language, count, self.due(now).for_language(language))
+            for language, count in self.due_counts_by_language(now).items()
+        ]
+
+
+class NewsletterSubscriberManager(
+    models.Manager.from_queryset(NewsletterSubscriberQuerySet)
+):
+    """Manager of :class:`NewsletterSubscriber` with language-segmented queries.
+
+    Every :class:`NewsletterSubscriberQuerySet` method is available on the
+    manager. Language codes are normalized on write (see
+    :class:`~sage_newsletter.helpers.fields.LanguageCodeField`), so grouping by
+    ``language`` yields exactly one segment per configured language. The
+    per-language due queries are served by the partial
+    ``newsletter_language_due_idx`` index.
+
+    """
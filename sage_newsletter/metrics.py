@@ -0,0 +1,255 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+# Prometheus' default latency buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class NullMetrics:
+    """Discards every measurement; the default backend.
+
+    :func:`instrument` checks ``enabled`` before doing anything else, so
+    instrumented code pays one attribute lookup while metrics are off.
+
+    """
+
+    enabled = False
+
+    def observe(self, operation, seconds, queries=None, rows=None, labels=None):
+        pass
+
+
+class Series:
+    """The measurements of one operation and label set."""
+
+    def __init__(self, buckets, labels):
+        self.buckets = buckets
+        self.labels = labels
+        # One counter per bucket plus the implicit +Inf bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.queries = 0
+        self.rows = 0
+
+    def observe(self, seconds, queries, rows):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.queries += queries or 0
+        self.rows += rows or 0
+
+    def cumulative_counts(self):
+        """Returns ``(upper bound, observations <= bound)`` pairs, +Inf last."""
+        total, pairs = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class InMemoryMetrics:
+    """Collects latency histograms, query counts and row counts in memory.
+
+    Measurements are kept per operation and label set for the lifetime of the
+    process and can be read with :meth:`snapshot` or exported with
+    :meth:`render_prometheus` in the Prometheus text exposition format, e.g.
+    from a project's own, access-controlled metrics view. The backend is
+    thread-safe.
+
+    Args:
+        buckets (tuple, optional): Upper bounds of the latency buckets in
+            seconds. Defaults to ``NEWSLETTER_METRICS_BUCKETS`` or
+            Prometheus' default buckets.
+
+    """
+
+    enabled = True
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(
+            sorted(
+                buckets
+                or getattr(settings, "NEWSLETTER_METRICS_BUCKETS", DEFAULT_BUCKETS)
+            )
+        )
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, operation, seconds, queries=None, rows=None, labels=None):
+        labels = labels or {}
+        key = (operation, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = Series(self.buckets, labels=labels)
+            series.observe(seconds, queries, rows)
+
+    def snapshot(self):
+        """Returns a copy of every series.
+
+        Returns:
+            list: One dict per operation and label set with the number of
+            observations, the summed latency, the cumulative bucket counts
+            and the total number of queries and rows.
+
+        """
+        with self.lock:
+            return [
+                {
+                    "operation": operation,
+                    "labels": dict(series.labels),
+                    "count": series.count,
+                    "sum": series.sum,
+                    "buckets": series.cumulative_counts(),
+                    "queries": series.queries,
+                    "rows": series.rows,
+                }
+                for (operation, _labels), series in sorted(self.series.items())
+            ]
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+    def render_prometheus(self, prefix="sage_newsletter"):
+        """Returns every series in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_duration_seconds Latency of newsletter operations.",
+            f"# TYPE {prefix}_duration_seconds histogram",
+        ]
+        for item in snapshot:
+            labels = format_labels(item)
+            for bound, count in item["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(
+                    f'{prefix}_duration_seconds_bucket{{{labels},le="{le}"}} {count}'
+                )
+            lines.append(f"{prefix}_duration_seconds_sum{{{labels}}} {item['sum']}")
+            lines.append(f"{prefix}_duration_seconds_count{{{labels}}} {item['count']}")
+        for name, description in (
+            ("queries", "Database queries issued by newsletter operations."),
+            ("rows", "Rows touched by newsletter operations."),
+        ):
+            lines.append(f"# HELP {prefix}_{name}_total {description}")
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for item in snapshot:
+                lines.append(
+                    f"{prefix}_{name}_total{{{format_labels(item)}}} {item[name]}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(item):
+    labels = {"operation": item["operation"], **item["labels"]}
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+
+
+_backend = None
+
+
+def get_metrics():
+    """Returns the process-wide metrics backend.
+
+    The backend is the class named by the ``NEWSLETTER_METRICS_BACKEND``
+    setting, e.g. ``"sage_newsletter.metrics.InMemoryMetrics"``, instantiated
+    once. Without the setting measurements are discarded by
+    :class:`NullMetrics`.
+
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "NEWSLETTER_METRICS_BACKEND", None)
+        _backend = import_string(path)() if path else NullMetrics()
+    return _backend
+
+
+def reset_backend():
+    """Drops the backend so the next :func:`get_metrics` builds it again."""
+    global _backend
+    _backend = None
+
+
+class QueryCounter:
+    """A database execute wrapper counting the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Measurement:
+    """Handed out by :func:`instrument`; set ``rows`` to record a row count.
+
+    Set ``skip`` to True to drop the measurement, e.g. for an idle poll.
+
+    """
+
+    __slots__ = ("rows", "skip")
+
+    def __init__(self):
+        self.rows = None
+        self.skip = False
+
+
+@contextmanager
+def instrument(operation, using=None, count_queries=True, **labels):
+    """Measures the latency, queries and rows of the wrapped block.
+
+    The measurement is recorded even when the block raises. Queries are
+    counted with an execute wrapper on the calling thread's connection, so
+    queries run in other threads (such as those of the async ORM) are not
+    seen; pass ``count_queries=False`` for such blocks. When the metrics
+    backend is disabled nothing is timed or counted.
+
+    Args:
+        operation (str): Name of the measured operation, e.g.
+            ``"signup.post"``.
+        using (str, optional): Database alias whose queries are counted.
+            Defaults to ``"default"``.
+        count_queries (bool): Whether to count queries.
+        **labels: Extra labels of the series.
+
+    Yields:
+        Measurement: Set its ``rows`` to the number of touched rows, or its
+        ``skip`` to True to record nothing.
+
+    """
+    metrics = get_metrics()
+    measurement = Measurement()
+    if not metrics.enabled:
+        yield measurement
+        return
+    counter = QueryCounter() if count_queries else None
+    started = time.perf_counter()
+    try:
+        if counter is None:
+            yield measurement
+        else:
+            with connections[using or DEFAULT_DB_ALIAS].execute_wrapper(counter):
+                yield measurement
+    finally:
+        if not measurement.skip:
+            metrics.observe(
+                operation,
+                time.perf_counter() - started,
+                queries=None if counter is None else counter.count,
+                rows=measurement.rows,
+                labels=labels,
+            )
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-17 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="newslettersubscriber",
+            index=models.Index(
+                condition=models.Q(("confirmed", True), ("is_active", True)),
+                fields=["frequency", "last_sent"],
+                name="newsletter_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="newslettersubscriber",
+            index=models.Index(
+                fields=["language", "preferences"], name="newsletter_segment_idx"
+            ),
+        ),
+    ]
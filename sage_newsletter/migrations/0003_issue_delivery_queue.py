@@ -0,0 +1,189 @@
+# Generated by Django 5.1.15 on 2026-10-17 16:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0002_subscriber_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NewsletterIssue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.CharField(
+                        db_comment="Subject line of the newsletter issue.",
+                        help_text="The subject line of the newsletter issue.",
+                        max_length=255,
+                        verbose_name="Subject",
+                    ),
+                ),
+                (
+                    "body",
+                    models.TextField(
+                        db_comment="HTML body of the newsletter issue.",
+                        help_text="The HTML body of the newsletter issue.",
+                        verbose_name="Body",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_comment="Timestamp of when the issue was created.",
+                        default=django.utils.timezone.now,
+                        help_text="The date and time when the issue was created.",
+                        verbose_name="Created At",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Newsletter Issue",
+                "verbose_name_plural": "Newsletter Issues",
+                "db_table": "sage_newsletter_issue",
+                "db_table_comment": "Table for storing newsletter issues.",
+            },
+        ),
+        migrations.CreateModel(
+            name="NewsletterDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("SENDING", "Sending"),
+                            ("SENT", "Sent"),
+                            ("FAILED", "Failed"),
+                        ],
+                        db_comment="Delivery state: pending, sending, sent or failed.",
+                        default="PENDING",
+                        help_text="The state of the delivery in the send queue.",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        db_comment="Number of send attempts.",
+                        default=0,
+                        help_text="How many times sending has been attempted.",
+                        verbose_name="Attempts",
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        db_comment="Earliest time the delivery may be claimed by a worker.",
+                        default=django.utils.timezone.now,
+                        help_text="The earliest time the delivery may be (re)tried.",
+                        verbose_name="Next Attempt At",
+                    ),
+                ),
+                (
+                    "leased_until",
+                    models.DateTimeField(
+                        blank=True,
+                        db_comment="Expiry of the worker lease; expired leases are reclaimed.",
+                        help_text="When the claim of the sending worker expires.",
+                        null=True,
+                        verbose_name="Leased Until",
+                    ),
+                ),
+                (
+                    "lease_token",
+                    models.UUIDField(
+                        blank=True,
+                        db_comment="Token of the claim currently holding the delivery.",
+                        editable=False,
+                        help_text="Identifies the claim that leased the delivery.",
+                        null=True,
+                        verbose_name="Lease Token",
+                    ),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True,
+                        db_comment="Timestamp of the successful send.",
+                        help_text="The date and time when the message was accepted for delivery.",
+                        null=True,
+                        verbose_name="Sent At",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True,
+                        db_comment="Error message of the last failed attempt.",
+                        help_text="The error of the last failed attempt.",
+                        verbose_name="Last Error",
+                    ),
+                ),
+                (
+                    "subscriber",
+                    models.ForeignKey(
+                        db_comment="Subscriber the issue is delivered to.",
+                        help_text="The subscriber receiving the issue.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deliveries",
+                        to="sage_newsletter.newslettersubscriber",
+                        verbose_name="Subscriber",
+                    ),
+                ),
+                (
+                    "issue",
+                    models.ForeignKey(
+                        db_comment="Newsletter issue being delivered.",
+                        help_text="The newsletter issue being delivered.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deliveries",
+                        to="sage_newsletter.newsletterissue",
+                        verbose_name="Issue",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Newsletter Delivery",
+                "verbose_name_plural": "Newsletter Deliveries",
+                "db_table": "sage_newsletter_delivery",
+                "db_table_comment": "Queue of newsletter issues to send to subscribers.",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="newsletter_delivery_claim_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("issue", "subscriber"),
+                        name="newsletter_delivery_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.15 on 2026-10-17 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0003_issue_delivery_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletterissue",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_comment="Timestamp of the last change, used to invalidate rendered variants.",
+                help_text="The date and time when the issue was last changed.",
+                verbose_name="Updated At",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="newsletterissue",
+            name="body",
+            field=models.TextField(
+                db_comment="HTML body of the newsletter issue.",
+                help_text=(
+                    "The HTML body of the newsletter issue, a Django template "
+                    "rendered once per language and content preference. $email "
+                    "and $unsubscribe_url are replaced for each recipient."
+                ),
+                verbose_name="Body",
+            ),
+        ),
+    ]
@@ -0,0 +1,147 @@
+# Generated by Django 5.1.15 on 2026-10-17 16:17
+
+from django.db import migrations, models
+
+import sage_newsletter.helpers.fields
+
+
+def normalize_languages(apps, schema_editor):
+    NewsletterSubscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    subscribers = NewsletterSubscriber.objects.using(schema_editor.connection.alias)
+    codes = subscribers.order_by().values_list("language", flat=True).distinct()
+    for code in list(codes):
+        normalized = sage_newsletter.helpers.fields.normalize_language(code)
+        if normalized != code:
+            # Value() keeps the field from normalizing the lookup itself.
+            subscribers.filter(language=models.Value(code)).update(language=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0004_issue_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="newslettersubscriber",
+            name="language",
+            field=sage_newsletter.helpers.fields.LanguageCodeField(
+                choices=[
+                    ("af", "Afrikaans"),
+                    ("ar", "Arabic"),
+                    ("ar-dz", "Algerian Arabic"),
+                    ("ast", "Asturian"),
+                    ("az", "Azerbaijani"),
+                    ("bg", "Bulgarian"),
+                    ("be", "Belarusian"),
+                    ("bn", "Bengali"),
+                    ("br", "Breton"),
+                    ("bs", "Bosnian"),
+                    ("ca", "Catalan"),
+                    ("ckb", "Central Kurdish (Sorani)"),
+                    ("cs", "Czech"),
+                    ("cy", "Welsh"),
+                    ("da", "Danish"),
+                    ("de", "German"),
+                    ("dsb", "Lower Sorbian"),
+                    ("el", "Greek"),
+                    ("en", "English"),
+                    ("en-au", "Australian English"),
+                    ("en-gb", "British English"),
+                    ("eo", "Esperanto"),
+                    ("es", "Spanish"),
+                    ("es-ar", "Argentinian Spanish"),
+                    ("es-co", "Colombian Spanish"),
+                    ("es-mx", "Mexican Spanish"),
+                    ("es-ni", "Nicaraguan Spanish"),
+                    ("es-ve", "Venezuelan Spanish"),
+                    ("et", "Estonian"),
+                    ("eu", "Basque"),
+                    ("fa", "Persian"),
+                    ("fi", "Finnish"),
+                    ("fr", "French"),
+                    ("fy", "Frisian"),
+                    ("ga", "Irish"),
+                    ("gd", "Scottish Gaelic"),
+                    ("gl", "Galician"),
+                    ("he", "Hebrew"),
+                    ("hi", "Hindi"),
+                    ("hr", "Croatian"),
+                    ("hsb", "Upper Sorbian"),
+                    ("hu", "Hungarian"),
+                    ("hy", "Armenian"),
+                    ("ia", "Interlingua"),
+                    ("id", "Indonesian"),
+                    ("ig", "Igbo"),
+                    ("io", "Ido"),
+                    ("is", "Icelandic"),
+                    ("it", "Italian"),
+                    ("ja", "Japanese"),
+                    ("ka", "Georgian"),
+                    ("kab", "Kabyle"),
+                    ("kk", "Kazakh"),
+                    ("km", "Khmer"),
+                    ("kn", "Kannada"),
+                    ("ko", "Korean"),
+                    ("ky", "Kyrgyz"),
+                    ("lb", "Luxembourgish"),
+                    ("lt", "Lithuanian"),
+                    ("lv", "Latvian"),
+                    ("mk", "Macedonian"),
+                    ("ml", "Malayalam"),
+                    ("mn", "Mongolian"),
+                    ("mr", "Marathi"),
+                    ("ms", "Malay"),
+                    ("my", "Burmese"),
+                    ("nb", "Norwegian Bokmål"),
+                    ("ne", "Nepali"),
+                    ("nl", "Dutch"),
+                    ("nn", "Norwegian Nynorsk"),
+                    ("os", "Ossetic"),
+                    ("pa", "Punjabi"),
+                    ("pl", "Polish"),
+                    ("pt", "Portuguese"),
+                    ("pt-br", "Brazilian Portuguese"),
+                    ("ro", "Romanian"),
+                    ("ru", "Russian"),
+                    ("sk", "Slovak"),
+                    ("sl", "Slovenian"),
+                    ("sq", "Albanian"),
+                    ("sr", "Serbian"),
+                    ("sr-latn", "Serbian Latin"),
+                    ("sv", "Swedish"),
+                    ("sw", "Swahili"),
+                    ("ta", "Tamil"),
+                    ("te", "Telugu"),
+                    ("tg", "Tajik"),
+                    ("th", "Thai"),
+                    ("tk", "Turkmen"),
+                    ("tr", "Turkish"),
+                    ("tt", "Tatar"),
+                    ("udm", "Udmurt"),
+                    ("ug", "Uyghur"),
+                    ("uk", "Ukrainian"),
+                    ("ur", "Urdu"),
+                    ("uz", "Uzbek"),
+                    ("vi", "Vietnamese"),
+                    ("zh-hans", "Simplified Chinese"),
+                    ("zh-hant", "Traditional Chinese"),
+                ],
+                db_comment="Subscriber's preferred language code, stored normalized.",
+                default="en-us",
+                help_text="The preferred language for the newsletter.",
+                max_length=10,
+                verbose_name="Language Preference",
+            ),
+        ),
+        migrations.RunPython(normalize_languages, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="newslettersubscriber",
+            index=models.Index(
+                condition=models.Q(("confirmed", True), ("is_active", True)),
+                fields=["language", "frequency", "last_sent"],
+                name="newsletter_language_due_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.15 on 2026-10-17 16:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0005_normalize_language"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NewsletterSuppression",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "email",
+                    models.EmailField(
+                        db_comment="Lowercased email address excluded from every send.",
+                        help_text="The suppressed email address, lowercased.",
+                        max_length=254,
+                        unique=True,
+                        verbose_name="Email Address",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[("BOUNCE", "Bounce"), ("COMPLAINT", "Complaint")],
+                        db_comment="Suppression reason: hard bounce or spam complaint.",
+                        help_text="Why the address was suppressed.",
+                        max_length=10,
+                        verbose_name="Reason",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_comment="Timestamp of when the address was suppressed.",
+                        default=django.utils.timezone.now,
+                        help_text="The date and time when the address was suppressed.",
+                        verbose_name="Created At",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Newsletter Suppression",
+                "verbose_name_plural": "Newsletter Suppressions",
+                "db_table": "sage_newsletter_suppression",
+                "db_table_comment": "Addresses suppressed after bounces or complaints.",
+            },
+        ),
+    ]
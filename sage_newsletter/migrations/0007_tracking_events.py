@@ -0,0 +1,142 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0006_suppression"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslettersubscriber",
+            name="last_opened",
+            field=models.DateTimeField(
+                blank=True,
+                db_comment="Timestamp of the latest aggregated open or click.",
+                help_text=(
+                    "The date and time when the subscriber last opened or "
+                    "clicked a newsletter."
+                ),
+                null=True,
+                verbose_name="Last Opened",
+            ),
+        ),
+        migrations.AddField(
+            model_name="newslettersubscriber",
+            name="open_count",
+            field=models.PositiveIntegerField(
+                db_comment="Number of aggregated open events.",
+                default=0,
+                help_text="How many newsletter opens were recorded for the subscriber.",
+                verbose_name="Opens",
+            ),
+        ),
+        migrations.AddField(
+            model_name="newslettersubscriber",
+            name="click_count",
+            field=models.PositiveIntegerField(
+                db_comment="Number of aggregated click events.",
+                default=0,
+                help_text=(
+                    "How many newsletter link clicks were recorded for the "
+                    "subscriber."
+                ),
+                verbose_name="Clicks",
+            ),
+        ),
+        migrations.CreateModel(
+            name="NewsletterEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("OPEN", "Open"), ("CLICK", "Click")],
+                        db_comment="Event kind: open or click.",
+                        help_text="Whether the newsletter was opened or a link was clicked.",
+                        max_length=5,
+                        verbose_name="Kind",
+                    ),
+                ),
+                (
+                    "url",
+                    models.URLField(
+                        blank=True,
+                        db_comment="Target of the clicked link.",
+                        help_text="The clicked link, empty for opens.",
+                        max_length=2048,
+                        verbose_name="URL",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_comment="Timestamp of the open or click.",
+                        default=django.utils.timezone.now,
+                        help_text="The date and time when the event happened.",
+                        verbose_name="Created At",
+                    ),
+                ),
+                (
+                    "aggregated",
+                    models.BooleanField(
+                        db_comment="Flag set once the event is counted on the subscriber.",
+                        default=False,
+                        help_text=(
+                            "Whether the event was rolled into the subscriber's "
+                            "counters."
+                        ),
+                        verbose_name="Aggregated",
+                    ),
+                ),
+                (
+                    "delivery",
+                    models.ForeignKey(
+                        db_comment="Delivery whose message was opened or clicked.",
+                        help_text="The delivery the event was recorded for.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="events",
+                        to="sage_newsletter.newsletterdelivery",
+                        verbose_name="Delivery",
+                    ),
+                ),
+                (
+                    "subscriber",
+                    models.ForeignKey(
+                        db_comment="Subscriber the event is aggregated into.",
+                        help_text="The subscriber who opened or clicked the newsletter.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="events",
+                        to="sage_newsletter.newslettersubscriber",
+                        verbose_name="Subscriber",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Newsletter Event",
+                "verbose_name_plural": "Newsletter Events",
+                "db_table": "sage_newsletter_event",
+                "db_table_comment": "Open and click events of newsletter deliveries.",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("aggregated", False)),
+                        fields=["id"],
+                        name="newsletter_event_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:28
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+import sage_newsletter.helpers.fields
+
+
+# The case-insensitive constraint and the domain index are added by
+# 0008_canonical_email_constraints: PostgreSQL refuses to alter a table with
+# pending trigger events, which the cascading deletes below leave behind
+# until this migration's transaction commits.
+
+
+def canonicalize_emails(apps, schema_editor):
+    """Merges subscribers whose addresses differ only in case and lowercases.
+
+    Of every group of case variants the active, confirmed, oldest row is kept
+    and inherits the active, confirmed and consent flags and the latest
+    ``last_sent`` of the group. The other rows are deleted with their queued
+    deliveries and tracking events.
+
+    """
+    NewsletterSubscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    subscribers = NewsletterSubscriber.objects.using(schema_editor.connection.alias)
+    duplicates = (
+        subscribers.order_by()
+        .values(canonical=Lower("email"))
+        .annotate(rows=models.Count("pk"))
+        .filter(rows__gt=1)
+        .values_list("canonical", flat=True)
+    )
+    for canonical in list(duplicates):
+        group = list(
+            subscribers.annotate(canonical=Lower("email"))
+            .filter(canonical=canonical)
+            .order_by("-is_active", "-confirmed", "pk")
+        )
+        keep, others = group[0], group[1:]
+        keep.is_active = any(row.is_active for row in group)
+        keep.confirmed = any(row.confirmed for row in group)
+        keep.gdpr_consent = any(row.gdpr_consent for row in group)
+        sent = [row.last_sent for row in group if row.last_sent]
+        keep.last_sent = max(sent) if sent else None
+        subscribers.filter(pk__in=[row.pk for row in others]).delete()
+        keep.save(update_fields=["is_active", "confirmed", "gdpr_consent", "last_sent"])
+    lower = Lower("email")
+    subscribers.exclude(email=lower).update(email=lower)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0007_tracking_events"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="newslettersubscriber",
+            name="email",
+            field=sage_newsletter.helpers.fields.EmailAddressField(
+                db_comment="Unique email address, stored lowercased.",
+                help_text="The email address of the subscriber.",
+                max_length=254,
+                unique=True,
+                verbose_name="Email Address",
+            ),
+        ),
+        migrations.RunPython(canonicalize_emails, migrations.RunPython.noop),
+    ]
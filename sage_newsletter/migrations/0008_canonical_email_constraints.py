@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:28
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+import sage_newsletter.helpers.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0008_canonical_email"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="newslettersubscriber",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("email"),
+                name="newsletter_email_ci_unique",
+                violation_error_message=(
+                    "A subscriber with this email address already exists."
+                ),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="newslettersubscriber",
+            index=models.Index(
+                sage_newsletter.helpers.fields.EmailDomain("email"),
+                name="newsletter_email_domain_idx",
+            ),
+        ),
+    ]
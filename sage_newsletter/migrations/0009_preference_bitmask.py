@@ -0,0 +1,94 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:35
+
+from django.db import migrations, models
+
+import sage_newsletter.helpers.fields
+
+# The bits of the ContentPreferences as of this migration.
+PREFERENCE_BITS = {"NEWS": 1, "DEALS": 2, "TIPS": 4}
+
+
+def preferences_to_mask(apps, schema_editor):
+    """Sets the bit of every subscriber's single preference, one UPDATE each."""
+    NewsletterSubscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    subscribers = NewsletterSubscriber.objects.using(schema_editor.connection.alias)
+    for code, bit in PREFERENCE_BITS.items():
+        subscribers.filter(preferences=code).update(preferences_mask=bit)
+
+
+def mask_to_preferences(apps, schema_editor):
+    """Keeps the first selected preference, in declaration order."""
+    NewsletterSubscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    subscribers = NewsletterSubscriber.objects.using(schema_editor.connection.alias)
+    masks = range(1 << len(PREFERENCE_BITS))
+    for code, bit in reversed(PREFERENCE_BITS.items()):
+        subscribers.filter(
+            preferences_mask__in=[mask for mask in masks if mask & bit]
+        ).update(preferences=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0008_canonical_email_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslettersubscriber",
+            name="preferences_mask",
+            field=sage_newsletter.helpers.fields.PreferencesField(default="NEWS"),
+        ),
+        migrations.RunPython(preferences_to_mask, mask_to_preferences),
+        migrations.RemoveIndex(
+            model_name="newslettersubscriber",
+            name="newsletter_segment_idx",
+        ),
+        migrations.RemoveField(
+            model_name="newslettersubscriber",
+            name="preferences",
+        ),
+        migrations.RenameField(
+            model_name="newslettersubscriber",
+            old_name="preferences_mask",
+            new_name="preferences",
+        ),
+        migrations.AlterField(
+            model_name="newslettersubscriber",
+            name="preferences",
+            field=sage_newsletter.helpers.fields.PreferencesField(
+                db_comment="Bitmask of content preferences: 1 news, 2 deals, 4 tips.",
+                default="NEWS",
+                help_text="The types of content the subscriber wants to receive.",
+                verbose_name="Content Preferences",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="newslettersubscriber",
+            index=models.Index(
+                fields=["language", "preferences"], name="newsletter_segment_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="newslettersubscriber",
+            index=models.Index(
+                condition=models.Q(("confirmed", True), ("is_active", True)),
+                fields=["preferences", "id"],
+                name="newsletter_preference_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="newsletterissue",
+            name="target_preferences",
+            field=sage_newsletter.helpers.fields.PreferencesField(
+                blank=True,
+                db_comment="Bitmask of targeted content preferences, 0 for everyone.",
+                default="",
+                help_text=(
+                    "Only subscribers wanting any of these content types receive "
+                    "the issue. Leave empty to send it to every subscriber."
+                ),
+                verbose_name="Target Preferences",
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:39
+
+from django.db import migrations, models
+
+import sage_newsletter.helpers.fields
+import sage_newsletter.helpers.timezones
+
+
+def bucket_send_hours(apps, schema_editor):
+    """Buckets the existing subscribers by the send hour of their language."""
+    NewsletterSubscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    subscribers = NewsletterSubscriber.objects.using(schema_editor.connection.alias)
+    languages = subscribers.order_by().values_list("language", flat=True).distinct()
+    for language in list(languages):
+        subscribers.filter(language=language).update(
+            send_hour=sage_newsletter.helpers.timezones.get_send_hour("", language)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sage_newsletter", "0009_preference_bitmask"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslettersubscriber",
+            name="timezone",
+            field=models.CharField(
+                blank=True,
+                db_comment="IANA time zone name, empty to derive it from the language.",
+                help_text=(
+                    "The IANA time zone of the subscriber, e.g. Europe/Berlin. "
+                    "Leave empty to derive it from the language."
+                ),
+                max_length=64,
+                validators=[sage_newsletter.helpers.timezones.validate_timezone],
+                verbose_name="Time Zone",
+            ),
+        ),
+        migrations.AddField(
+            model_name="newslettersubscriber",
+            name="send_hour",
+            field=sage_newsletter.helpers.fields.SendHourField(
+                db_comment="UTC hour (0-23) of the local send window, bucketed on save.",
+                default=0,
+                editable=False,
+                help_text="The UTC hour in which the subscriber's local send window opens.",
+                verbose_name="Send Hour (UTC)",
+            ),
+        ),
+        migrations.RunPython(bucket_send_hours, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="newslettersubscriber",
+            index=models.Index(
+                condition=models.Q(("confirmed", True), ("is_active", True)),
+                fields=["send_hour", "language", "frequency", "last_sent"],
+                name="newsletter_send_hour_idx",
+            ),
+        ),
+    ]
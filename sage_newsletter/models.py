@@ -2,20 +2,35 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone as tz
 from django.utils.translation import gettext_lazy as _
 
-from .helpers.text_choices import ContentPreferences, FrequencyPreferences
+from .helpers.fields import (
+    EmailAddressField,
+    EmailDomain,
+    LanguageCodeField,
+    PreferencesField,
+    SendHourField,
+)
+from .helpers.text_choices import (
+    DeliveryStatus,
+    FrequencyPreferences,
+    SuppressionReason,
+    TrackingEventKind,
+)
+from .helpers.timezones import validate_timezone
+from .managers import NewsletterSubscriberManager
 
 
 class NewsletterSubscriber(models.Model):
     """Newsletter Subscriber."""
 
-    email = models.EmailField(
+    email = EmailAddressField(
         unique=True,
         verbose_name=_("Email Address"),
         help_text="The email address of the subscriber.",
-        db_comment="Unique email address used for newsletter subscription.",
+        db_comment="Unique email address, stored lowercased.",
     )
     date_subscribed = models.DateTimeField(
         default=tz.now,
@@ -37,13 +52,11 @@ class NewsletterSubscriber(models.Model):
         help_text="A unique token used for securely unsubscribing from the newsletter.",
         db_comment="Unique token for secure unsubscribe functionality.",
     )
-    preferences = models.CharField(
-        max_length=50,
-        choices=ContentPreferences.choices,
+    preferences = PreferencesField(
         default="NEWS",
         verbose_name=_("Content Preferences"),
-        help_text="The type of content the subscriber prefers to receive.",
-        db_comment="Subscriber's content preference selection.",
+        help_text="The types of content the subscriber wants to receive.",
+        db_comment="Bitmask of content preferences: 1 news, 2 deals, 4 tips.",
     )
     frequency = models.CharField(
         max_length=50,
@@ -53,13 +66,31 @@ class NewsletterSubscriber(models.Model):
         help_text="How often the subscriber wishes to receive the newsletter.",
         db_comment="Subscriber's preferred frequency of newsletter delivery.",
     )
-    language = models.CharField(
+    language = LanguageCodeField(
         max_length=10,
         choices=settings.LANGUAGES,
         default=settings.LANGUAGE_CODE,
         verbose_name=_("Language Preference"),
         help_text="The preferred language for the newsletter.",
-        db_comment="Subscriber's preferred language for the newsletter.",
+        db_comment="Subscriber's preferred language code, stored normalized.",
+    )
+    timezone = models.CharField(
+        max_length=64,
+        blank=True,
+        validators=[validate_timezone],
+        verbose_name=_("Time Zone"),
+        help_text=(
+            "The IANA time zone of the subscriber, e.g. Europe/Berlin. Leave "
+            "empty to derive it from the language."
+        ),
+        db_comment="IANA time zone name, empty to derive it from the language.",
+    )
+    send_hour = SendHourField(
+        default=0,
+        editable=False,
+        verbose_name=_("Send Hour (UTC)"),
+        help_text="The UTC hour in which the subscriber's local send window opens.",
+        db_comment="UTC hour (0-23) of the local send window, bucketed on save.",
     )
     gdpr_consent = models.BooleanField(
         default=False,
@@ -80,8 +111,27 @@ class NewsletterSubscriber(models.Model):
         help_text="Whether the subscription is currently active.",
         db_comment="Boolean flag indicating whether the subscription is active.",
     )
+    last_opened = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Last Opened"),
+        help_text="The date and time when the subscriber last opened or clicked a newsletter.",
+        db_comment="Timestamp of the latest aggregated open or click.",
+    )
+    open_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Opens"),
+        help_text="How many newsletter opens were recorded for the subscriber.",
+        db_comment="Number of aggregated open events.",
+    )
+    click_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Clicks"),
+        help_text="How many newsletter link clicks were recorded for the subscriber.",
+        db_comment="Number of aggregated click events.",
+    )
 
-    objects = models.Manager()
+    objects = NewsletterSubscriberManager()
 
     class Meta:
         """Meta."""
@@ -90,9 +140,300 @@ class NewsletterSubscriber(models.Model):
         verbose_name_plural = _("Newsletter Subscribers")
         db_table = "sage_newsletter_subscriber"
         db_table_comment = "Table for storing newsletter subscriber information."
+        indexes = [
+            models.Index(
+                fields=["frequency", "last_sent"],
+                condition=models.Q(is_active=True, confirmed=True),
+                name="newsletter_due_idx",
+            ),
+            models.Index(
+                fields=["language", "preferences"],
+                name="newsletter_segment_idx",
+            ),
+            models.Index(
+                fields=["language", "frequency", "last_sent"],
+                condition=models.Q(is_active=True, confirmed=True),
+                name="newsletter_language_due_idx",
+            ),
+            models.Index(EmailDomain("email"), name="newsletter_email_domain_idx"),
+            # Serves the hourly local-time dispatch runs.
+            models.Index(
+                fields=["send_hour", "language", "frequency", "last_sent"],
+                condition=models.Q(is_active=True, confirmed=True),
+                name="newsletter_send_hour_idx",
+            ),
+            # Serves the preferences__has_any IN list of targeted issues.
+            models.Index(
+                fields=["preferences", "id"],
+                condition=models.Q(is_active=True, confirmed=True),
+                name="newsletter_preference_idx",
+            ),
+        ]
+        constraints = [
+            # Also rejects case variants written around the ORM, e.g. raw SQL.
+            models.UniqueConstraint(
+                Lower("email"),
+                name="newsletter_email_ci_unique",
+                violation_error_message=_(
+                    "A subscriber with this email address already exists."
+                ),
+            ),
+        ]
 
     def __str__(self):
         return self.email
 
     def __repr__(self):
         return self.email
+
+
+class NewsletterIssue(models.Model):
+    """Newsletter Issue."""
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name=_("Subject"),
+        help_text="The subject line of the newsletter issue.",
+        db_comment="Subject line of the newsletter issue.",
+    )
+    body = models.TextField(
+        verbose_name=_("Body"),
+        help_text=(
+            "The HTML body of the newsletter issue, a Django template rendered "
+            "once per language and content preference. $email and "
+            "$unsubscribe_url are replaced for each recipient."
+        ),
+        db_comment="HTML body of the newsletter issue.",
+    )
+    target_preferences = PreferencesField(
+        blank=True,
+        default="",
+        verbose_name=_("Target Preferences"),
+        help_text=(
+            "Only subscribers wanting any of these content types receive the "
+            "issue. Leave empty to send it to every subscriber."
+        ),
+        db_comment="Bitmask of targeted content preferences, 0 for everyone.",
+    )
+    created_at = models.DateTimeField(
+        default=tz.now,
+        verbose_name=_("Created At"),
+        help_text="The date and time when the issue was created.",
+        db_comment="Timestamp of when the issue was created.",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Updated At"),
+        help_text="The date and time when the issue was last changed.",
+        db_comment="Timestamp of the last change, used to invalidate rendered variants.",
+    )
+
+    objects = models.Manager()
+
+    class Meta:
+        """Meta."""
+
+        verbose_name = _("Newsletter Issue")
+        verbose_name_plural = _("Newsletter Issues")
+        db_table = "sage_newsletter_issue"
+        db_table_comment = "Table for storing newsletter issues."
+
+    def __str__(self):
+        return self.subject
+
+
+class NewsletterDelivery(models.Model):
+    """Newsletter Delivery, one queued message of an issue to a subscriber."""
+
+    subscriber = models.ForeignKey(
+        NewsletterSubscriber,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+        verbose_name=_("Subscriber"),
+        help_text="The subscriber receiving the issue.",
+        db_comment="Subscriber the issue is delivered to.",
+    )
+    issue = models.ForeignKey(
+        NewsletterIssue,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+        verbose_name=_("Issue"),
+        help_text="The newsletter issue being delivered.",
+        db_comment="Newsletter issue being delivered.",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=DeliveryStatus.choices,
+        default=DeliveryStatus.PENDING,
+        verbose_name=_("Status"),
+        help_text="The state of the delivery in the send queue.",
+        db_comment="Delivery state: pending, sending, sent or failed.",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name=_("Attempts"),
+        help_text="How many times sending has been attempted.",
+        db_comment="Number of send attempts.",
+    )
+    next_attempt_at = models.DateTimeField(
+        default=tz.now,
+        verbose_name=_("Next Attempt At"),
+        help_text="The earliest time the delivery may be (re)tried.",
+        db_comment="Earliest time the delivery may be claimed by a worker.",
+    )
+    leased_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Leased Until"),
+        help_text="When the claim of the sending worker expires.",
+        db_comment="Expiry of the worker lease; expired leases are reclaimed.",
+    )
+    lease_token = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Lease Token"),
+        help_text="Identifies the claim that leased the delivery.",
+        db_comment="Token of the claim currently holding the delivery.",
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Sent At"),
+        help_text="The date and time when the message was accepted for delivery.",
+        db_comment="Timestamp of the successful send.",
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name=_("Last Error"),
+        help_text="The error of the last failed attempt.",
+        db_comment="Error message of the last failed attempt.",
+    )
+
+    objects = models.Manager()
+
+    class Meta:
+        """Meta."""
+
+        verbose_name = _("Newsletter Delivery")
+        verbose_name_plural = _("Newsletter Deliveries")
+        db_table = "sage_newsletter_delivery"
+        db_table_comment = "Queue of newsletter issues to send to subscribers."
+        constraints = [
+            models.UniqueConstraint(
+                fields=["issue", "subscriber"], name="newsletter_delivery_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="newsletter_delivery_claim_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.issue} -> {self.subscriber}"
+
+
+class NewsletterSuppression(models.Model):
+    """Newsletter Suppression, an address that must not be mailed again."""
+
+    email = models.EmailField(
+        unique=True,
+        verbose_name=_("Email Address"),
+        help_text="The suppressed email address, lowercased.",
+        db_comment="Lowercased email address excluded from every send.",
+    )
+    reason = models.CharField(
+        max_length=10,
+        choices=SuppressionReason.choices,
+        verbose_name=_("Reason"),
+        help_text="Why the address was suppressed.",
+        db_comment="Suppression reason: hard bounce or spam complaint.",
+    )
+    created_at = models.DateTimeField(
+        default=tz.now,
+        verbose_name=_("Created At"),
+        help_text="The date and time when the address was suppressed.",
+        db_comment="Timestamp of when the address was suppressed.",
+    )
+
+    objects = models.Manager()
+
+    class Meta:
+        """Meta."""
+
+        verbose_name = _("Newsletter Suppression")
+        verbose_name_plural = _("Newsletter Suppressions")
+        db_table = "sage_newsletter_suppression"
+        db_table_comment = "Addresses suppressed after bounces or complaints."
+
+    def __str__(self):
+        return self.email
+
+
+class NewsletterEvent(models.Model):
+    """Newsletter Event, one recorded open or click of a delivery."""
+
+    delivery = models.ForeignKey(
+        NewsletterDelivery,
+        on_delete=models.CASCADE,
+        related_name="events",
+        verbose_name=_("Delivery"),
+        help_text="The delivery the event was recorded for.",
+        db_comment="Delivery whose message was opened or clicked.",
+    )
+    subscriber = models.ForeignKey(
+        NewsletterSubscriber,
+        on_delete=models.CASCADE,
+        related_name="events",
+        verbose_name=_("Subscriber"),
+        help_text="The subscriber who opened or clicked the newsletter.",
+        db_comment="Subscriber the event is aggregated into.",
+    )
+    kind = models.CharField(
+        max_length=5,
+        choices=TrackingEventKind.choices,
+        verbose_name=_("Kind"),
+        help_text="Whether the newsletter was opened or a link was clicked.",
+        db_comment="Event kind: open or click.",
+    )
+    url = models.URLField(
+        max_length=2048,
+        blank=True,
+        verbose_name=_("URL"),
+        help_text="The clicked link, empty for opens.",
+        db_comment="Target of the clicked link.",
+    )
+    created_at = models.DateTimeField(
+        default=tz.now,
+        verbose_name=_("Created At"),
+        help_text="The date and time when the event happened.",
+        db_comment="Timestamp of the open or click.",
+    )
+    aggregated = models.BooleanField(
+        default=False,
+        verbose_name=_("Aggregated"),
+        help_text="Whether the event was rolled into the subscriber's counters.",
+        db_comment="Flag set once the event is counted on the subscriber.",
+    )
+
+    objects = models.Manager()
+
+    class Meta:
+        """Meta."""
+
+        verbose_name = _("Newsletter Event")
+        verbose_name_plural = _("Newsletter Events")
+        db_table = "sage_newsletter_event"
+        db_table_comment = "Open and click events of newsletter deliveries."
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(aggregated=False),
+                name="newsletter_event_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.delivery_id}"
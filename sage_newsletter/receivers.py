@@ -0,0 +1,90 @@
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from . import metrics
+from .helpers.text_choices import SubscriptionStatus
+from .models import NewsletterSubscriber
+from .services import confirmation, segments
+from .signals import (
+    subscriber_subscribed,
+    subscriber_unsubscribed,
+    subscribers_bulk_updated,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=NewsletterSubscriber)
+def update_segment_counts_on_save(sender, instance, created, **kwargs):
+    if created:
+        segments.record_subscriber(instance, 1)
+    else:
+        # The previous values are unknown, so the counters are rebuilt lazily.
+        segments.invalidate_segment_counts()
+
+
+@receiver(post_delete, sender=NewsletterSubscriber)
+def update_segment_counts_on_delete(sender, instance, **kwargs):
+    segments.record_subscriber(instance, -1)
+
+
+@receiver(subscriber_subscribed, sender=NewsletterSubscriber)
+def update_segment_counts_on_reactivation(sender, subscriber, status, **kwargs):
+    if status == SubscriptionStatus.REACTIVATED:
+        segments.adjust_count("is_active", True, 1)
+        segments.adjust_count("is_active", False, -1)
+        segments.bump_version()
+
+
+@receiver(subscriber_unsubscribed, sender=NewsletterSubscriber)
+def update_segment_counts_on_unsubscribe(sender, **kwargs):
+    segments.adjust_count("is_active", False, 1)
+    segments.adjust_count("is_active", True, -1)
+    segments.bump_version()
+
+
+def send_confirmation_email(subscriber):
+    # A failing mail server must not turn the committed signup into an error.
+    try:
+        confirmation.send_confirmation_email(subscriber)
+    except Exception:
+        logger.exception("Failed to send the confirmation email to %s", subscriber)
+
+
+@receiver(subscriber_subscribed, sender=NewsletterSubscriber)
+def send_confirmation_on_subscribe(sender, subscriber, status, **kwargs):
+    if (
+        getattr(settings, "NEWSLETTER_DOUBLE_OPT_IN", False)
+        and not subscriber.confirmed
+    ):
+        # Sent after the signup is committed, so the link always finds the row.
+        transaction.on_commit(
+            partial(send_confirmation_email, subscriber),
+            using=subscriber._state.db,
+        )
+
+
+@receiver(subscribers_bulk_updated, sender=NewsletterSubscriber)
+def update_segment_counts_on_bulk_update(sender, pks, changes, **kwargs):
+    fields = [name for name in changes if name in segments.SEGMENT_FIELDS]
+    if len(fields) == 1 and isinstance(changes[fields[0]], bool):
+        # update_in_batches() only touches rows not holding the new value yet,
+        # so every updated row moved from the opposite boolean value.
+        value = changes[fields[0]]
+        segments.adjust_count(fields[0], value, len(pks))
+        segments.adjust_count(fields[0], not value, -len(pks))
+        segments.bump_version()
+    elif fields:
+        segments.invalidate_segment_counts(fields)
+
+
+@receiver(setting_changed)
+def reset_metrics_backend(setting, **kwargs):
+    if setting == "NEWSLETTER_METRICS_BACKEND":
+        metrics.reset_backend()
@@ -0,0 +1,81 @@
+from .bulk import update_in_batches
+from .confirmation import (
+    confirm_subscription,
+    make_confirmation_token,
+    send_confirmation_email,
+)
+from .dispatcher import DispatchResult, NewsletterDispatcher
+from .domains import DomainLimiter, DomainQueue
+from .exporter import export_response, iter_export
+from .importer import ImportResult, SubscriberImporter, iter_records
+from .queue import DeliveryWorker, WorkResult, enqueue_issue
+from .rendering import IssueRenderer, RenderedIssue
+from .scheduling import schedule_send_hours
+from .smtp import AsyncSMTPEmailBackend, AsyncSMTPPool
+from .subscription import asubscribe, subscribe
+from .suppression import (
+    SuppressionResult,
+    aget_suppressed,
+    get_suppressed,
+    ingest_events,
+    iter_jsonl_events,
+    iter_payload_events,
+)
+from .tracking import (
+    AggregationResult,
+    EventBuffer,
+    aggregate_events,
+    get_click_url,
+    get_open_url,
+    make_tracking_token,
+    read_tracking_token,
+    record_event,
+)
+from .unsubscribe import (
+    add_unsubscribe_headers,
+    get_unsubscribe_url,
+    unsubscribe,
+)
+
+__all__ = [
+    "AggregationResult",
+    "AsyncSMTPEmailBackend",
+    "AsyncSMTPPool",
+    "DeliveryWorker",
+    "DispatchResult",
+    "DomainLimiter",
+    "DomainQueue",
+    "EventBuffer",
+    "ImportResult",
+    "IssueRenderer",
+    "NewsletterDispatcher",
+    "RenderedIssue",
+    "SubscriberImporter",
+    "SuppressionResult",
+    "WorkResult",
+    "add_unsubscribe_headers",
+    "aget_suppressed",
+    "aggregate_events",
+    "asubscribe",
+    "confirm_subscription",
+    "enqueue_issue",
+    "export_response",
+    "get_click_url",
+    "get_open_url",
+    "get_suppressed",
+    "get_unsubscribe_url",
+    "ingest_events",
+    "iter_export",
+    "iter_jsonl_events",
+    "iter_payload_events",
+    "iter_records",
+    "make_confirmation_token",
+    "make_tracking_token",
+    "read_tracking_token",
+    "record_event",
+    "schedule_send_hours",
+    "send_confirmation_email",
+    "subscribe",
+    "unsubscribe",
+    "update_in_batches",
+]
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import transaction
+
+from ..signals import subscribers_bulk_updated
+
+
+def update_in_batches(queryset, changes, batch_size=None):
+    """Applies `changes` to every row of `queryset` in primary key batches.
+
+    Rows already holding the target values are skipped. The remaining rows are
+    walked with keyset pagination on the primary key and each batch is updated
+    in its own short transaction, so a "select all" over a large table never
+    holds row locks on the whole table at once. Within that transaction the
+    batch's rows still lacking the target values are locked and only they are
+    updated, so rows changed concurrently since the batch was read are
+    neither counted nor reported. After every batch that changed rows
+    ``subscribers_bulk_updated`` is sent with their primary keys.
+
+    Args:
+        queryset (QuerySet): The rows to update.
+        changes (dict): Field values to write.
+        batch_size (int, optional): Rows per batch. Defaults to
+            ``NEWSLETTER_BULK_BATCH_SIZE`` or 1000.
+
+    Returns:
+        tuple: The number of updated rows and the number of batches.
+
+    """
+    batch_size = batch_size or getattr(settings, "NEWSLETTER_BULK_BATCH_SIZE", 1000)
+    model = queryset.model
+    pending = queryset.exclude(**changes).order_by("pk").values_list("pk", flat=True)
+    rows = model._default_manager.using(queryset.db).exclude(**changes)
+    updated = batches = 0
+    last_pk = None
+    while True:
+        page = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+        pks = list(page[:batch_size])
+        if not pks:
+            break
+        with transaction.atomic(using=queryset.db):
+            changed = list(
+                rows.filter(pk__in=pks).select_for_update().values_list("pk", flat=True)
+            )
+            count = rows.filter(pk__in=changed).update(**changes)
+        if count:
+            subscribers_bulk_updated.send(sender=model, pks=changed, changes=changes)
+        updated += count
+        batches += 1
+        last_pk = pks[-1]
+    return updated, batches
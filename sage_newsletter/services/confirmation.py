@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core import signing
+from django.core.mail import send_mail
+from django.db import router
+from django.template.loader import render_to_string
+
+from ..helpers.text_choices import ConfirmationStatus
+from ..helpers.urls import build_absolute_url
+from ..models import NewsletterSubscriber
+from ..signals import subscribers_bulk_updated
+
+SALT = "sage_newsletter.confirmation"
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+
+def get_signer():
+    return signing.TimestampSigner(salt=SALT)
+
+
+def make_confirmation_token(subscriber):
+    """Returns a signed, timestamped token confirming `subscriber`.
+
+    The token carries the subscriber's primary key and is verified with
+    ``SECRET_KEY`` alone, so no token has to be stored.
+
+    """
+    return get_signer().sign(str(subscriber.pk))
+
+
+def confirm_subscription(token, max_age=None, using=None):
+    """Confirms the subscriber a confirmation token was issued for.
+
+    A valid token costs a single ``UPDATE`` by primary key, which only writes
+    the row if it is not confirmed yet, so repeated clicks on the same link
+    are harmless.
+
+    Args:
+        token (str): A token from :func:`make_confirmation_token`.
+        max_age (int, optional): Token lifetime in seconds. Defaults to the
+            ``NEWSLETTER_CONFIRMATION_MAX_AGE`` setting (seven days).
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+
+    Returns:
+        ConfirmationStatus: The outcome of the confirmation.
+
+    """
+    if max_age is None:
+        max_age = getattr(settings, "NEWSLETTER_CONFIRMATION_MAX_AGE", DEFAULT_MAX_AGE)
+    try:
+        pk = int(get_signer().unsign(token, max_age=max_age))
+    except signing.SignatureExpired:
+        return ConfirmationStatus.EXPIRED
+    except (signing.BadSignature, ValueError):
+        return ConfirmationStatus.INVALID
+
+    using = using or router.db_for_write(NewsletterSubscriber)
+    queryset = NewsletterSubscriber.objects.using(using)
+    if not queryset.filter(pk=pk, confirmed=False).update(confirmed=True):
+        return ConfirmationStatus.ALREADY_CONFIRMED
+    subscribers_bulk_updated.send(
+        sender=NewsletterSubscriber, pks=[pk], changes={"confirmed": True}
+    )
+    return ConfirmationStatus.CONFIRMED
+
+
+def send_confirmation_email(subscriber, connection=None):
+    """Sends the double opt-in email with the confirmation link.
+
+    The subject and body are rendered from
+    ``sage_newsletter/emails/confirmation_subject.txt`` and
+    ``sage_newsletter/emails/confirmation_body.txt`` with the ``subscriber``
+    and ``confirm_url`` context variables.
+
+    """
+    context = {
+        "subscriber": subscriber,
+        "confirm_url": build_absolute_url(
+            "sage_newsletter:confirm", args=[make_confirmation_token(subscriber)]
+        ),
+    }
+    subject = render_to_string(
+        "sage_newsletter/emails/confirmation_subject.txt", context
+    )
+    body = render_to_string("sage_newsletter/emails/confirmation_body.txt", context)
+    send_mail(
+        " ".join(subject.split()),
+        body,
+        None,
+        [subscriber.email],
+        connection=connection,
+    )
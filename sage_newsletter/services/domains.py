@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError
+from functools import partial
+from operator import attrgetter
+
+from django.conf import settings
+
+DEFAULT_DOMAIN = "*"
+
+
+def get_domain(email):
+    """Returns the lowercased domain of an email address."""
+    return email.rpartition("@")[2].lower()
+
+
+class TokenBucket:
+    """A token bucket refilled with `rate` tokens per second, up to `burst`.
+
+    Args:
+        rate (float, optional): Messages per second; None means unlimited.
+        burst (int, optional): Messages that may be sent at once after an idle
+            period. Defaults to one second's worth of tokens.
+        now (float): The current clock value.
+
+    """
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.capacity = max(burst or rate or 1, 1)
+        self.tokens = self.capacity
+        self.updated = now
+
+    def wait_time(self, now):
+        """Returns the seconds until a token is available, refilling first."""
+        if self.rate is None:
+            return 0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        if self.rate is not None:
+            self.tokens -= 1
+
+
+class DomainLimiter:
+    """Applies per-domain send rates and concurrency caps.
+
+    Limits come from the ``NEWSLETTER_DOMAIN_LIMITS`` setting, a dict keyed by
+    recipient domain whose values may set ``rate`` (messages per second),
+    ``burst`` (token bucket size) and ``connections`` (messages in flight at
+    once). The ``"*"`` entry applies to every domain without its own entry,
+    each domain getting its own bucket. Domains without limits are unlimited::
+
+        NEWSLETTER_DOMAIN_LIMITS = {
+            "gmail.com": {"rate": 20, "burst": 40, "connections": 4},
+            "outlook.com": {"rate": 10, "connections": 2},
+            "*": {"rate": 50},
+        }
+
+    The limiter keeps its buckets across batches and is safe to share between
+    threads; use :meth:`schedule` to walk a batch of recipients.
+
+    Args:
+        limits (dict, optional): Overrides ``NEWSLETTER_DOMAIN_LIMITS``.
+        clock (callable, optional): Returns the current time in seconds.
+        wait (callable, optional): Called with the held ``Condition`` and a
+            timeout (or None) when no recipient may be sent yet. Defaults to
+            ``Condition.wait``.
+
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic, wait=None):
+        if limits is None:
+            limits = getattr(settings, "NEWSLETTER_DOMAIN_LIMITS", None) or {}
+        self.limits = {domain.lower(): limit for domain, limit in limits.items()}
+        self.clock = clock
+        self.wait = wait or (lambda condition, timeout: condition.wait(timeout))
+        self.condition = threading.Condition()
+        self.buckets = {}
+        self.in_flight = {}
+
+    def get_limit(self, domain):
+        return self.limits.get(domain, self.limits.get(DEFAULT_DOMAIN, {}))
+
+    def get_bucket(self, domain):
+        if domain not in self.buckets:
+            limit = self.get_limit(domain)
+            self.buckets[domain] = TokenBucket(
+                limit.get("rate"), limit.get("burst"), self.clock()
+            )
+        return self.buckets[domain]
+
+    def schedule(self, items, get_email=attrgetter("email")):
+        """Returns a :class:`DomainQueue` of `items` grouped by domain."""
+        return DomainQueue(self, items, get_email)
+
+
+class DomainQueue:
+    """A batch of recipients handed out within the limits of a limiter.
+
+    :meth:`acquire` returns the next recipient that may be sent to right now,
+    rotating over the domains so a throttled domain never holds up the
+    others, and blocks only when every remaining domain is throttled or at
+    its connection cap. Every acquired recipient must be released once its
+    message is sent (or failed); :meth:`send` does both for a mail backend.
+
+    """
+
+    def __init__(self, limiter, items, get_email):
+        self.limiter = limiter
+        self.get_email = get_email
+        self.domains = OrderedDict()
+        for item in items:
+            self.domains.setdefault(get_domain(get_email(item)), deque()).append(item)
+
+    def acquire(self):
+        """Returns the next recipient to send to, or None when none is left."""
+        limiter = self.limiter
+        with limiter.condition:
+            while self.domains:
+                now = limiter.clock()
+                timeout = None
+                for domain in list(self.domains):
+                    cap = limiter.get_limit(domain).get("connections")
+                    if cap and limiter.in_flight.get(domain, 0) >= cap:
+                        continue
+                    bucket = limiter.get_bucket(domain)
+                    wait = bucket.wait_time(now)
+                    if wait:
+                        timeout = wait if timeout is None else min(timeout, wait)
+                        continue
+                    bucket.consume()
+                    limiter.in_flight[domain] = limiter.in_flight.get(domain, 0) + 1
+                    pending = self.domains.pop(domain)
+                    item = pending.popleft()
+                    if pending:
+                        # Re-inserted last, so the next call starts elsewhere.
+                        self.domains[domain] = pending
+                    return item
+                limiter.wait(limiter.condition, timeout)
+            return None
+
+    def release(self, item):
+        """Frees the connection slot held by an acquired recipient."""
+        domain = get_domain(self.get_email(item))
+        with self.limiter.condition:
+            self.limiter.in_flight[domain] -= 1
+            self.limiter.condition.notify_all()
+
+    def drain(self):
+        """Removes and returns the recipients that were never acquired."""
+        with self.limiter.condition:
+            items = [item for pending in self.domains.values() for item in pending]
+            self.domains.clear()
+            self.limiter.condition.notify_all()
+        return items
+
+    def send(self, connection, build_message):
+        """Sends a message to every recipient left in the queue.
+
+        Backends with a ``submit_messages()`` method, such as
+        :class:`~sage_newsletter.services.smtp.AsyncSMTPEmailBackend`, are
+        handed each message without waiting for the previous one to be
+        delivered, so up to their ``pool_size`` messages are in flight at
+        once; other backends send one message at a time. A recipient's
+        domain slot is released when its message is delivered or fails.
+
+        Args:
+            connection: An open mail backend.
+            build_message (callable): Called with a recipient and returns the
+                ``EmailMessage`` to send.
+
+        Returns:
+            tuple: The recipients sent to and a list of ``(recipient, error)``
+            tuples for the failed ones, including render errors.
+
+        """
+        submit = getattr(connection, "submit_messages", None)
+        limit = getattr(connection, "pool_size", 1) if submit else 1
+        condition = threading.Condition()
+        sent, failures = [], []
+        # The pool loop only holds weak references to its tasks.
+        futures = []
+        pending = 0
+
+        def finish(item, error=None):
+            nonlocal pending
+            self.release(item)
+            with condition:
+                if error is None:
+                    sent.append(item)
+                else:
+                    failures.append((item, error))
+                pending -= 1
+                condition.notify_all()
+
+        def done(item, future):
+            try:
+                error = future.exception()
+            except CancelledError as cancelled:
+                error = cancelled
+            finish(item, error)
+
+        while (item := self.acquire()) is not None:
+            with condition:
+                condition.wait_for(lambda: pending < limit)
+                pending += 1
+            try:
+                message = build_message(item)
+                if submit is None:
+                    connection.send_messages([message])
+                else:
+                    future = submit([message])
+            except Exception as error:
+                finish(item, error)
+            else:
+                if submit is None:
+                    finish(item)
+                else:
+                    futures.append(future)
+                    future.add_done_callback(partial(done, item))
+        with condition:
+            condition.wait_for(lambda: not pending)
+        return sent, failures
@@ -0,0 +1,226 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connections, router, transaction
+
+from ..helpers.fields import PreferenceSet, normalize_email, normalize_language
+from ..helpers.text_choices import FrequencyPreferences
+from ..helpers.timezones import validate_timezone
+from ..models import NewsletterSubscriber
+from .segments import invalidate_segment_counts
+
+IMPORT_FIELDS = (
+    "preferences",
+    "frequency",
+    "language",
+    "timezone",
+    "confirmed",
+    "gdpr_consent",
+    "is_active",
+)
+BOOLEAN_FIELDS = {"confirmed", "gdpr_consent", "is_active"}
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n", ""}
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ImportResult:
+    """Counters collected while importing subscribers.
+
+    Only the first ``MAX_REPORTED_ERRORS`` errors are kept, as
+    ``(record number, message)`` tuples.
+
+    """
+
+    processed: int = 0
+    written: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+
+def iter_records(stream, fmt):
+    """Yields one dict per subscriber from a CSV or JSON Lines stream.
+
+    Rows are parsed lazily, so the stream is never loaded into memory. A JSON
+    Lines row that is not valid JSON is yielded as a ValidationError, which
+    :meth:`SubscriberImporter.clean` reports as a skipped record.
+
+    Args:
+        stream (file): A text stream positioned at the start of the data.
+        fmt (str): ``"csv"`` (with a header row) or ``"jsonl"``.
+
+    Yields:
+        dict: The raw record, keyed by column name.
+
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            yield ValidationError(f"Invalid JSON: {error.msg}.")
+
+
+class SubscriberImporter:
+    """Writes subscriber records to the database in batches.
+
+    Every batch is validated, deduplicated by canonical email (the last record
+    wins) and written with a single ``bulk_create(update_conflicts=True)``
+    inside its own transaction. Existing subscribers only get the columns of
+    their own record overwritten: the other columns written for the batch are
+    first filled in from the stored rows, read with one query per batch.
+
+    Args:
+        batch_size (int, optional): Records per batch. Defaults to 5000.
+        using (str, optional): The database alias to write to.
+
+    """
+
+    def __init__(self, batch_size=5000, using=None):
+        self.batch_size = batch_size
+        self.using = using or router.db_for_write(NewsletterSubscriber)
+        self.languages = {code for code, _name in settings.LANGUAGES}
+
+    def run(self, records):
+        """Imports every record of the `records` iterable.
+
+        Returns:
+            ImportResult: The number of processed, written and duplicate
+            records and the errors of skipped ones.
+
+        """
+        result = ImportResult()
+        records = iter(records)
+        while batch := list(islice(records, self.batch_size)):
+            self.import_batch(batch, result)
+        # bulk_create() sends no signals, so the segment counters are stale.
+        invalidate_segment_counts(total=True)
+        return result
+
+    def import_batch(self, batch, result):
+        subscribers = {}
+        columns = set()
+        for record in batch:
+            result.processed += 1
+            try:
+                values = self.clean(record)
+            except ValidationError as error:
+                result.skipped += 1
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append((result.processed, "; ".join(error.messages)))
+                continue
+            email = values.pop("email")
+            if email in subscribers:
+                result.duplicates += 1
+            columns.update(values)
+            subscribers[email] = values
+        if not subscribers:
+            return
+
+        if columns & {"language", "timezone"}:
+            # Computed from both on save, see SendHourField, so the stored
+            # value of the other one is needed as well.
+            columns |= {"language", "timezone", "send_hour"}
+        connection = connections[self.using]
+        options = {"ignore_conflicts": True}
+        if columns:
+            options = {"update_conflicts": True, "update_fields": sorted(columns)}
+            if connection.features.supports_update_conflicts_with_target:
+                options["unique_fields"] = ["email"]
+        with transaction.atomic(using=self.using):
+            existing = self.get_existing(subscribers, columns)
+            NewsletterSubscriber.objects.using(self.using).bulk_create(
+                [
+                    self.build(email, values, existing.get(email), columns)
+                    for email, values in subscribers.items()
+                ],
+                batch_size=self.batch_size,
+                **options,
+            )
+        result.written += len(subscribers)
+
+    def get_existing(self, subscribers, columns):
+        """Returns the stored subscribers of the batch, keyed by email."""
+        if not columns:
+            return {}
+        return (
+            NewsletterSubscriber.objects.using(self.using)
+            .only("email", *columns)
+            .in_bulk(subscribers, field_name="email")
+        )
+
+    @staticmethod
+    def build(email, values, existing, columns):
+        """Builds the row to write, keeping the stored values of `existing`."""
+        if existing is not None:
+            for name in columns - values.keys():
+                values[name] = getattr(existing, name)
+        return NewsletterSubscriber(email=email, **values)
+
+    def clean(self, record):
+        """Validates a raw record and converts it to model field values.
+
+        Raises:
+            ValidationError: If the record is not an object, or the email or
+                any of the preferences is invalid.
+
+        """
+        if isinstance(record, ValidationError):
+            raise record
+        if not isinstance(record, dict):
+            raise ValidationError(f"Expected an object, got {type(record).__name__}.")
+        email = normalize_email(record.get("email") or "")
+        validate_email(email)
+        values = {"email": email}
+        for name in IMPORT_FIELDS:
+            value = record.get(name)
+            if value is None or value == "":
+                continue
+            if name in BOOLEAN_FIELDS:
+                value = self.to_bool(name, value)
+            elif name == "preferences":
+                # "NEWS,DEALS" in CSV files, a string or a list in JSON Lines.
+                value = PreferenceSet.parse(value)
+                if not value:
+                    continue
+            else:
+                value = str(value).strip()
+                if name == "language":
+                    value = normalize_language(value)
+                if name == "timezone":
+                    validate_timezone(value)
+                else:
+                    self.validate_choice(name, value)
+            values[name] = value
+        return values
+
+    def validate_choice(self, name, value):
+        choices = {
+            "frequency": FrequencyPreferences.values,
+            "language": self.languages,
+        }[name]
+        if value not in choices:
+            raise ValidationError(f"Invalid {name} {value!r}.")
+
+    @staticmethod
+    def to_bool(name, value):
+        if isinstance(value, bool):
+            return value
+        normalized = str(value).strip().lower()
+        if normalized in TRUE_VALUES:
+            return True
+        if normalized in FALSE_VALUES:
+            return False
+        raise ValidationError(f"Invalid {name} {value!r}.")
@@ -0,0 +1,407 @@
+import logging
+import smtplib
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connections, router, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone as tz
+
+from ..helpers.text_choices import DeliveryStatus
+from ..metrics import instrument
+from ..models import (
+    NewsletterDelivery,
+    NewsletterIssue,
+    NewsletterSubscriber,
+    NewsletterSuppression,
+)
+from .domains import DomainLimiter
+from .rendering import IssueRenderer
+from .suppression import get_suppressed
+from .unsubscribe import add_unsubscribe_headers
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_issue(issue, subscribers=None, batch_size=5000, using=None):
+    """Queues one delivery of `issue` per subscriber.
+
+    Subscribers are walked with keyset pagination on the primary key and the
+    deliveries are inserted with one ``bulk_create`` per batch. Suppressed
+    addresses are left out by an anti-join, and subscribers that already
+    have a delivery of the issue are skipped by the unique constraint, so
+    queueing the same issue twice is harmless.
+
+    Args:
+        issue (NewsletterIssue): The issue to send.
+        subscribers (QuerySet, optional): The recipients. Defaults to every
+            active, confirmed subscriber wanting any of the issue's
+            ``target_preferences``, or to all of them without targets.
+        batch_size (int, optional): Deliveries inserted per query.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+
+    Returns:
+        int: The number of subscribers the issue was queued for, including
+        those that had it queued already.
+
+    """
+    using = using or router.db_for_write(NewsletterDelivery)
+    if subscribers is None:
+        subscribers = NewsletterSubscriber.objects.active().confirmed()
+        if issue.target_preferences:
+            subscribers = subscribers.has_any_preference(*issue.target_preferences)
+    suppressed = NewsletterSuppression.objects.filter(email=OuterRef("email"))
+    pks = (
+        subscribers.using(using)
+        .exclude(Exists(suppressed))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    queued, last_pk = 0, 0
+    while batch := list(pks.filter(pk__gt=last_pk)[:batch_size]):
+        NewsletterDelivery.objects.using(using).bulk_create(
+            [NewsletterDelivery(issue=issue, subscriber_id=pk) for pk in batch],
+            ignore_conflicts=True,
+        )
+        queued += len(batch)
+        last_pk = batch[-1]
+    return queued
+
+
+@dataclass
+class WorkResult:
+    """Counters collected by a delivery worker."""
+
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    batches: int = 0
+
+
+class DeliveryWorker:
+    """Drains the ``NewsletterDelivery`` queue.
+
+    Each batch is claimed by leasing it: the rows are marked ``SENDING`` with a
+    ``leased_until`` deadline and a claim token in one conditional ``UPDATE``.
+    On databases supporting it, the candidates are first locked with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers pick disjoint
+    rows without waiting on each other. Elsewhere (SQLite) the ``UPDATE``
+    re-checks that every row is still claimable, so a row taken by another
+    worker in the meantime is simply left out of the batch. Rows whose lease
+    expired, because their worker crashed, become claimable again, unless that
+    was their last attempt. Claimed rows of subscribers who have unsubscribed
+    since the issue was queued are failed instead of sent.
+
+    The claimed batch is sent by a thread pool, every thread sending over its
+    own mail connection within the per-domain limits of a
+    :class:`DomainLimiter`, and the outcomes are written back with one
+    ``UPDATE`` for the sent rows and one ``bulk_update`` for the failed ones,
+    both restricted to rows still holding the batch's claim token. Failed
+    deliveries are retried with exponential backoff until ``max_attempts`` is
+    reached.
+
+    Args:
+        message_factory (callable, optional): Called with a delivery (with its
+            issue and subscriber loaded) and returns the ``EmailMessage`` to
+            send. Defaults to the ``build_message`` method of an
+            :class:`IssueRenderer`, which renders every issue once per
+            language and content preference.
+        batch_size (int, optional): Deliveries claimed at once. Defaults to
+            ``NEWSLETTER_QUEUE_BATCH_SIZE`` or 200.
+        threads (int, optional): Sending threads. Defaults to
+            ``NEWSLETTER_QUEUE_THREADS`` or 4.
+        lease (int, optional): Seconds a claim is held before other workers
+            may reclaim it. Defaults to ``NEWSLETTER_QUEUE_LEASE`` or 600.
+        max_attempts (int, optional): Attempts before a delivery is marked
+            failed. Defaults to ``NEWSLETTER_QUEUE_MAX_ATTEMPTS`` or 5.
+        retry_delay (int, optional): Seconds before the first retry, doubled
+            on every further attempt. Defaults to
+            ``NEWSLETTER_QUEUE_RETRY_DELAY`` or 60.
+        connection (callable, optional): Factory returning a mail backend
+            connection. Defaults to ``django.core.mail.get_connection``.
+        limiter (DomainLimiter, optional): Per-domain rate and concurrency
+            limits. Defaults to the ``NEWSLETTER_DOMAIN_LIMITS`` setting.
+        using (str, optional): The database alias of the queue.
+
+    """
+
+    def __init__(
+        self,
+        message_factory=None,
+        batch_size=None,
+        threads=None,
+        lease=None,
+        max_attempts=None,
+        retry_delay=None,
+        connection=None,
+        limiter=None,
+        using=None,
+    ):
+        self.message_factory = message_factory or IssueRenderer().build_message
+        self.batch_size = batch_size or getattr(
+            settings, "NEWSLETTER_QUEUE_BATCH_SIZE", 200
+        )
+        self.threads = threads or getattr(settings, "NEWSLETTER_QUEUE_THREADS", 4)
+        self.lease = timedelta(
+            seconds=lease or getattr(settings, "NEWSLETTER_QUEUE_LEASE", 600)
+        )
+        self.max_attempts = max_attempts or getattr(
+            settings, "NEWSLETTER_QUEUE_MAX_ATTEMPTS", 5
+        )
+        self.retry_delay = timedelta(
+            seconds=retry_delay or getattr(settings, "NEWSLETTER_QUEUE_RETRY_DELAY", 60)
+        )
+        self.connection_factory = connection or get_connection
+        self.limiter = limiter or DomainLimiter()
+        self.using = using or router.db_for_write(NewsletterDelivery)
+
+    def get_claimable_queryset(self, now):
+        """Returns the deliveries that are due or whose lease has expired."""
+        return NewsletterDelivery.objects.using(self.using).filter(
+            Q(status=DeliveryStatus.PENDING, next_attempt_at__lte=now)
+            | Q(status=DeliveryStatus.SENDING, leased_until__lt=now)
+        )
+
+    def claim(self, now):
+        """Leases up to ``batch_size`` deliveries to this worker.
+
+        Without ``SKIP LOCKED`` (SQLite) the candidates are not locked, so
+        another worker may claim all of them between the ``SELECT`` and the
+        ``UPDATE``; the claim is then retried with the next candidates, and
+        only an empty candidate list means the queue is idle.
+
+        Returns:
+            list: The claimed deliveries, with their issue and subscriber.
+
+        """
+        claimable = self.get_claimable_queryset(now)
+        candidates = claimable.order_by("next_attempt_at", "pk").values_list(
+            "pk", flat=True
+        )
+        if connections[self.using].features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        token = uuid.uuid4()
+        claimed = 0
+        while not claimed:
+            with transaction.atomic(using=self.using):
+                pks = list(candidates[: self.batch_size])
+                if not pks:
+                    return []
+                claimed = claimable.filter(pk__in=pks).update(
+                    status=DeliveryStatus.SENDING,
+                    leased_until=now + self.lease,
+                    lease_token=token,
+                    attempts=F("attempts") + 1,
+                )
+        deliveries = list(
+            NewsletterDelivery.objects.using(self.using)
+            .filter(pk__in=pks, lease_token=token)
+            .select_related("subscriber")
+        )
+        # A batch usually spans a single issue, so its (large) body is loaded
+        # once instead of being joined onto every delivery row.
+        issues = NewsletterIssue.objects.using(self.using).in_bulk(
+            {delivery.issue_id for delivery in deliveries}
+        )
+        for delivery in deliveries:
+            delivery.issue = issues[delivery.issue_id]
+        return deliveries
+
+    def discard(self, deliveries, result):
+        """Fails the claimed deliveries that must not be sent.
+
+        A delivery reclaimed after the lease of its last attempt expired may
+        have been sent already, and a subscriber may have unsubscribed or
+        been suppressed since the issue was queued. None of these attempts
+        count. Suppressions are checked with one indexed lookup per batch.
+
+        Returns:
+            list: The deliveries to send.
+
+        """
+        suppressed = get_suppressed(
+            (delivery.subscriber.email for delivery in deliveries), using=self.using
+        )
+        reasons = {}
+        for delivery in deliveries:
+            if delivery.attempts > self.max_attempts:
+                reasons[delivery.pk] = "The lease of the last attempt expired."
+            elif not delivery.subscriber.is_active:
+                reasons[delivery.pk] = "The subscriber has unsubscribed."
+            elif delivery.subscriber.email.lower() in suppressed:
+                reasons[delivery.pk] = "The address is suppressed."
+        if not reasons:
+            return deliveries
+        queryset = NewsletterDelivery.objects.using(self.using).filter(
+            lease_token=deliveries[0].lease_token
+        )
+        for reason in set(reasons.values()):
+            queryset.filter(
+                pk__in=[pk for pk, other in reasons.items() if other == reason]
+            ).update(
+                status=DeliveryStatus.FAILED,
+                attempts=F("attempts") - 1,
+                leased_until=None,
+                lease_token=None,
+                last_error=reason,
+            )
+        result.failed += len(reasons)
+        return [delivery for delivery in deliveries if delivery.pk not in reasons]
+
+    def send(self, deliveries):
+        """Sends the claimed deliveries through the thread pool.
+
+        The threads pull deliveries from one :class:`DomainQueue`, so the
+        per-domain limits hold across threads and a throttled domain never
+        keeps a thread from sending to the others.
+
+        Returns:
+            tuple: The delivered deliveries and a list of ``(delivery, error)``
+            tuples for the failed ones.
+
+        """
+        queue = self.limiter.schedule(
+            deliveries, get_email=lambda delivery: delivery.subscriber.email
+        )
+        sent, errors = [], {}
+        threads = min(self.threads, len(deliveries))
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for thread_sent, thread_errors in executor.map(
+                self.send_share, [queue] * threads
+            ):
+                sent += thread_sent
+                errors.update(thread_errors)
+        # Left over when no thread could open a mail connection.
+        for delivery in queue.drain():
+            errors.setdefault(delivery.pk, "No mail connection could be opened.")
+        failures = [
+            (delivery, errors[delivery.pk])
+            for delivery in deliveries
+            if delivery.pk in errors
+        ]
+        return sent, failures
+
+    def send_share(self, queue):
+        """Sends deliveries from `queue` over one connection, without database access.
+
+        Returns:
+            tuple: The delivered deliveries and the errors of the failed ones,
+            keyed by delivery pk.
+
+        """
+        sent, failures, errors = [], [], {}
+        try:
+            with self.connection_factory(fail_silently=False) as connection:
+                # A render error fails (and retries) this delivery only.
+                sent, failures = queue.send(connection, self.build_message)
+        except (smtplib.SMTPException, OSError):
+            logger.exception("Failed to open a mail connection")
+        for delivery, error in failures:
+            logger.error("Failed to send delivery %s", delivery.pk, exc_info=error)
+            errors[delivery.pk] = str(error) or repr(error)
+        return sent, errors
+
+    def build_message(self, delivery):
+        """Returns the message of `delivery` with its unsubscribe headers."""
+        return add_unsubscribe_headers(
+            self.message_factory(delivery), delivery.subscriber
+        )
+
+    def record(self, sent, failures, now, result):
+        """Writes the outcomes of a batch back to the queue in bulk.
+
+        Only rows still leased with the batch's claim token are written, so a
+        worker whose lease expired and was reclaimed by another one cannot
+        overwrite the outcome of the newer claim.
+
+        """
+        claimed = sent + [delivery for delivery, _error in failures]
+        if not claimed:
+            return
+        queryset = NewsletterDelivery.objects.using(self.using).filter(
+            lease_token=claimed[0].lease_token
+        )
+        with transaction.atomic(using=self.using):
+            if sent:
+                queryset.filter(pk__in=[delivery.pk for delivery in sent]).update(
+                    status=DeliveryStatus.SENT,
+                    sent_at=now,
+                    leased_until=None,
+                    lease_token=None,
+                    last_error="",
+                )
+                NewsletterSubscriber.objects.using(self.using).mark_sent(
+                    [delivery.subscriber_id for delivery in sent], now
+                )
+            for delivery, error in failures:
+                delivery.leased_until = None
+                delivery.lease_token = None
+                delivery.last_error = error
+                if delivery.attempts >= self.max_attempts:
+                    delivery.status = DeliveryStatus.FAILED
+                    result.failed += 1
+                else:
+                    delivery.status = DeliveryStatus.PENDING
+                    delivery.next_attempt_at = now + self.retry_delay * 2 ** (
+                        delivery.attempts - 1
+                    )
+                    result.retried += 1
+            if failures:
+                # bulk_update() keeps the lease_token filter of the queryset.
+                queryset.bulk_update(
+                    [delivery for delivery, _error in failures],
+                    [
+                        "status",
+                        "next_attempt_at",
+                        "leased_until",
+                        "lease_token",
+                        "last_error",
+                    ],
+                )
+        result.sent += len(sent)
+
+    def process_batch(self, result=None):
+        """Claims, sends and records one batch.
+
+        Returns:
+            WorkResult: The counters, updated with this batch, or None when
+            nothing was claimable.
+
+        """
+        result = result or WorkResult()
+        with instrument("send.batch", using=self.using, sender="worker") as measurement:
+            deliveries = self.claim(tz.now())
+            if not deliveries:
+                # An idle poll is not a batch.
+                measurement.skip = True
+                return None
+            deliveries = self.discard(deliveries, result)
+            sent, failures = self.send(deliveries) if deliveries else ([], [])
+            self.record(sent, failures, tz.now(), result)
+            measurement.rows = len(sent)
+        result.batches += 1
+        return result
+
+    def run(self, once=False, poll_interval=5):
+        """Processes batches until the queue is empty (`once`) or forever.
+
+        Args:
+            once (bool): Return as soon as nothing is claimable.
+            poll_interval (float): Seconds to wait for new work otherwise.
+
+        Returns:
+            WorkResult: The counters of every processed batch.
+
+        """
+        result = WorkResult()
+        while True:
+            if self.process_batch(result) is None:
+                if once:
+                    return result
+                time.sleep(poll_interval)
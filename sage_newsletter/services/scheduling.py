@@ -0,0 +1,48 @@
+from django.db import router
+from django.utils import timezone as tz
+
+from ..helpers.timezones import get_send_hour
+from ..models import NewsletterSubscriber
+
+
+def schedule_send_hours(now=None, using=None):
+    """Moves every subscriber into the send hour bucket of its time zone.
+
+    ``send_hour`` is kept current on save, but rows changed with ``update()``
+    and zones whose UTC offset changed with daylight saving time fall out of
+    step. The distinct ``(timezone, language, send_hour)`` combinations are
+    read with one query and only the stale ones are updated, one ``UPDATE``
+    per combination, so a run on an up-to-date table writes nothing. Run it
+    daily, e.g. with the ``schedule_newsletter_send_hours`` command.
+
+    Args:
+        now (datetime, optional): The time whose UTC offsets are used.
+            Defaults to the current time.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+
+    Returns:
+        int: The number of subscribers moved to another bucket.
+
+    """
+    now = now or tz.now()
+    using = using or router.db_for_write(NewsletterSubscriber)
+    subscribers = NewsletterSubscriber.objects.using(using)
+    combinations = (
+        subscribers.order_by()
+        .values_list("timezone", "language", "send_hour")
+        .distinct()
+    )
+    stale = {}
+    for timezone, language, send_hour in combinations:
+        hour = get_send_hour(timezone, language, now)
+        if hour != send_hour:
+            stale[timezone, language] = hour
+    moved = 0
+    for (timezone, language), hour in stale.items():
+        moved += (
+            subscribers.filter(timezone=timezone, language=language)
+            .exclude(send_hour=hour)
+            .update(send_hour=hour)
+        )
+    return moved
@@ -0,0 +1,245 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, models
+
+from ..helpers.fields import PreferencesField
+from ..helpers.text_choices import ContentPreferences
+from ..models import NewsletterSubscriber
+
+SEGMENT_FIELDS = (
+    "confirmed",
+    "preferences",
+    "frequency",
+    "language",
+    "is_active",
+    "gdpr_consent",
+)
+# The lookups answered from the per-value counters; a preference counter
+# counts subscribers having it, not those having only it.
+COUNTED_LOOKUPS = {
+    (field_name, "has_any" if field_name == "preferences" else "exact")
+    for field_name in SEGMENT_FIELDS
+}
+CACHE_PREFIX = "sage_newsletter:segments"
+TOTAL_KEY = f"{CACHE_PREFIX}:total"
+VERSION_KEY = f"{CACHE_PREFIX}:version"
+
+
+def get_cache():
+    return caches[getattr(settings, "NEWSLETTER_SEGMENT_CACHE", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "NEWSLETTER_SEGMENT_CACHE_TIMEOUT", 300)
+
+
+def segment_values(field_name):
+    """Returns the values a segment field can take."""
+    field = NewsletterSubscriber._meta.get_field(field_name)
+    if isinstance(field, models.BooleanField):
+        return [True, False]
+    if isinstance(field, PreferencesField):
+        return list(ContentPreferences.values)
+    return [value for value, _label in field.flatchoices]
+
+
+def counted_values(field_name, value):
+    """Returns the segment values a subscriber holding `value` is counted in.
+
+    A subscriber counts once towards each of its content preferences.
+
+    """
+    field = NewsletterSubscriber._meta.get_field(field_name)
+    if isinstance(field, PreferencesField):
+        return list(value)
+    return [value]
+
+
+def parse_value(field_name, raw_value):
+    """Converts a query string value to the Python value of a segment field."""
+    field = NewsletterSubscriber._meta.get_field(field_name)
+    if isinstance(field, models.BooleanField):
+        return {"1": True, "true": True, "0": False, "false": False}.get(
+            str(raw_value).lower()
+        )
+    return raw_value
+
+
+def count_key(field_name, value):
+    return f"{CACHE_PREFIX}:count:{field_name}:{value}"
+
+
+def get_segment_counts(field_name):
+    """Returns the number of subscribers per value of a segment field.
+
+    Preferences are counted per content type, so a subscriber wanting news and
+    deals counts towards both. Counts are served from the cache and kept
+    current by the receivers in
+    :mod:`sage_newsletter.receivers`. On a miss, all values of the field are
+    counted with a single ``GROUP BY`` query and cached for
+    ``NEWSLETTER_SEGMENT_CACHE_TIMEOUT`` seconds, which bounds the staleness of
+    changes made behind the ORM's back.
+
+    Args:
+        field_name (str): One of ``SEGMENT_FIELDS``.
+
+    Returns:
+        dict: Subscriber count keyed by field value.
+
+    """
+    cache = get_cache()
+    values = segment_values(field_name)
+    keys = {count_key(field_name, value): value for value in values}
+    cached = cache.get_many(keys)
+    if len(cached) == len(keys):
+        return {keys[key]: count for key, count in cached.items()}
+
+    counts = dict.fromkeys(values, 0)
+    rows = (
+        NewsletterSubscriber.objects.order_by()
+        .values_list(field_name)
+        .annotate(count=models.Count("pk"))
+    )
+    for value, count in rows:
+        for counted in counted_values(field_name, value):
+            counts[counted] += count
+    cache.set_many(
+        {count_key(field_name, value): counts[value] for value in values},
+        get_timeout(),
+    )
+    return {value: counts[value] for value in values}
+
+
+def get_total_count():
+    """Returns the cached number of subscribers."""
+    cache = get_cache()
+    total = cache.get(TOTAL_KEY)
+    if total is None:
+        total = NewsletterSubscriber.objects.count()
+        cache.set(TOTAL_KEY, total, get_timeout())
+    return total
+
+
+def get_estimated_count(using="default"):
+    """Returns the planner's row estimate on PostgreSQL, else the cached total.
+
+    The estimate comes from ``pg_class.reltuples`` and is refreshed by
+    ``ANALYZE``/autovacuum, so it costs a catalog lookup instead of a scan.
+
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [NewsletterSubscriber._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    return get_total_count()
+
+
+def get_filtered_count(filters, queryset):
+    """Returns the count of `queryset`, filtered by the changelist `filters`.
+
+    Unfiltered, single-field exact and single-preference ``has_any`` lookups
+    are answered from the per-value counters. Other combinations are counted
+    once and cached until the next change to the subscribers or the cache
+    timeout.
+
+    Args:
+        filters (dict): The changelist lookup parameters as strings.
+        queryset (QuerySet): The filtered queryset, counted on a cache miss.
+
+    Returns:
+        int: The number of matching subscribers.
+
+    """
+    if not filters:
+        return get_total_count()
+    if len(filters) == 1:
+        ((lookup, raw_value),) = filters.items()
+        field_name, _sep, suffix = lookup.partition("__")
+        if (field_name, suffix) in COUNTED_LOOKUPS:
+            counts = get_segment_counts(field_name)
+            value = parse_value(field_name, raw_value)
+            if value in counts:
+                return counts[value]
+
+    return get_cached(("count", sorted(filters.items())), queryset.count)
+
+
+def get_cached(key, compute):
+    """Returns a value derived from the subscribers, computing it on a miss.
+
+    The value is cached until the next change to the subscribers (which bumps
+    the cache version) or the cache timeout, whichever comes first.
+
+    Args:
+        key: Any value with a stable ``repr()`` identifying the computation.
+        compute (callable): Produces the value on a cache miss.
+
+    """
+    cache = get_cache()
+    digest = hashlib.md5(repr(key).encode(), usedforsecurity=False).hexdigest()
+    cache_key = f"{CACHE_PREFIX}:cached:{get_version()}:{digest}"
+    value = cache.get(cache_key)
+    if value is None:
+        value = compute()
+        cache.set(cache_key, value, get_timeout())
+    return value
+
+
+def get_version():
+    cache = get_cache()
+    cache.add(VERSION_KEY, 1, None)
+    return cache.get(VERSION_KEY, 1)
+
+
+def bump_version():
+    """Invalidates every value cached with :func:`get_cached`."""
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+def adjust_count(field_name, value, delta):
+    """Atomically moves the cached count of one segment value by `delta`.
+
+    Missing counters are left alone, they are recomputed on the next read.
+
+    """
+    try:
+        get_cache().incr(count_key(field_name, value), delta)
+    except ValueError:
+        pass
+
+
+def record_subscriber(subscriber, delta):
+    """Adds (delta=1) or removes (delta=-1) a subscriber from the counters."""
+    for field_name in SEGMENT_FIELDS:
+        for value in counted_values(field_name, getattr(subscriber, field_name)):
+            adjust_count(field_name, value, delta)
+    try:
+        get_cache().incr(TOTAL_KEY, delta)
+    except ValueError:
+        pass
+    bump_version()
+
+
+def invalidate_segment_counts(fields=SEGMENT_FIELDS, total=False):
+    """Drops the cached counts of `fields` and every combination count."""
+    keys = [
+        count_key(field_name, value)
+        for field_name in fields
+        for value in segment_values(field_name)
+    ]
+    if total:
+        keys.append(TOTAL_KEY)
+    get_cache().delete_many(keys)
+    bump_version()
@@ -0,0 +1,481 @@
+import asyncio
+import base64
+import logging
+import os
+import smtplib
+import ssl
+import sys
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+from django.core.mail.utils import DNS_NAME
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection is unusable and is replaced.
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    asyncio.IncompleteReadError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+
+def check_starttls(use_tls):
+    """Raises ImproperlyConfigured if STARTTLS is asked for but unsupported.
+
+    Upgrading an asyncio stream needs ``StreamWriter.start_tls()``, added in
+    Python 3.11; older versions can use implicit TLS (``use_ssl``) instead.
+
+    """
+    if use_tls and sys.version_info < (3, 11):
+        raise ImproperlyConfigured(
+            "STARTTLS (EMAIL_USE_TLS) needs Python 3.11 or later with "
+            "AsyncSMTPEmailBackend; use EMAIL_USE_SSL or Django's SMTP backend."
+        )
+
+
+def is_dropped(error):
+    """Tells whether `error` means the connection is gone.
+
+    SMTP refusals subclass ``OSError`` too, but leave the connection usable.
+
+    """
+    if isinstance(error, smtplib.SMTPException):
+        return isinstance(error, smtplib.SMTPServerDisconnected)
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class AsyncSMTPConnection:
+    """One SMTP client connection driven by asyncio streams.
+
+    When the server advertises ``PIPELINING`` (RFC 2920), the ``MAIL``,
+    ``RCPT`` and ``DATA`` commands of a message are written at once and
+    their replies read afterwards, so a message costs two round trips
+    instead of three plus one per recipient. Errors are raised as the
+    :mod:`smtplib` exceptions Django's SMTP backend raises.
+
+    Args:
+        host (str): The SMTP server.
+        port (int): The SMTP port.
+        username (str, optional): Authenticates with ``AUTH PLAIN`` or
+            ``AUTH LOGIN`` when set.
+        password (str, optional): The password of `username`.
+        use_tls (bool): Upgrade the connection with ``STARTTLS`` (needs
+            Python 3.11 or later, see :func:`check_starttls`).
+        use_ssl (bool): Connect over implicit TLS.
+        timeout (float, optional): Seconds to wait for any server reply.
+        pipelining (bool, optional): Force pipelining on or off. Defaults to
+            what the server advertises.
+
+    """
+
+    def __init__(
+        self,
+        host,
+        port,
+        username=None,
+        password=None,
+        use_tls=False,
+        use_ssl=False,
+        timeout=None,
+        pipelining=None,
+    ):
+        check_starttls(use_tls)
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.pipelining = pipelining
+        self.reader = self.writer = None
+        self.extensions = {}
+
+    async def read_reply(self):
+        """Reads a (possibly multiline) reply.
+
+        Returns:
+            tuple: The reply code and the reply text.
+
+        """
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            if not line:
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            lines.append(line[4:].strip())
+            if line[3:4] != b"-":
+                return int(line[:3]), b"\n".join(lines)
+
+    async def command(self, line, expected=250):
+        """Sends one command and checks its reply code."""
+        self.writer.write(line.encode("utf-8") + b"\r\n")
+        await self.writer.drain()
+        code, message = await self.read_reply()
+        if code != expected:
+            raise smtplib.SMTPResponseException(code, message)
+        return code, message
+
+    async def ehlo(self):
+        _code, message = await self.command(f"EHLO {DNS_NAME}")
+        self.extensions = {}
+        for line in message.decode("utf-8", "replace").splitlines()[1:]:
+            keyword, _sep, params = line.partition(" ")
+            self.extensions[keyword.upper()] = params
+
+    async def connect(self):
+        """Opens the connection, says ``EHLO`` and authenticates."""
+        context = ssl.create_default_context() if self.use_ssl or self.use_tls else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host, self.port, ssl=context if self.use_ssl else None
+            ),
+            self.timeout,
+        )
+        code, message = await self.read_reply()
+        if code != 220:
+            raise smtplib.SMTPConnectError(code, message)
+        await self.ehlo()
+        if self.use_tls:
+            await self.command("STARTTLS", expected=220)
+            await self.writer.start_tls(context, server_hostname=self.host)
+            await self.ehlo()
+        if self.username and self.password:
+            await self.login()
+
+    async def login(self):
+        mechanisms = self.extensions.get("AUTH", "").upper().split()
+        if "PLAIN" in mechanisms or "LOGIN" not in mechanisms:
+            credentials = f"\0{self.username}\0{self.password}".encode()
+            await self.command(
+                f"AUTH PLAIN {base64.b64encode(credentials).decode()}", expected=235
+            )
+            return
+        await self.command("AUTH LOGIN", expected=334)
+        await self.command(base64.b64encode(self.username.encode()).decode(), 334)
+        await self.command(base64.b64encode(self.password.encode()).decode(), 235)
+
+    def supports_pipelining(self):
+        if self.pipelining is not None:
+            return self.pipelining
+        return "PIPELINING" in self.extensions
+
+    async def send(self, from_addr, recipients, data):
+        """Sends one message.
+
+        Raises:
+            SMTPSenderRefused: If the server refused the sender.
+            SMTPRecipientsRefused: If the server refused every recipient.
+            SMTPDataError: If the server refused the message.
+
+        """
+        commands = [f"MAIL FROM:<{from_addr}>"]
+        commands += [f"RCPT TO:<{recipient}>" for recipient in recipients]
+        commands.append("DATA")
+        replies = []
+        if self.supports_pipelining():
+            self.writer.write("".join(f"{line}\r\n" for line in commands).encode())
+            await self.writer.drain()
+            for _line in commands:
+                replies.append(await self.read_reply())
+        else:
+            for line in commands:
+                self.writer.write(line.encode("utf-8") + b"\r\n")
+                await self.writer.drain()
+                replies.append(await self.read_reply())
+                if line.startswith("MAIL") and replies[-1][0] != 250:
+                    break
+
+        mail_reply, rcpt_replies = replies[0], replies[1:-1]
+        refused = {
+            recipient: reply
+            for recipient, reply in zip(recipients, rcpt_replies)
+            if reply[0] not in (250, 251)
+        }
+        data_reply = replies[-1] if len(replies) == len(commands) else None
+        if mail_reply[0] != 250:
+            await self.reset(data_reply)
+            raise smtplib.SMTPSenderRefused(*mail_reply, from_addr)
+        if len(refused) == len(recipients):
+            await self.reset(data_reply)
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if data_reply[0] != 354:
+            await self.reset()
+            raise smtplib.SMTPDataError(*data_reply)
+
+        self.writer.write(self.encode_data(data))
+        await self.writer.drain()
+        code, message = await self.read_reply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, message)
+        return refused
+
+    @staticmethod
+    def encode_data(data):
+        """Normalizes line endings, dot-stuffs lines and terminates the data."""
+        lines = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n").split(b"\n")
+        if lines[-1] == b"":
+            lines.pop()
+        stuffed = [b"." + line if line.startswith(b".") else line for line in lines]
+        return b"\r\n".join(stuffed) + b"\r\n.\r\n"
+
+    async def reset(self, data_reply=None):
+        """Aborts the current transaction with ``RSET``."""
+        if data_reply is not None and data_reply[0] == 354:
+            # The server is already reading data; end it empty, then reset.
+            self.writer.write(b".\r\n")
+            await self.read_reply()
+        await self.command("RSET")
+
+    async def close(self):
+        """Says ``QUIT`` and closes the connection, ignoring errors."""
+        if self.writer is None:
+            return
+        try:
+            self.writer.write(b"QUIT\r\n")
+            await self.writer.drain()
+            await asyncio.wait_for(self.read_reply(), 1)
+        except CONNECTION_ERRORS:
+            pass
+        self.abort()
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = self.reader = None
+
+
+class AsyncSMTPPool:
+    """A pool of persistent SMTP connections.
+
+    Up to `size` messages are sent concurrently, each over a connection of
+    its own; connections are opened on demand and reused for later messages.
+    A pooled connection found dead (typically closed by the server while
+    idle) is replaced and the message is sent again over a new connection.
+
+    Args:
+        size (int): Maximum number of open connections.
+        **options: Passed to :class:`AsyncSMTPConnection`.
+
+    """
+
+    def __init__(self, size, **options):
+        self.size = size
+        self.options = options
+        self.idle = []
+        self.semaphore = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def connect(self):
+        connection = AsyncSMTPConnection(**self.options)
+        try:
+            await connection.connect()
+        except BaseException:
+            connection.abort()
+            raise
+        self.opened += 1
+        return connection
+
+    async def send(self, from_addr, recipients, data):
+        """Sends one message over a pooled connection.
+
+        Returns:
+            dict: The refused recipients, when some were accepted.
+
+        """
+        async with self.semaphore:
+            connection = self.idle.pop() if self.idle else None
+            if connection is not None:
+                try:
+                    return await self.send_over(connection, from_addr, recipients, data)
+                except Exception as error:
+                    if not is_dropped(error):
+                        raise
+                    logger.info("Reconnecting a dropped SMTP connection")
+            connection = await self.connect()
+            return await self.send_over(connection, from_addr, recipients, data)
+
+    async def send_over(self, connection, from_addr, recipients, data):
+        try:
+            refused = await connection.send(from_addr, recipients, data)
+        except Exception as error:
+            if is_dropped(error):
+                connection.abort()
+            else:
+                # Refusals leave the connection in a clean state.
+                self.idle.append(connection)
+            raise
+        self.idle.append(connection)
+        return refused
+
+    async def close(self):
+        """Closes every idle connection."""
+        idle, self.idle = self.idle, []
+        await asyncio.gather(*(connection.close() for connection in idle))
+
+
+_loop = None
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Returns the event loop that owns the pools, started in a daemon thread."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="sage-newsletter-smtp", daemon=True
+            ).start()
+    return _loop
+
+
+def run_in_loop(coroutine):
+    """Runs `coroutine` in the pool loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop()).result()
+
+
+def reset_after_fork():
+    """Forgets the parent's loop, pools and lock in a forked child.
+
+    The loop thread does not survive a fork, so waiting on it would hang
+    forever, and the pooled sockets belong to the parent. The child starts a
+    loop of its own on first use.
+
+    """
+    global _loop, _pools, _lock
+    _loop = None
+    _pools = {}
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def get_pool(size, **options):
+    """Returns the shared pool of a server and credentials, creating it."""
+    key = tuple(sorted(options.items()))
+    with _lock:
+        if key not in _pools:
+            _pools[key] = AsyncSMTPPool(size, **options)
+        return _pools[key]
+
+
+def close_pools():
+    """Closes the connections of every pool."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    async def close():
+        await asyncio.gather(*(pool.close() for pool in pools))
+
+    if pools:
+        run_in_loop(close())
+
+
+class AsyncSMTPEmailBackend(BaseEmailBackend):
+    """An email backend sending through pooled, pipelined asyncio connections.
+
+    Use it like Django's SMTP backend, as ``EMAIL_BACKEND`` or as the
+    `connection` factory of :class:`NewsletterDispatcher` and
+    :class:`DeliveryWorker`; it reads the same ``EMAIL_*`` settings. The
+    connections live in a process-wide :class:`AsyncSMTPPool` per server
+    (``NEWSLETTER_SMTP_POOL_SIZE`` connections, 4 by default) run by an
+    event loop in a background thread, so opening and closing the backend is
+    free and the pool is shared by every thread of a worker. Messages passed
+    to one :meth:`send_messages` call are sent concurrently, and
+    :meth:`submit_messages` returns without waiting for the delivery, so the
+    dispatcher and the queue worker keep the whole pool busy while sending
+    one message per call (see
+    :meth:`~sage_newsletter.services.domains.DomainQueue.send`).
+
+    """
+
+    def __init__(
+        self,
+        host=None,
+        port=None,
+        username=None,
+        password=None,
+        use_tls=None,
+        use_ssl=None,
+        timeout=None,
+        pool_size=None,
+        pipelining=None,
+        fail_silently=False,
+        **kwargs,
+    ):
+        super().__init__(fail_silently=fail_silently)
+        self.pool_size = pool_size or getattr(settings, "NEWSLETTER_SMTP_POOL_SIZE", 4)
+        self.options = {
+            "host": host or settings.EMAIL_HOST,
+            "port": port or settings.EMAIL_PORT,
+            "username": settings.EMAIL_HOST_USER if username is None else username,
+            "password": (
+                settings.EMAIL_HOST_PASSWORD if password is None else password
+            ),
+            "use_tls": settings.EMAIL_USE_TLS if use_tls is None else use_tls,
+            "use_ssl": settings.EMAIL_USE_SSL if use_ssl is None else use_ssl,
+            "timeout": settings.EMAIL_TIMEOUT if timeout is None else timeout,
+            "pipelining": pipelining,
+        }
+        check_starttls(self.options["use_tls"])
+
+    def get_pool(self):
+        return get_pool(self.pool_size, **self.options)
+
+    def send_messages(self, email_messages):
+        """Sends the messages and returns how many were sent."""
+        if not email_messages:
+            return 0
+        return run_in_loop(self.send_all(email_messages))
+
+    def submit_messages(self, email_messages):
+        """Starts sending the messages in the pool loop and returns at once.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the number of messages
+            sent, or to the first error unless ``fail_silently`` is set. Keep
+            a reference to it until it is done, or the sending task may be
+            garbage collected.
+
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.send_all(email_messages), get_loop()
+        )
+
+    async def asend_messages(self, email_messages):
+        """Asynchronous version of :meth:`send_messages`, for any event loop."""
+        if not email_messages:
+            return 0
+        return await asyncio.wrap_future(self.submit_messages(email_messages))
+
+    async def send_all(self, email_messages):
+        pool = self.get_pool()
+        results = await asyncio.gather(
+            *(self.send_one(pool, message) for message in email_messages),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors and not self.fail_silently:
+            raise errors[0]
+        return sum(result is True for result in results)
+
+    async def send_one(self, pool, message):
+        recipients = message.recipients()
+        if not recipients:
+            return False
+        encoding = message.encoding or settings.DEFAULT_CHARSET
+        from_addr = sanitize_address(message.from_email, encoding)
+        recipients = [sanitize_address(address, encoding) for address in recipients]
+        data = message.message().as_bytes(linesep="\r\n")
+        await pool.send(from_addr, recipients, data)
+        return True
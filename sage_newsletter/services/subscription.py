@@ -0,0 +1,171 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models.signals import post_save
+
+from ..helpers.text_choices import SubscriptionStatus
+from ..models import NewsletterSubscriber
+from ..signals import subscriber_subscribed
+from .suppression import aget_suppressed, get_suppressed
+
+
+def supports_upsert(connection):
+    """Whether `connection` can run ``INSERT ... ON CONFLICT ... RETURNING``."""
+    features = connection.features
+    return (
+        features.supports_update_conflicts_with_target
+        and features.can_return_columns_from_insert
+    )
+
+
+def subscribe(email, using=None, **fields):
+    """Subscribes `email`, reactivating an inactive subscription if needed.
+
+    Suppressed addresses (see :mod:`~sage_newsletter.services.suppression`)
+    are refused, new or inactive, after one indexed lookup. On databases
+    supporting ``INSERT ... ON CONFLICT`` (PostgreSQL, SQLite 3.35+) the
+    subscription is then a single atomic statement that inserts the
+    subscriber or flips ``is_active`` back on. Other backends fall back to a
+    conditional ``UPDATE`` followed by an ``INSERT`` in a savepoint. In both
+    cases two concurrent signups for the same address cannot raise an
+    IntegrityError.
+
+    A newly inserted row sends ``post_save`` like ``save()`` would, and both new
+    and reactivated subscriptions send ``subscriber_subscribed``.
+
+    Args:
+        email (str): The email address to subscribe.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+        **fields: Extra field values applied only when a new row is created.
+
+    Returns:
+        tuple: The subscriber and a :class:`SubscriptionStatus`. The subscriber
+        is None when the address was already subscribed and active, or is
+        suppressed.
+
+    """
+    using = using or router.db_for_write(NewsletterSubscriber)
+    if get_suppressed([email], using=using):
+        return None, SubscriptionStatus.SUPPRESSED
+    subscriber = NewsletterSubscriber(email=email, **fields)
+    if supports_upsert(connections[using]):
+        subscriber, status = _upsert(subscriber, using)
+    else:
+        subscriber, status = _update_or_insert(subscriber, using)
+    if subscriber is not None:
+        subscriber_subscribed.send(
+            sender=NewsletterSubscriber, subscriber=subscriber, status=status
+        )
+    return subscriber, status
+
+
+def _upsert(subscriber, using):
+    connection = connections[using]
+    opts = NewsletterSubscriber._meta
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    is_active = qn(opts.get_field("is_active").column)
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    columns = ", ".join(qn(field.column) for field in opts.concrete_fields)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(field.column) for field in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({qn(opts.get_field('email').column)}) "
+        f"DO UPDATE SET {is_active} = %s WHERE {table}.{is_active} = %s "
+        f"RETURNING {columns}"
+    )
+    params = [
+        field.get_db_prep_save(field.pre_save(subscriber, True), connection)
+        for field in fields
+    ]
+    params += [True, False]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        # The conflicting row exists and is active, so the WHERE clause of
+        # the DO UPDATE branch skipped it and nothing was returned.
+        return None, SubscriptionStatus.ALREADY_ACTIVE
+
+    stored = _from_db_row(row, using)
+    if stored.unsubscribe_token == subscriber.unsubscribe_token:
+        post_save.send(
+            sender=NewsletterSubscriber,
+            instance=stored,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=using,
+        )
+        return stored, SubscriptionStatus.NEW
+    return stored, SubscriptionStatus.REACTIVATED
+
+
+def _from_db_row(row, using):
+    """Builds a subscriber from a raw row, applying the ORM's converters."""
+    connection = connections[using]
+    opts = NewsletterSubscriber._meta
+    values = []
+    for field, value in zip(opts.concrete_fields, row):
+        column = field.get_col(opts.db_table)
+        converters = connection.ops.get_db_converters(
+            column
+        ) + column.get_db_converters(connection)
+        for converter in converters:
+            value = converter(value, column, connection)
+        values.append(value)
+    return NewsletterSubscriber.from_db(
+        using, [field.attname for field in opts.concrete_fields], values
+    )
+
+
+def _update_or_insert(subscriber, using):
+    manager = NewsletterSubscriber.objects.db_manager(using)
+    if manager.filter(email=subscriber.email, is_active=False).update(is_active=True):
+        return manager.get(email=subscriber.email), SubscriptionStatus.REACTIVATED
+    try:
+        with transaction.atomic(using=using):
+            subscriber.save(force_insert=True, using=using)
+    except IntegrityError:
+        return None, SubscriptionStatus.ALREADY_ACTIVE
+    return subscriber, SubscriptionStatus.NEW
+
+
+async def asubscribe(email, using=None, **fields):
+    """Asynchronous version of :func:`subscribe` built on the async ORM.
+
+    The conditional reactivation runs first with ``aupdate()``; when no
+    inactive row matched, ``aget_or_create()`` inserts the subscriber or finds
+    the already active one, handling concurrent inserts of the same address.
+
+    Args:
+        email (str): The email address to subscribe.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+        **fields: Extra field values applied only when a new row is created.
+
+    Returns:
+        tuple: The subscriber and a :class:`SubscriptionStatus`. The subscriber
+        is None when the address was already subscribed and active, or is
+        suppressed.
+
+    """
+    using = using or router.db_for_write(NewsletterSubscriber)
+    if await aget_suppressed([email], using=using):
+        return None, SubscriptionStatus.SUPPRESSED
+    manager = NewsletterSubscriber.objects.db_manager(using)
+    if await manager.filter(email=email, is_active=False).aupdate(is_active=True):
+        subscriber = await manager.aget(email=email)
+        status = SubscriptionStatus.REACTIVATED
+    else:
+        subscriber, created = await manager.aget_or_create(email=email, defaults=fields)
+        if not created:
+            return None, SubscriptionStatus.ALREADY_ACTIVE
+        status = SubscriptionStatus.NEW
+    # Signal.asend() only exists on Django 5.0 and later.
+    send = getattr(subscriber_subscribed, "asend", None) or sync_to_async(
+        subscriber_subscribed.send
+    )
+    await send(sender=NewsletterSubscriber, subscriber=subscriber, status=status)
+    return subscriber, status
@@ -0,0 +1,173 @@
+import json
+from dataclasses import dataclass
+from itertools import islice
+
+from django.conf import settings
+from django.db import router
+
+from ..helpers.text_choices import SuppressionReason
+from ..models import NewsletterSubscriber, NewsletterSuppression
+from .bulk import update_in_batches
+
+EVENT_REASONS = {
+    "bounce": SuppressionReason.BOUNCE,
+    "complaint": SuppressionReason.COMPLAINT,
+}
+# Bounces of these types are temporary and never suppress an address.
+TRANSIENT_BOUNCE_TYPES = {"transient", "soft"}
+
+
+@dataclass
+class SuppressionResult:
+    """Counters collected while ingesting bounce and complaint events."""
+
+    received: int = 0
+    ignored: int = 0
+    suppressed: int = 0
+    deactivated: int = 0
+
+
+def parse_event(event):
+    """Returns the suppression an event asks for.
+
+    Events are dicts with an ``email`` and a ``type`` of ``"bounce"`` or
+    ``"complaint"``. Bounces whose ``bounce_type`` is ``"transient"`` or
+    ``"soft"`` are ignored, as are unknown types.
+
+    Returns:
+        tuple: The lowercased email and its :class:`SuppressionReason`, or
+        None if the event does not suppress anything.
+
+    """
+    if not isinstance(event, dict):
+        return None
+    reason = EVENT_REASONS.get(str(event.get("type", "")).lower())
+    email = str(event.get("email") or "").strip().lower()
+    if not reason or not email:
+        return None
+    if str(event.get("bounce_type", "")).lower() in TRANSIENT_BOUNCE_TYPES:
+        return None
+    return email, reason
+
+
+def iter_payload_events(payload):
+    """Yields the events of a webhook payload.
+
+    The payload is either a list of events or an object holding them under
+    ``"events"``.
+
+    Raises:
+        ValueError: If the payload has neither shape.
+
+    """
+    if isinstance(payload, dict):
+        payload = payload.get("events")
+    if not isinstance(payload, list):
+        raise ValueError(
+            "The payload must be a list of events or hold them in 'events'."
+        )
+    yield from payload
+
+
+def iter_jsonl_events(stream):
+    """Yields the events of a JSON Lines stream, one event per line."""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def get_suppressed(emails, using=None):
+    """Returns which of `emails` are suppressed, with one indexed lookup.
+
+    Args:
+        emails (iterable): The addresses to check, in any case.
+        using (str, optional): The database alias.
+
+    Returns:
+        set: The lowercased suppressed addresses.
+
+    """
+    emails = {email.lower() for email in emails}
+    if not emails:
+        return set()
+    using = using or router.db_for_read(NewsletterSuppression)
+    return set(
+        NewsletterSuppression.objects.using(using)
+        .filter(email__in=emails)
+        .values_list("email", flat=True)
+    )
+
+
+async def aget_suppressed(emails, using=None):
+    """Asynchronous version of :func:`get_suppressed`."""
+    emails = {email.lower() for email in emails}
+    if not emails:
+        return set()
+    using = using or router.db_for_read(NewsletterSuppression)
+    return {
+        email
+        async for email in NewsletterSuppression.objects.using(using)
+        .filter(email__in=emails)
+        .values_list("email", flat=True)
+    }
+
+
+def ingest_events(events, batch_size=None, using=None):
+    """Suppresses the addresses of bounce and complaint events.
+
+    Events are consumed in batches. Within a batch duplicate addresses are
+    collapsed (a complaint wins over a bounce), addresses already suppressed
+    are skipped with one lookup and the new ones are inserted with one
+    ``bulk_create``. The matching active subscribers are then deactivated
+    with one bulk ``UPDATE`` through :func:`update_in_batches`, which keeps
+    the segment counters current.
+
+    Args:
+        events (iterable): Event dicts, see :func:`parse_event`.
+        batch_size (int, optional): Events per batch. Defaults to
+            ``NEWSLETTER_BULK_BATCH_SIZE`` or 1000.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+
+    Returns:
+        SuppressionResult: The number of received and ignored events, of
+        newly suppressed addresses and of deactivated subscribers.
+
+    """
+    batch_size = batch_size or getattr(settings, "NEWSLETTER_BULK_BATCH_SIZE", 1000)
+    using = using or router.db_for_write(NewsletterSuppression)
+    result = SuppressionResult()
+    events = iter(events)
+    while batch := list(islice(events, batch_size)):
+        result.received += len(batch)
+        suppressions = {}
+        for event in batch:
+            parsed = parse_event(event)
+            if parsed is None:
+                result.ignored += 1
+                continue
+            email, reason = parsed
+            if suppressions.get(email) != SuppressionReason.COMPLAINT:
+                suppressions[email] = reason
+        if not suppressions:
+            continue
+
+        existing = get_suppressed(suppressions, using=using)
+        created = NewsletterSuppression.objects.using(using).bulk_create(
+            [
+                NewsletterSuppression(email=email, reason=reason)
+                for email, reason in suppressions.items()
+                if email not in existing
+            ],
+            ignore_conflicts=True,
+        )
+        result.suppressed += len(created)
+
+        subscribers = NewsletterSubscriber.objects.using(using).filter(
+            email__in=suppressions
+        )
+        deactivated, _batches = update_in_batches(
+            subscribers, {"is_active": False}, batch_size=batch_size
+        )
+        result.deactivated += deactivated
+    return result
@@ -0,0 +1,288 @@
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, IntegrityError, connections, router, transaction
+from django.db.models import Case, F, Value, When
+
+from ..helpers.text_choices import TrackingEventKind
+from ..helpers.urls import build_absolute_url
+from ..models import NewsletterDelivery, NewsletterEvent, NewsletterSubscriber
+
+logger = logging.getLogger(__name__)
+
+SALT = "sage_newsletter.tracking"
+
+
+def get_signer():
+    return signing.Signer(salt=SALT)
+
+
+def tracking_enabled():
+    """Tells whether sent newsletters carry open and click tracking.
+
+    Tracking needs ``NEWSLETTER_TRACKING = True`` and ``NEWSLETTER_SITE_URL``
+    to build absolute links.
+
+    """
+    return bool(
+        getattr(settings, "NEWSLETTER_TRACKING", False)
+        and getattr(settings, "NEWSLETTER_SITE_URL", None)
+    )
+
+
+def make_tracking_token(delivery, url=None):
+    """Returns a signed token identifying `delivery` and, for clicks, `url`.
+
+    The token carries the delivery and subscriber primary keys, so a hit is
+    recorded without looking anything up, and signing the target of a click
+    keeps the redirect from being used as an open redirect.
+
+    """
+    value = [delivery.pk, delivery.subscriber_id]
+    if url is not None:
+        value.append(url)
+    return get_signer().sign_object(value, compress=True)
+
+
+def read_tracking_token(token):
+    """Returns ``(delivery_id, subscriber_id, url)`` of a token, or None."""
+    try:
+        value = get_signer().unsign_object(token)
+        delivery_id, subscriber_id = int(value[0]), int(value[1])
+        url = str(value[2]) if len(value) > 2 else ""
+    except (signing.BadSignature, ValueError, TypeError, IndexError, KeyError):
+        return None
+    return delivery_id, subscriber_id, url
+
+
+def get_open_url(delivery):
+    """Returns the absolute URL of the open pixel of `delivery`."""
+    return build_absolute_url(
+        "sage_newsletter:track_open", args=[make_tracking_token(delivery)]
+    )
+
+
+def get_click_url(delivery, url):
+    """Returns the absolute tracking URL redirecting `delivery` to `url`."""
+    return build_absolute_url(
+        "sage_newsletter:track_click", args=[make_tracking_token(delivery, url)]
+    )
+
+
+class EventBuffer:
+    """Collects tracking events in memory and writes them in bulk.
+
+    Events are written with one ``bulk_create`` once ``max_size`` of them are
+    buffered, or ``interval`` seconds after the first buffered event,
+    whichever comes first, and when the process exits. Flushes triggered by
+    :meth:`add` run in a background thread, so recording a hit never waits on
+    the database. Events still buffered when a process is killed are lost,
+    which is acceptable for engagement statistics.
+
+    Args:
+        max_size (int, optional): Events per flush. Defaults to
+            ``NEWSLETTER_TRACKING_BUFFER_SIZE`` or 500.
+        interval (float, optional): Maximum seconds an event stays buffered.
+            Defaults to ``NEWSLETTER_TRACKING_FLUSH_INTERVAL`` or 10.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+
+    """
+
+    def __init__(self, max_size=None, interval=None, using=None):
+        self.max_size = max_size or getattr(
+            settings, "NEWSLETTER_TRACKING_BUFFER_SIZE", 500
+        )
+        self.interval = interval or getattr(
+            settings, "NEWSLETTER_TRACKING_FLUSH_INTERVAL", 10
+        )
+        self.using = using or router.db_for_write(NewsletterEvent)
+        self.lock = threading.Lock()
+        self.events = []
+        self.timer = None
+
+    def add(self, event):
+        """Buffers an unsaved :class:`NewsletterEvent`."""
+        with self.lock:
+            self.events.append(event)
+            full = len(self.events) >= self.max_size
+            if not full and self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush_in_background)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            threading.Thread(target=self.flush_in_background, daemon=True).start()
+
+    def flush(self):
+        """Writes the buffered events with one ``bulk_create``.
+
+        Events of deliveries deleted since they were recorded violate their
+        foreign key and fail the whole insert, so on an IntegrityError those
+        events are dropped with one lookup and the rest is written again.
+
+        Returns:
+            int: The number of written events.
+
+        """
+        with self.lock:
+            events, self.events = self.events, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not events:
+            return 0
+        try:
+            try:
+                self.write(events)
+            except IntegrityError:
+                events = self.drop_orphans(events)
+                self.write(events)
+        except DatabaseError:
+            logger.exception("Failed to write %d tracking events", len(events))
+            return 0
+        return len(events)
+
+    def write(self, events):
+        # Foreign keys may be checked at commit, so the insert gets its own.
+        with transaction.atomic(using=self.using):
+            NewsletterEvent.objects.using(self.using).bulk_create(events)
+
+    def drop_orphans(self, events):
+        """Returns the events whose delivery and subscriber still exist."""
+        existing = set(
+            NewsletterDelivery.objects.using(self.using)
+            .filter(pk__in={event.delivery_id for event in events})
+            .values_list("pk", "subscriber_id")
+        )
+        kept = [
+            event
+            for event in events
+            if (event.delivery_id, event.subscriber_id) in existing
+        ]
+        logger.warning(
+            "Dropped %d tracking events of deleted deliveries", len(events) - len(kept)
+        )
+        return kept
+
+    def flush_in_background(self):
+        """Flushes from a helper thread and closes the thread's connection."""
+        try:
+            self.flush()
+        finally:
+            connections[self.using].close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_event_buffer():
+    """Returns the process-wide :class:`EventBuffer`."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = EventBuffer()
+            atexit.register(_buffer.flush)
+    return _buffer
+
+
+def record_event(kind, delivery_id, subscriber_id, url=""):
+    """Buffers an open or click without touching the database."""
+    get_event_buffer().add(
+        NewsletterEvent(
+            delivery_id=delivery_id,
+            subscriber_id=subscriber_id,
+            kind=kind,
+            url=url,
+        )
+    )
+
+
+@dataclass
+class AggregationResult:
+    """Counters collected while rolling events into subscriber counters."""
+
+    events: int = 0
+    subscribers: int = 0
+    batches: int = 0
+
+
+def aggregate_events(batch_size=None, using=None):
+    """Rolls pending events into the subscribers' engagement counters.
+
+    Pending events are walked in primary key order through the partial
+    ``newsletter_event_pending_idx`` index. For each batch, ``open_count``,
+    ``click_count`` and ``last_opened`` of all affected subscribers are
+    updated with one ``bulk_update`` of ``F()`` increments, and the events
+    are flagged with one ``UPDATE``, in a single transaction. A click also
+    proves the message was opened, so it moves ``last_opened`` too. Where
+    the database supports it, the batch is locked with ``SKIP LOCKED`` so
+    concurrent runs never count an event twice.
+
+    Args:
+        batch_size (int, optional): Events per batch. Defaults to
+            ``NEWSLETTER_BULK_BATCH_SIZE`` or 1000.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+
+    Returns:
+        AggregationResult: The number of aggregated events, of updated
+        subscribers and of batches.
+
+    """
+    batch_size = batch_size or getattr(settings, "NEWSLETTER_BULK_BATCH_SIZE", 1000)
+    using = using or router.db_for_write(NewsletterEvent)
+    result = AggregationResult()
+    while True:
+        with transaction.atomic(using=using):
+            pending = (
+                NewsletterEvent.objects.using(using)
+                .filter(aggregated=False)
+                .order_by("pk")
+                .values_list("pk", "subscriber_id", "kind", "created_at")
+            )
+            if connections[using].features.has_select_for_update_skip_locked:
+                pending = pending.select_for_update(skip_locked=True)
+            rows = list(pending[:batch_size])
+            if not rows:
+                return result
+
+            totals = {}
+            for _pk, subscriber_id, kind, created_at in rows:
+                opens, clicks, last_opened = totals.get(subscriber_id, (0, 0, None))
+                if kind == TrackingEventKind.OPEN:
+                    opens += 1
+                else:
+                    clicks += 1
+                if last_opened is None or created_at > last_opened:
+                    last_opened = created_at
+                totals[subscriber_id] = (opens, clicks, last_opened)
+
+            NewsletterSubscriber.objects.using(using).bulk_update(
+                [
+                    NewsletterSubscriber(
+                        pk=subscriber_id,
+                        open_count=F("open_count") + opens,
+                        click_count=F("click_count") + clicks,
+                        last_opened=Case(
+                            When(last_opened__gte=last_opened, then=F("last_opened")),
+                            default=Value(last_opened),
+                        ),
+                    )
+                    for subscriber_id, (opens, clicks, last_opened) in totals.items()
+                ],
+                ["open_count", "click_count", "last_opened"],
+            )
+            NewsletterEvent.objects.using(using).filter(
+                pk__in=[row[0] for row in rows]
+            ).update(aggregated=True)
+
+        result.events += len(rows)
+        result.subscribers += len(totals)
+        result.batches += 1
+        if len(rows) < batch_size:
+            return result
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import router
+
+from ..helpers.urls import build_absolute_url
+from ..models import NewsletterSubscriber
+from ..signals import subscriber_unsubscribed
+
+ONE_CLICK_POST = "List-Unsubscribe=One-Click"
+
+
+def unsubscribe(token, using=None):
+    """Deactivates the subscription owning `token`.
+
+    The subscriber is never loaded: a single ``UPDATE`` on the unique
+    ``unsubscribe_token`` column flips ``is_active`` off, and matches nothing
+    when the subscription is already inactive, so retries are harmless.
+
+    Args:
+        token (UUID): The subscriber's ``unsubscribe_token``.
+        using (str, optional): The database alias. Defaults to the router's
+            write database.
+
+    Returns:
+        bool: True if an active subscription was deactivated.
+
+    """
+    using = using or router.db_for_write(NewsletterSubscriber)
+    updated = (
+        NewsletterSubscriber.objects.using(using)
+        .filter(unsubscribe_token=token, is_active=True)
+        .update(is_active=False)
+    )
+    if updated:
+        subscriber_unsubscribed.send(sender=NewsletterSubscriber, token=token)
+    return bool(updated)
+
+
+def get_unsubscribe_url(subscriber):
+    """Returns the absolute one-click unsubscribe URL of `subscriber`."""
+    return build_absolute_url(
+        "sage_newsletter:unsubscribe", args=[subscriber.unsubscribe_token]
+    )
+
+
+def add_unsubscribe_headers(message, subscriber):
+    """Adds the RFC 2369 and RFC 8058 one-click unsubscribe headers.
+
+    Nothing is added unless ``NEWSLETTER_SITE_URL`` is set, and headers the
+    message already carries are kept.
+
+    """
+    if not getattr(settings, "NEWSLETTER_SITE_URL", None):
+        return message
+    message.extra_headers.setdefault(
+        "List-Unsubscribe", f"<{get_unsubscribe_url(subscriber)}>"
+    )
+    message.extra_headers.setdefault("List-Unsubscribe-Post", ONE_CLICK_POST)
+    return message
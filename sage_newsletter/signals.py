@@ -0,0 +1,15 @@
+from django.dispatch import Signal
+
+# Sent once per batch that changed rows by services.update_in_batches() with
+# the keyword arguments ``pks`` (the primary keys of the updated subscribers)
+# and ``changes`` (the dict of field values written to them).
+subscribers_bulk_updated = Signal()
+
+# Sent by services.subscribe() and services.asubscribe() when an address is
+# newly subscribed or reactivated, with the keyword arguments ``subscriber``
+# and ``status`` (a SubscriptionStatus).
+subscriber_subscribed = Signal()
+
+# Sent by services.unsubscribe() when an active subscription was deactivated,
+# with the keyword argument ``token`` (the subscriber's unsubscribe_token).
+subscriber_unsubscribed = Signal()
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keeps cached segment counts and throttle counters local to each test."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def test_templates(settings):
+    """Makes the templates of the test views, e.g. test_template.html, loadable."""
+    settings.TEMPLATES = [
+        {**engine, "DIRS": [*engine.get("DIRS", []), TEMPLATE_DIR]}
+        for engine in settings.TEMPLATES
+    ]
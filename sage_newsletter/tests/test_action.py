@@ -1,8 +1,17 @@
+from types import SimpleNamespace
+
 import pytest
 from django.contrib.admin import AdminSite
+from django.db import transaction
+from django.contrib.messages.storage.fallback import FallbackStorage
 
 from sage_newsletter.models import NewsletterSubscriber
-from sage_newsletter.admin import NewsletterSubscriptionActions
+from sage_newsletter.admin import (
+    NewsletterSubscriberAdmin,
+    NewsletterSubscriptionActions,
+)
+from sage_newsletter.services import bulk, segments, update_in_batches
+from sage_newsletter.signals import subscribers_bulk_updated
 
 
 @pytest.mark.django_db
@@ -59,3 +68,83 @@ def test_deactivate_subscriptions():
     # Check that the subscribers are deactivated
     assert subscriber1.is_active is False
     assert subscriber2.is_active is False
+
+
+@pytest.mark.django_db
+def test_actions_run_in_batches_and_emit_one_signal_per_batch(settings):
+    settings.NEWSLETTER_BULK_BATCH_SIZE = 2
+    subscribers = NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=f"user{i}@example.com") for i in range(5)
+    )
+    NewsletterSubscriber.objects.filter(pk=subscribers[0].pk).update(confirmed=True)
+    received = []
+
+    def receiver(sender, pks, changes, **kwargs):
+        received.append((pks, changes))
+
+    subscribers_bulk_updated.connect(receiver)
+    try:
+        NewsletterSubscriptionActions.confirm_subscriptions(
+            modeladmin=None,
+            request=None,
+            queryset=NewsletterSubscriber.objects.all(),
+        )
+    finally:
+        subscribers_bulk_updated.disconnect(receiver)
+
+    # The already confirmed subscriber is skipped, the rest is split in two.
+    assert received == [
+        ([subscribers[1].pk, subscribers[2].pk], {"confirmed": True}),
+        ([subscribers[3].pk, subscribers[4].pk], {"confirmed": True}),
+    ]
+    assert not NewsletterSubscriber.objects.filter(confirmed=False).exists()
+
+
+@pytest.mark.django_db
+def test_batches_skip_rows_changed_since_they_were_read(monkeypatch):
+    subscribers = NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=f"user{i}@example.com") for i in range(3)
+    )
+    segments.get_segment_counts("confirmed")
+    received = []
+
+    def racing_atomic(*args, **kwargs):
+        # Another request confirms a subscriber of the batch meanwhile.
+        NewsletterSubscriber.objects.filter(pk=subscribers[0].pk).update(confirmed=True)
+        return transaction.atomic(*args, **kwargs)
+
+    def receiver(sender, pks, changes, **kwargs):
+        received.append(pks)
+
+    monkeypatch.setattr(bulk, "transaction", SimpleNamespace(atomic=racing_atomic))
+    subscribers_bulk_updated.connect(receiver)
+    try:
+        updated, batches = update_in_batches(
+            NewsletterSubscriber.objects.all(), {"confirmed": True}
+        )
+    finally:
+        subscribers_bulk_updated.disconnect(receiver)
+
+    assert (updated, batches) == (2, 1)
+    assert received == [[subscribers[1].pk, subscribers[2].pk]]
+    # The counters move by the rows the batch changed, not by the rows read.
+    assert segments.get_segment_counts("confirmed") == {True: 2, False: 1}
+
+
+@pytest.mark.django_db
+def test_actions_report_counts_to_the_admin_user(rf):
+    NewsletterSubscriber.objects.create(email="user1@example.com")
+    NewsletterSubscriber.objects.create(email="user2@example.com", is_active=False)
+    request = rf.post("/")
+    request.user = None
+    modeladmin = NewsletterSubscriberAdmin(NewsletterSubscriber, AdminSite())
+    request.session = {}
+    request._messages = FallbackStorage(request)
+
+    NewsletterSubscriptionActions.deactivate_subscriptions(
+        modeladmin, request, NewsletterSubscriber.objects.all()
+    )
+
+    assert [str(message) for message in request._messages] == [
+        "Deactivated 1 subscription in 1 batch(es)."
+    ]
@@ -0,0 +1,163 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from sage_newsletter.benchmarks import (
+    BENCHMARK_DOMAIN,
+    benchmark_actions,
+    benchmark_admin,
+    benchmark_signup,
+    clear_subscribers,
+    generate_subscribers,
+    measure,
+)
+from sage_newsletter.helpers.text_choices import FrequencyPreferences
+from sage_newsletter.models import NewsletterSubscriber
+
+
+@pytest.mark.django_db
+def test_generate_and_clear_subscribers():
+    NewsletterSubscriber.objects.create(email="real@example.com")
+
+    assert generate_subscribers(25, batch_size=10) == 25
+    assert (
+        NewsletterSubscriber.objects.filter(email__endswith=BENCHMARK_DOMAIN).count()
+        == 25
+    )
+
+    clear_subscribers()
+
+    assert list(NewsletterSubscriber.objects.values_list("email", flat=True)) == [
+        "real@example.com"
+    ]
+
+
+@pytest.mark.django_db
+def test_newsletter_benchmark_command_reports_plan_and_latency():
+    out = StringIO()
+
+    call_command("newsletter_benchmark", rows=50, repeat=1, stdout=out)
+
+    output = out.getvalue()
+    assert "Due chunk query plan:" in output
+    assert "due count: median" in output
+    assert not NewsletterSubscriber.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_newsletter_benchmark_command_compares_sync_and_async_signups():
+    out = StringIO()
+
+    call_command(
+        "newsletter_benchmark",
+        scenario="signup",
+        requests=6,
+        concurrency=3,
+        keep=True,
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "sync signup:" in output
+    assert "async signup:" in output
+    assert "0 errors" in output
+    assert NewsletterSubscriber.objects.count() == 12
+
+
+@pytest.mark.django_db
+def test_measure_reports_latency_and_queries():
+    resets = []
+
+    result = measure(
+        "count",
+        NewsletterSubscriber.objects.count,
+        repeat=3,
+        setup=lambda: resets.append(1),
+    )
+
+    assert result.name == "count"
+    assert result.runs == 3
+    assert result.queries == 1
+    assert result.min_ms <= result.median_ms <= result.p95_ms <= result.max_ms
+    assert len(resets) == 3
+
+
+@pytest.mark.django_db
+def test_benchmark_signup_stores_new_and_rejects_active_addresses():
+    generate_subscribers(10)
+
+    results = {result.name: result for result in benchmark_signup(repeat=2)}
+
+    assert results["form signup"].rows == 1
+    assert results["form signup"].queries
+    assert results["form signup (already active)"].rows == 0
+    assert results["form signup (already active)"].queries
+    assert (
+        NewsletterSubscriber.objects.filter(email__startswith="form-signup").count()
+        == 2
+    )
+
+
+@pytest.mark.django_db
+def test_benchmark_admin_renders_changelist_filtered_and_searched():
+    generate_subscribers(30)
+
+    results = {result.name: result for result in benchmark_admin(repeat=2)}
+
+    assert results["admin changelist"].rows == 30
+    assert results["admin changelist filtered"].rows < 30
+    assert results["admin search"].rows == 0
+    assert all(result.queries for result in results.values())
+
+
+@pytest.mark.django_db
+def test_benchmark_actions_changes_the_whole_segment_every_run():
+    generate_subscribers(40)
+    daily = NewsletterSubscriber.objects.filter(frequency=FrequencyPreferences.DAILY)
+
+    results = {result.name: result for result in benchmark_actions(repeat=2)}
+
+    assert results["action confirm"].rows == daily.count()
+    assert results["action export csv"].rows == daily.count()
+    assert not daily.filter(is_active=True).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_newsletter_benchmark_command_writes_json_results(tmp_path):
+    path = tmp_path / "results.json"
+
+    call_command(
+        "newsletter_benchmark",
+        scenario="all",
+        rows=40,
+        repeat=1,
+        requests=4,
+        concurrency=2,
+        json_path=str(path),
+        stdout=StringIO(),
+    )
+
+    document = json.loads(path.read_text())
+    names = [result["name"] for result in document["results"]]
+    assert document["database"] == "sqlite"
+    assert document["rows"] == 40
+    assert names == [
+        "generate",
+        "due chunk",
+        "due count",
+        "form signup",
+        "form signup (already active)",
+        "view signup",
+        "admin changelist",
+        "admin changelist filtered",
+        "admin search",
+        "action confirm",
+        "action deactivate",
+        "action export csv",
+        "sync signup load",
+        "async signup load",
+    ]
+    assert all(result["errors"] == 0 for result in document["results"][-2:])
+    assert not NewsletterSubscriber.objects.exists()
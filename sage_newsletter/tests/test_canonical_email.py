@@ -0,0 +1,163 @@
+import pytest
+from django.contrib import admin
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory
+
+from sage_newsletter.forms import NewsletterSubscriptionForm
+from sage_newsletter.helpers.fields import normalize_email
+from sage_newsletter.helpers.text_choices import SubscriptionStatus
+from sage_newsletter.models import (
+    NewsletterDelivery,
+    NewsletterEvent,
+    NewsletterSubscriber,
+)
+from sage_newsletter.services import subscribe
+
+
+def test_normalize_email():
+    assert normalize_email(" Foo.Bar@Example.COM ") == "foo.bar@example.com"
+    assert normalize_email("") == ""
+    assert normalize_email(None) is None
+
+
+@pytest.mark.django_db
+def test_emails_are_stored_and_looked_up_canonically():
+    subscriber = NewsletterSubscriber.objects.create(email="Foo@Example.com")
+
+    assert subscriber.email == "foo@example.com"
+    assert NewsletterSubscriber.objects.get(email="FOO@example.COM") == subscriber
+    assert NewsletterSubscriber.objects.for_email("foo@EXAMPLE.com").get() == (
+        subscriber
+    )
+
+
+@pytest.mark.django_db
+def test_subscribe_treats_case_variants_as_one_subscriber():
+    subscriber, status = subscribe("Foo@Example.com")
+    assert status == SubscriptionStatus.NEW
+
+    _subscriber, status = subscribe("foo@example.COM")
+
+    assert status == SubscriptionStatus.ALREADY_ACTIVE
+    assert NewsletterSubscriber.objects.get().email == "foo@example.com"
+
+
+@pytest.mark.django_db
+def test_form_returns_the_canonical_email():
+    form = NewsletterSubscriptionForm(data={"email": "New@Example.com"})
+
+    assert form.is_valid() and form.subscribe()
+    assert form.cleaned_data["email"] == "new@example.com"
+    form = NewsletterSubscriptionForm(data={"email": "NEW@example.com"})
+    assert form.is_valid() and not form.subscribe()
+
+
+@pytest.mark.django_db
+def test_functional_unique_index_rejects_case_variants_written_raw():
+    NewsletterSubscriber.objects.create(email="foo@example.com")
+    NewsletterSubscriber.objects.create(email="bar@example.com")
+    table = NewsletterSubscriber._meta.db_table
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET email = %s WHERE email = %s",
+                ["FOO@example.com", "bar@example.com"],
+            )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "term, expected",
+    [
+        ("@Example.com", ["ann@example.com", "bob@example.com"]),
+        ("ANN@example.com", ["ann@example.com"]),
+        ("an", ["ann@example.com", "ann@example.org"]),
+        ("ann@example", ["ann@example.com", "ann@example.org"]),
+        ("", ["ann@example.com", "ann@example.org", "bob@example.com"]),
+    ],
+)
+def test_admin_search_modes(term, expected):
+    for email in ("ann@example.com", "bob@example.com", "ann@example.org"):
+        NewsletterSubscriber.objects.create(email=email)
+    model_admin = admin.site._registry[NewsletterSubscriber]
+    request = RequestFactory().get("/", {"q": term})
+
+    queryset, may_have_duplicates = model_admin.get_search_results(
+        request, NewsletterSubscriber.objects.all(), term
+    )
+
+    assert sorted(queryset.values_list("email", flat=True)) == expected
+    assert may_have_duplicates is False
+
+
+@pytest.mark.django_db
+def test_domain_search_uses_the_functional_index():
+    plan = NewsletterSubscriber.objects.for_domain("example.com").explain()
+
+    assert "newsletter_email_domain_idx" in plan
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_merges_case_variants():
+    executor = MigrationExecutor(connection)
+    executor.migrate([("sage_newsletter", "0007_tracking_events")])
+    apps = executor.loader.project_state(
+        ("sage_newsletter", "0007_tracking_events")
+    ).apps
+    Subscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    Subscriber.objects.create(email="Dup@Example.com", is_active=False)
+    Subscriber.objects.create(email="dup@example.com", gdpr_consent=True)
+    kept = Subscriber.objects.create(email="DUP@example.com", confirmed=True)
+    Subscriber.objects.create(email="Single@Example.com")
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    subscribers = NewsletterSubscriber.objects.order_by("email")
+    assert [subscriber.email for subscriber in subscribers] == [
+        "dup@example.com",
+        "single@example.com",
+    ]
+    merged = subscribers[0]
+    assert merged.pk == kept.pk
+    assert merged.is_active and merged.confirmed and merged.gdpr_consent
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_deletes_deliveries_of_merged_case_variants():
+    executor = MigrationExecutor(connection)
+    executor.migrate([("sage_newsletter", "0007_tracking_events")])
+    apps = executor.loader.project_state(
+        ("sage_newsletter", "0007_tracking_events")
+    ).apps
+    Subscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    Issue = apps.get_model("sage_newsletter", "NewsletterIssue")
+    Delivery = apps.get_model("sage_newsletter", "NewsletterDelivery")
+    Event = apps.get_model("sage_newsletter", "NewsletterEvent")
+    issue = Issue.objects.create(subject="Hello", body="<p>Hello</p>")
+    kept = Subscriber.objects.create(email="Reader@Example.com", confirmed=True)
+    duplicate = Subscriber.objects.create(email="reader@example.com")
+    kept_delivery = Delivery.objects.create(issue=issue, subscriber=kept)
+    delivery = Delivery.objects.create(issue=issue, subscriber=duplicate)
+    Event.objects.create(delivery=delivery, subscriber=duplicate, kind="OPEN")
+
+    executor = MigrationExecutor(connection)
+    # The merge commits before the constraint is added, as PostgreSQL cannot
+    # alter a table with the deletes' trigger events still pending.
+    plan = [
+        migration.name
+        for migration, _backwards in executor.migration_plan(
+            executor.loader.graph.leaf_nodes()
+        )
+    ]
+    assert plan[:2] == ["0008_canonical_email", "0008_canonical_email_constraints"]
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    subscriber = NewsletterSubscriber.objects.get()
+    assert (subscriber.pk, subscriber.email) == (kept.pk, "reader@example.com")
+    assert list(NewsletterDelivery.objects.values_list("pk", flat=True)) == [
+        kept_delivery.pk
+    ]
+    assert not NewsletterEvent.objects.exists()
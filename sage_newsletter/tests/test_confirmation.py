@@ -0,0 +1,147 @@
+import pytest
+from django.core import mail, signing
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import override_settings
+
+from sage_newsletter.helpers.text_choices import ConfirmationStatus
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import (
+    confirm_subscription,
+    make_confirmation_token,
+    subscribe,
+)
+
+pytestmark = pytest.mark.urls("sage_newsletter.tests.urls")
+
+
+class BrokenEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError
+
+
+@pytest.fixture
+def subscriber():
+    return NewsletterSubscriber.objects.create(email="new@example.com")
+
+
+@pytest.mark.django_db
+def test_confirm_subscription_is_a_single_update(subscriber, django_assert_num_queries):
+    token = make_confirmation_token(subscriber)
+
+    with django_assert_num_queries(1):
+        status = confirm_subscription(token)
+
+    assert status == ConfirmationStatus.CONFIRMED
+    subscriber.refresh_from_db()
+    assert subscriber.confirmed is True
+
+
+@pytest.mark.django_db
+def test_confirm_subscription_is_idempotent(subscriber):
+    token = make_confirmation_token(subscriber)
+    confirm_subscription(token)
+
+    assert confirm_subscription(token) == ConfirmationStatus.ALREADY_CONFIRMED
+
+
+@pytest.mark.django_db
+def test_confirm_subscription_rejects_bad_tokens(subscriber, django_assert_num_queries):
+    token = make_confirmation_token(subscriber)
+
+    with django_assert_num_queries(0):
+        assert confirm_subscription(token + "x") == ConfirmationStatus.INVALID
+        assert confirm_subscription("garbage") == ConfirmationStatus.INVALID
+        assert confirm_subscription(token, max_age=-1) == ConfirmationStatus.EXPIRED
+
+    subscriber.refresh_from_db()
+    assert subscriber.confirmed is False
+
+
+@pytest.mark.django_db
+def test_confirmation_token_is_bound_to_its_salt(subscriber):
+    token = signing.TimestampSigner().sign(str(subscriber.pk))
+
+    assert confirm_subscription(token) == ConfirmationStatus.INVALID
+
+
+@pytest.mark.django_db
+def test_confirm_view(client, subscriber):
+    token = make_confirmation_token(subscriber)
+
+    response = client.get(f"/newsletter/confirm/{token}/")
+
+    assert response.status_code == 200
+    assert b'<form method="post">' in response.content
+    subscriber.refresh_from_db()
+    assert subscriber.confirmed is False
+
+    response = client.post(f"/newsletter/confirm/{token}/")
+
+    assert response.status_code == 200
+    assert response.context["status"] == ConfirmationStatus.CONFIRMED
+    assert client.post(f"/newsletter/confirm/{token}/").status_code == 200
+    assert client.post("/newsletter/confirm/invalid/").status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(
+    NEWSLETTER_DOUBLE_OPT_IN=True, NEWSLETTER_SITE_URL="https://example.com/"
+)
+def test_subscribe_sends_confirmation_email(client):
+    subscriber, _status = subscribe("new@example.com")
+
+    assert len(mail.outbox) == 1
+    message = mail.outbox[0]
+    assert message.to == ["new@example.com"]
+    assert message.subject == "Please confirm your newsletter subscription"
+    token = make_confirmation_token(subscriber)
+    assert f"https://example.com/newsletter/confirm/{token}/" in message.body
+
+    client.post(f"/newsletter/confirm/{token}/")
+    subscriber.refresh_from_db()
+    assert subscriber.confirmed is True
+
+
+@pytest.mark.django_db
+def test_subscribe_waits_for_commit_and_skips_confirmed(
+    django_capture_on_commit_callbacks,
+):
+    NewsletterSubscriber.objects.create(
+        email="confirmed@example.com", confirmed=True, is_active=False
+    )
+
+    with override_settings(
+        NEWSLETTER_DOUBLE_OPT_IN=True, NEWSLETTER_SITE_URL="https://example.com"
+    ), django_capture_on_commit_callbacks(execute=True) as callbacks:
+        subscribe("new@example.com")
+        subscribe("confirmed@example.com")
+        assert len(mail.outbox) == 0
+
+    assert len(callbacks) == 1
+    assert mail.outbox[0].to == ["new@example.com"]
+
+
+@pytest.mark.django_db
+def test_failed_confirmation_email_does_not_fail_the_signup(
+    django_capture_on_commit_callbacks, caplog
+):
+    with override_settings(
+        NEWSLETTER_DOUBLE_OPT_IN=True,
+        NEWSLETTER_SITE_URL="https://example.com",
+        EMAIL_BACKEND="sage_newsletter.tests.test_confirmation.BrokenEmailBackend",
+    ), django_capture_on_commit_callbacks(execute=True):
+        subscriber, _status = subscribe("new@example.com")
+
+    assert subscriber.pk is not None
+    assert "Failed to send the confirmation email" in caplog.text
+
+
+@pytest.mark.django_db
+def test_subscribe_without_double_opt_in_sends_nothing(
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        subscribe("new@example.com")
+
+    assert callbacks == []
+    assert mail.outbox == []
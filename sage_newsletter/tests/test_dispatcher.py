@@ -0,0 +1,145 @@
+import smtplib
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
+
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import DomainLimiter, NewsletterDispatcher
+
+
+def build_message(subscriber):
+    return EmailMessage("Newsletter", "Hello", "news@example.com", [subscriber.email])
+
+
+class FlakyBackend(EmailBackend):
+    """A locmem backend that refuses to deliver to one address."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "broken@example.com" in message.to:
+                raise smtplib.SMTPRecipientsRefused({"broken@example.com": (550, b"")})
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+def test_dispatch_selects_only_due_subscribers():
+    now = timezone.now()
+    due_daily = NewsletterSubscriber.objects.create(
+        email="daily@example.com",
+        confirmed=True,
+        frequency="DAILY",
+        last_sent=now - timedelta(days=2),
+    )
+    never_sent = NewsletterSubscriber.objects.create(
+        email="new@example.com", confirmed=True
+    )
+    NewsletterSubscriber.objects.create(
+        email="weekly@example.com",
+        confirmed=True,
+        frequency="WEEKLY",
+        last_sent=now - timedelta(days=2),
+    )
+    NewsletterSubscriber.objects.create(email="unconfirmed@example.com")
+    NewsletterSubscriber.objects.create(
+        email="inactive@example.com", confirmed=True, is_active=False
+    )
+
+    result = NewsletterDispatcher(build_message).dispatch(now=now)
+
+    assert result.sent == 2
+    assert sorted(m.to[0] for m in mail.outbox) == [
+        "daily@example.com",
+        "new@example.com",
+    ]
+    due_daily.refresh_from_db()
+    never_sent.refresh_from_db()
+    assert due_daily.last_sent == now
+    assert never_sent.last_sent == now
+
+
+@pytest.mark.django_db
+def test_dispatch_walks_the_table_in_chunks():
+    NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=f"user{i}@example.com", confirmed=True)
+        for i in range(7)
+    )
+
+    result = NewsletterDispatcher(build_message, chunk_size=3).dispatch()
+
+    assert result.sent == 7
+    assert result.chunks == 3
+    assert len(mail.outbox) == 7
+    assert not NewsletterSubscriber.objects.filter(last_sent__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_dispatch_uses_one_query_per_chunk_and_one_update(django_assert_num_queries):
+    NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=f"user{i}@example.com", confirmed=True)
+        for i in range(4)
+    )
+    dispatcher = NewsletterDispatcher(build_message, chunk_size=5)
+
+    # One GROUP BY over the languages, one chunk select (a short chunk ends
+    # the walk), one suppression lookup and one bulk UPDATE.
+    with django_assert_num_queries(4):
+        dispatcher.dispatch()
+
+
+@pytest.mark.django_db
+def test_dispatch_does_not_stamp_failed_deliveries():
+    NewsletterSubscriber.objects.create(email="ok@example.com", confirmed=True)
+    broken = NewsletterSubscriber.objects.create(
+        email="broken@example.com", confirmed=True
+    )
+
+    dispatcher = NewsletterDispatcher(build_message, connection=FlakyBackend)
+    result = dispatcher.dispatch()
+
+    assert result.sent == 1
+    assert result.failed == 1
+    broken.refresh_from_db()
+    assert broken.last_sent is None
+
+
+@pytest.mark.django_db
+def test_dispatch_survives_render_errors_and_frees_the_domain():
+    for email in ("broken@example.com", "ok@example.com"):
+        NewsletterSubscriber.objects.create(email=email, confirmed=True)
+    limiter = DomainLimiter({"example.com": {"connections": 1}})
+
+    def render(subscriber):
+        if subscriber.email == "broken@example.com":
+            raise ValueError("bad template")
+        return build_message(subscriber)
+
+    result = NewsletterDispatcher(render, limiter=limiter).dispatch()
+
+    assert (result.sent, result.failed) == (1, 1)
+    assert mail.outbox[0].to == ["ok@example.com"]
+    assert limiter.in_flight == {"example.com": 0}
+
+
+@pytest.mark.django_db
+def test_dispatch_sends_one_language_per_chunk():
+    NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(
+            email=f"user{i}@example.com", confirmed=True, language=["en", "fa"][i % 2]
+        )
+        for i in range(6)
+    )
+    languages = []
+
+    def build_localized_message(subscriber):
+        languages.append(subscriber.language)
+        return build_message(subscriber)
+
+    result = NewsletterDispatcher(build_localized_message, chunk_size=2).dispatch()
+
+    assert result.languages == {"en": 3, "fa": 3}
+    assert result.chunks == 4
+    assert languages == ["en"] * 3 + ["fa"] * 3
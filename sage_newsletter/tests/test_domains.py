@@ -0,0 +1,138 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from django.core.mail import EmailMessage
+from django.test import override_settings
+
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import DomainLimiter, NewsletterDispatcher
+
+
+class FakeClock:
+    """A clock that only moves when the limiter waits."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.waits = []
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, condition, timeout):
+        assert timeout is not None, "would block forever"
+        self.waits.append(timeout)
+        self.now += timeout
+
+
+def recipients(*emails):
+    return [SimpleNamespace(email=email) for email in emails]
+
+
+def drain(queue):
+    order = []
+    while (item := queue.acquire()) is not None:
+        order.append(item.email)
+        queue.release(item)
+    return order
+
+
+def test_domains_are_interleaved_round_robin():
+    queue = DomainLimiter(limits={}).schedule(
+        recipients("a1@gmail.com", "a2@gmail.com", "a3@gmail.com", "b1@Outlook.com")
+    )
+
+    assert drain(queue) == [
+        "a1@gmail.com",
+        "b1@Outlook.com",
+        "a2@gmail.com",
+        "a3@gmail.com",
+    ]
+
+
+def test_throttled_domain_does_not_hold_up_the_others():
+    clock = FakeClock()
+    limiter = DomainLimiter(
+        limits={"gmail.com": {"rate": 2, "burst": 1}}, clock=clock, wait=clock.wait
+    )
+    queue = limiter.schedule(
+        recipients(
+            "a1@gmail.com",
+            "a2@gmail.com",
+            "a3@gmail.com",
+            "b1@example.com",
+            "b2@example.com",
+        )
+    )
+
+    assert drain(queue) == [
+        "a1@gmail.com",
+        "b1@example.com",
+        "b2@example.com",
+        "a2@gmail.com",
+        "a3@gmail.com",
+    ]
+    # Only gmail.com had to wait, half a second per message at 2/s.
+    assert clock.waits == [0.5, 0.5]
+
+
+def test_default_limit_applies_per_domain():
+    clock = FakeClock()
+    limiter = DomainLimiter(
+        limits={"*": {"rate": 1, "burst": 2}}, clock=clock, wait=clock.wait
+    )
+
+    drain(limiter.schedule(recipients("a@one.com", "b@one.com", "c@two.com")))
+    assert clock.waits == []
+    drain(limiter.schedule(recipients("d@one.com")))
+
+    # Buckets are kept across batches.
+    assert clock.waits == [1.0]
+
+
+def test_connection_cap_limits_messages_in_flight():
+    limiter = DomainLimiter(limits={"gmail.com": {"connections": 2}})
+    queue = limiter.schedule(recipients(*[f"u{i}@gmail.com" for i in range(6)]))
+    in_flight, peak, lock = [0], [0], threading.Lock()
+    barrier = threading.Barrier(3, timeout=0.2)
+
+    def send():
+        while (item := queue.acquire()) is not None:
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            with lock:
+                in_flight[0] -= 1
+            queue.release(item)
+
+    threads = [threading.Thread(target=send) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+    assert queue.acquire() is None
+
+
+@pytest.mark.django_db
+@override_settings(NEWSLETTER_DOMAIN_LIMITS={"gmail.com": {"rate": 1000}})
+def test_dispatcher_sends_every_domain():
+    NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=email, confirmed=True)
+        for email in ["a@gmail.com", "b@gmail.com", "c@example.com"]
+    )
+    sent = []
+
+    def build_message(subscriber):
+        sent.append(subscriber.email)
+        return EmailMessage("News", "Hi", to=[subscriber.email])
+
+    result = NewsletterDispatcher(build_message).dispatch()
+
+    assert result.sent == 3
+    assert sent == ["a@gmail.com", "c@example.com", "b@gmail.com"]
@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from sage_newsletter.actions import NewsletterSubscriptionActions
+from sage_newsletter.models import NewsletterSubscriber
+
+
+@pytest.fixture
+def subscribers():
+    return [
+        NewsletterSubscriber.objects.create(
+            email="daily@example.com", frequency="DAILY", confirmed=True
+        ),
+        NewsletterSubscriber.objects.create(
+            email="weekly@example.com", frequency="WEEKLY", is_active=False
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_export_action_streams_csv(subscribers):
+    queryset = NewsletterSubscriber.objects.filter(frequency="DAILY")
+
+    response = NewsletterSubscriptionActions.export_subscribers_csv(
+        modeladmin=None, request=None, queryset=queryset
+    )
+
+    assert response.streaming
+    assert response["Content-Type"] == "text/csv"
+    assert "newsletter-subscribers.csv" in response["Content-Disposition"]
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0].startswith("email,date_subscribed,confirmed")
+    assert len(lines) == 2
+    assert lines[1].startswith("daily@example.com,")
+
+
+@pytest.mark.django_db
+def test_export_action_streams_jsonl(subscribers):
+    response = NewsletterSubscriptionActions.export_subscribers_jsonl(
+        modeladmin=None, request=None, queryset=NewsletterSubscriber.objects.all()
+    )
+
+    rows = [
+        json.loads(line)
+        for line in b"".join(response.streaming_content).decode().splitlines()
+    ]
+    assert [row["email"] for row in rows] == [
+        "daily@example.com",
+        "weekly@example.com",
+    ]
+    assert rows[1]["is_active"] is False
+
+
+@pytest.mark.django_db
+def test_export_command_applies_filters(subscribers, tmp_path):
+    out = StringIO()
+    call_command("export_newsletter_subscribers", active="yes", stdout=out)
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[1].startswith("daily@example.com,")
+
+    path = tmp_path / "export.jsonl"
+    call_command(
+        "export_newsletter_subscribers",
+        format="jsonl",
+        frequency="WEEKLY",
+        output=str(path),
+    )
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [row["email"] for row in rows] == ["weekly@example.com"]
@@ -26,11 +26,11 @@ def test_newsletter_subscription_form_existing_active_subscriber():
     form_data = {"email": "activeuser@example.com"}
     form = NewsletterSubscriptionForm(data=form_data)
 
-    # Validate the form to populate cleaned_data
-    is_valid = form.is_valid()
+    # Validating the form does not touch the database
+    assert form.is_valid()
 
-    # The form should not be valid since the email is already subscribed and active
-    assert not is_valid, "The form should not be valid for an active email."
+    # Subscribing fails since the email is already subscribed and active
+    assert not form.subscribe(), "An active email should not be subscribed."
 
     # Check if the email field has the expected error
     assert "email" in form.errors, "The form should have an error for the email field."
@@ -71,3 +71,66 @@ def test_newsletter_subscription_form_blank_email():
 
     assert not form.is_valid(), "The form should not be valid without an email."
     assert "email" in form.errors, "The form should have an error for the email field."
+
+
+@pytest.mark.django_db
+def test_newsletter_subscription_form_reports_status(django_assert_num_queries):
+    """
+    Test that a signup is stored with a suppression lookup and a single
+    upsert, and reports its status.
+    """
+    NewsletterSubscriber.objects.create(
+        email="inactiveuser@example.com", is_active=False
+    )
+
+    with django_assert_num_queries(2):
+        form = NewsletterSubscriptionForm(data={"email": "newuser@example.com"})
+        assert form.is_valid()
+        subscriber = form.save()
+
+    assert subscriber.email == "newuser@example.com"
+    assert form.status == "NEW"
+    assert form.reactivated is False
+
+    form = NewsletterSubscriptionForm(data={"email": "inactiveuser@example.com"})
+    assert form.is_valid() and form.subscribe()
+    assert form.reactivated is True
+
+
+@pytest.mark.django_db
+def test_newsletter_subscription_form_validates_without_writing(
+    django_assert_num_queries,
+):
+    """
+    Test that validation is read-only and save(commit=False) stores nothing.
+    """
+    form = NewsletterSubscriptionForm(data={"email": " NewUser@Example.com "})
+
+    with django_assert_num_queries(0):
+        assert form.is_valid()
+        subscriber = form.save(commit=False)
+
+    assert subscriber.pk is None
+    assert subscriber.email == "newuser@example.com"
+    assert not NewsletterSubscriber.objects.exists()
+
+
+@pytest.mark.django_db
+def test_newsletter_subscription_form_passes_cleaned_fields():
+    """
+    Test that extra form fields are stored with the subscription.
+    """
+
+    class LanguageForm(NewsletterSubscriptionForm):
+        class Meta(NewsletterSubscriptionForm.Meta):
+            fields = ["email", "language"]
+
+    form = LanguageForm(data={"email": "fa@example.com", "language": "fa"})
+    assert form.is_valid(), form.errors
+
+    subscriber = form.save()
+
+    subscriber.refresh_from_db()
+    assert subscriber.language == "fa"
+    with pytest.raises(ValueError):
+        LanguageForm(data={"email": "fa@example.com", "language": "fa"}).save()
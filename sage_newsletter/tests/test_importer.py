@@ -0,0 +1,121 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import SubscriberImporter
+
+
+@pytest.mark.django_db
+def test_import_csv_creates_and_updates_subscribers(tmp_path, capsys):
+    NewsletterSubscriber.objects.create(email="existing@example.com", frequency="DAILY")
+    path = tmp_path / "subscribers.csv"
+    path.write_text(
+        "email,frequency,confirmed\n"
+        "new@example.com,MONTHLY,yes\n"
+        "existing@example.com,WEEKLY,1\n"
+        "not-an-email,WEEKLY,1\n"
+        "other@example.com,HOURLY,0\n"
+        "new@example.com,DAILY,no\n"
+    )
+
+    call_command("import_newsletter_subscribers", str(path), batch_size=2)
+
+    output = capsys.readouterr()
+    assert "Processed 5 records: 3 written, 0 duplicates, 2 skipped." in output.out
+    assert "Record 3: Enter a valid email address." in output.err
+    assert "Record 4: Invalid frequency 'HOURLY'." in output.err
+
+    new = NewsletterSubscriber.objects.get(email="new@example.com")
+    assert new.frequency == "DAILY"
+    assert new.confirmed is False
+    existing = NewsletterSubscriber.objects.get(email="existing@example.com")
+    assert existing.frequency == "WEEKLY"
+    assert existing.confirmed is True
+    assert NewsletterSubscriber.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_import_jsonl_deduplicates_within_a_batch(tmp_path, capsys):
+    path = tmp_path / "subscribers.jsonl"
+    records = [
+        {"email": "a@example.com", "language": "fa", "gdpr_consent": True},
+        {"email": "b@example.com", "language": "ar"},
+        {"email": "a@example.com", "language": "en"},
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n\n")
+
+    call_command("import_newsletter_subscribers", str(path))
+
+    assert "2 written, 1 duplicates, 0 skipped" in capsys.readouterr().out
+    assert NewsletterSubscriber.objects.get(email="a@example.com").language == "en"
+    assert NewsletterSubscriber.objects.get(email="b@example.com").language == "ar"
+
+
+@pytest.mark.django_db
+def test_importer_writes_one_insert_per_batch():
+    records = ({"email": f"user{i}@example.com"} for i in range(10))
+    importer = SubscriberImporter(batch_size=5)
+
+    with CaptureQueriesContext(connection) as queries:
+        result = importer.run(records)
+
+    inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 2
+
+    assert result.written == 10
+    assert NewsletterSubscriber.objects.count() == 10
+
+
+@pytest.mark.django_db
+def test_import_keeps_columns_missing_from_a_record():
+    NewsletterSubscriber.objects.create(
+        email="existing@example.com", frequency="DAILY", language="fa"
+    )
+
+    result = SubscriberImporter().run(
+        [
+            {"email": "existing@example.com", "confirmed": "yes"},
+            {"email": "new@example.com", "frequency": "MONTHLY", "language": "ar"},
+        ]
+    )
+
+    assert result.written == 2
+    existing = NewsletterSubscriber.objects.get(email="existing@example.com")
+    assert (existing.frequency, existing.language, existing.confirmed) == (
+        "DAILY",
+        "fa",
+        True,
+    )
+    new = NewsletterSubscriber.objects.get(email="new@example.com")
+    assert (new.frequency, new.language) == ("MONTHLY", "ar")
+
+
+@pytest.mark.django_db
+def test_import_skips_malformed_jsonl_lines(tmp_path, capsys):
+    path = tmp_path / "subscribers.jsonl"
+    path.write_text(
+        '{"email": "a@example.com"}\n'
+        "{not json\n"
+        '["b@example.com"]\n'
+        '{"email": "c@example.com"}\n'
+    )
+
+    call_command("import_newsletter_subscribers", str(path))
+
+    output = capsys.readouterr()
+    assert "Processed 4 records: 2 written, 0 duplicates, 2 skipped." in output.out
+    assert "Record 2: Invalid JSON: " in output.err
+    assert "Record 3: Expected an object, got list." in output.err
+    assert NewsletterSubscriber.objects.count() == 2
+
+
+def test_import_rejects_unknown_format(tmp_path):
+    path = tmp_path / "subscribers.txt"
+    path.write_text("")
+
+    with pytest.raises(Exception, match="Cannot infer the format"):
+        call_command("import_newsletter_subscribers", str(path))
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from sage_newsletter.helpers.fields import normalize_language
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import subscribe
+
+
+@pytest.mark.parametrize(
+    "code,expected",
+    [
+        ("fa", "fa"),
+        ("FA", "fa"),
+        ("pt_BR", "pt-br"),
+        ("en-US", "en"),
+        ("es-AR", "es-ar"),
+        ("xx-YY", "xx-yy"),
+        ("", ""),
+    ],
+)
+def test_normalize_language(code, expected):
+    assert normalize_language(code) == expected
+
+
+@pytest.mark.django_db
+def test_language_is_normalized_on_every_write():
+    created = NewsletterSubscriber.objects.create(email="a@example.com", language="FA")
+    NewsletterSubscriber.objects.bulk_create(
+        [NewsletterSubscriber(email="b@example.com", language="pt_BR")]
+    )
+    subscribe("c@example.com", language="En-Us")
+    NewsletterSubscriber.objects.filter(email="a@example.com").update(language="AR")
+
+    assert created.language == "fa"
+    assert dict(NewsletterSubscriber.objects.values_list("email", "language")) == {
+        "a@example.com": "ar",
+        "b@example.com": "pt-br",
+        "c@example.com": "en",
+    }
+    assert NewsletterSubscriber.objects.filter(language="PT_br").count() == 1
+
+
+@pytest.mark.django_db
+def test_due_by_language(django_assert_num_queries):
+    now = timezone.now()
+    for email, language, last_sent in [
+        ("fa1@example.com", "fa", None),
+        ("fa2@example.com", "FA", now - timedelta(days=8)),
+        ("fa3@example.com", "fa", now - timedelta(days=1)),
+        ("en1@example.com", "en", None),
+    ]:
+        NewsletterSubscriber.objects.create(
+            email=email, language=language, last_sent=last_sent, confirmed=True
+        )
+    NewsletterSubscriber.objects.create(email="ar@example.com", language="ar")
+
+    with django_assert_num_queries(1):
+        segments = NewsletterSubscriber.objects.due_by_language(now)
+
+    assert [(segment.language, segment.count) for segment in segments] == [
+        ("en", 1),
+        ("fa", 2),
+    ]
+    assert sorted(segments[1].queryset.values_list("email", flat=True)) == [
+        "fa1@example.com",
+        "fa2@example.com",
+    ]
+    assert NewsletterSubscriber.objects.due_counts_by_language(now) == {
+        "en": 1,
+        "fa": 2,
+    }
+
+
+@pytest.mark.django_db
+def test_queryset_filters_chain():
+    NewsletterSubscriber.objects.create(
+        email="match@example.com", confirmed=True, language="fa", preferences="DEALS"
+    )
+    NewsletterSubscriber.objects.create(
+        email="inactive@example.com",
+        confirmed=True,
+        language="fa",
+        preferences="DEALS",
+        is_active=False,
+    )
+    NewsletterSubscriber.objects.create(
+        email="unconfirmed@example.com", language="fa", preferences="DEALS"
+    )
+    NewsletterSubscriber.objects.create(
+        email="english@example.com", confirmed=True, language="en"
+    )
+
+    subscribers = (
+        NewsletterSubscriber.objects.active()
+        .confirmed()
+        .for_language("FA")
+        .for_preference("DEALS")
+    )
+
+    assert list(subscribers.values_list("email", flat=True)) == ["match@example.com"]
+
+
+@pytest.mark.django_db
+def test_iter_chunks_uses_keyset_pagination(django_assert_num_queries):
+    NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=f"user{i}@example.com") for i in range(5)
+    )
+
+    # Two full chunks and a short one ending the walk, no OFFSET anywhere.
+    with django_assert_num_queries(3) as context:
+        chunks = list(NewsletterSubscriber.objects.iter_chunks(2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    pks = [subscriber.pk for chunk in chunks for subscriber in chunk]
+    assert pks == sorted(pks)
+    assert not any("OFFSET" in query["sql"] for query in context.captured_queries)
+    assert chunks[0][0].get_deferred_fields() >= {"date_subscribed", "last_sent"}
+
+
+@pytest.mark.django_db
+def test_mark_sent_is_one_update(django_assert_num_queries):
+    now = timezone.now()
+    first, second, third = NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=f"user{i}@example.com") for i in range(3)
+    )
+
+    with django_assert_num_queries(1):
+        updated = NewsletterSubscriber.objects.mark_sent([first.pk, second.pk], now)
+    with django_assert_num_queries(0):
+        NewsletterSubscriber.objects.mark_sent([], now)
+
+    assert updated == 2
+    assert NewsletterSubscriber.objects.filter(last_sent=now).count() == 2
+    third.refresh_from_db()
+    assert third.last_sent is None
@@ -0,0 +1,146 @@
+import pytest
+from django.core.mail import EmailMessage
+from django.test import Client, override_settings
+
+from sage_newsletter.actions import NewsletterSubscriptionActions
+from sage_newsletter.forms import NewsletterSubscriptionForm
+from sage_newsletter.metrics import (
+    InMemoryMetrics,
+    NullMetrics,
+    get_metrics,
+    instrument,
+)
+from sage_newsletter.models import NewsletterIssue, NewsletterSubscriber
+from sage_newsletter.services import (
+    DeliveryWorker,
+    NewsletterDispatcher,
+    enqueue_issue,
+)
+
+
+@pytest.fixture
+def metrics():
+    with override_settings(
+        NEWSLETTER_METRICS_BACKEND="sage_newsletter.metrics.InMemoryMetrics"
+    ):
+        yield get_metrics()
+
+
+def get_series(metrics, operation, **labels):
+    return next(
+        item
+        for item in metrics.snapshot()
+        if item["operation"] == operation and item["labels"] == labels
+    )
+
+
+def test_metrics_are_disabled_by_default():
+    assert isinstance(get_metrics(), NullMetrics)
+
+    with instrument("signup.post") as measurement:
+        measurement.rows = 1
+
+
+def test_in_memory_metrics_build_cumulative_histograms():
+    metrics = InMemoryMetrics(buckets=(0.1, 1))
+
+    for seconds in (0.05, 0.1, 0.5, 3):
+        metrics.observe("send.batch", seconds, queries=2, rows=10, labels={"a": "b"})
+
+    (series,) = metrics.snapshot()
+    assert series["count"] == 4
+    assert series["sum"] == pytest.approx(3.65)
+    assert series["buckets"] == [(0.1, 2), (1, 3), (float("inf"), 4)]
+    assert series["queries"] == 8
+    assert series["rows"] == 40
+
+
+def test_in_memory_metrics_render_prometheus_text():
+    metrics = InMemoryMetrics(buckets=(0.1,))
+    metrics.observe("admin.action", 0.05, queries=3, rows=7, labels={"action": 'a"b'})
+
+    text = metrics.render_prometheus()
+
+    labels = 'operation="admin.action",action="a\\"b"'
+    assert "# TYPE sage_newsletter_duration_seconds histogram" in text
+    assert f'sage_newsletter_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'sage_newsletter_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"sage_newsletter_duration_seconds_count{{{labels}}} 1" in text
+    assert f"sage_newsletter_queries_total{{{labels}}} 3" in text
+    assert f"sage_newsletter_rows_total{{{labels}}} 7" in text
+
+
+def test_instrument_records_failed_blocks(metrics):
+    with pytest.raises(ValueError):
+        with instrument("signup.post"):
+            raise ValueError
+
+    assert get_series(metrics, "signup.post")["count"] == 1
+
+
+@pytest.mark.django_db
+def test_signup_records_subscribe_and_post(metrics):
+    form = NewsletterSubscriptionForm(data={"email": "form@example.com"})
+    assert form.is_valid() and form.subscribe()
+
+    with override_settings(ROOT_URLCONF="sage_newsletter.benchmarks.urls"):
+        response = Client().post("/sync/", {"email": "view@example.com"})
+
+    assert response.status_code == 302
+    subscribe = get_series(metrics, "signup.subscribe")
+    assert subscribe["count"] == 2
+    assert subscribe["rows"] == 2
+    assert subscribe["queries"] >= 2
+    post = get_series(metrics, "signup.post", mode="sync")
+    assert post["count"] == 1
+    assert post["rows"] == 1
+    assert post["queries"] >= 1
+
+
+@pytest.mark.django_db
+def test_admin_actions_record_updated_rows(metrics):
+    for number in range(3):
+        NewsletterSubscriber.objects.create(email=f"user{number}@example.com")
+
+    NewsletterSubscriptionActions.confirm_subscriptions(
+        None, None, NewsletterSubscriber.objects.all()
+    )
+
+    series = get_series(metrics, "admin.action", action="confirm_subscriptions")
+    assert series["rows"] == 3
+    assert series["queries"] >= 2
+
+
+@pytest.mark.django_db
+def test_dispatch_records_each_batch(metrics):
+    for number in range(3):
+        NewsletterSubscriber.objects.create(
+            email=f"user{number}@example.com", confirmed=True
+        )
+    dispatcher = NewsletterDispatcher(
+        lambda subscriber: EmailMessage("Hi", "Hello", to=[subscriber.email]),
+        chunk_size=2,
+    )
+
+    dispatcher.dispatch()
+
+    series = get_series(metrics, "send.batch", sender="dispatcher")
+    assert series["count"] == 2
+    assert series["rows"] == 3
+
+
+@pytest.mark.django_db
+def test_worker_records_batches_but_not_idle_polls(metrics):
+    for number in range(3):
+        NewsletterSubscriber.objects.create(
+            email=f"user{number}@example.com", confirmed=True
+        )
+    enqueue_issue(NewsletterIssue.objects.create(subject="Hi", body="<p>Hi</p>"))
+    worker = DeliveryWorker(batch_size=2)
+
+    worker.run(once=True)
+    worker.run(once=True)
+
+    series = get_series(metrics, "send.batch", sender="worker")
+    assert series["count"] == 2
+    assert series["rows"] == 3
@@ -0,0 +1,258 @@
+import json
+from io import StringIO
+
+import django
+import pytest
+from django.contrib.admin import AdminSite
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.forms import modelform_factory
+from django.test import RequestFactory
+
+from sage_newsletter.admin import NewsletterSubscriberAdmin
+from sage_newsletter.helpers.fields import PreferenceSet
+from sage_newsletter.models import (
+    NewsletterDelivery,
+    NewsletterIssue,
+    NewsletterSubscriber,
+)
+from sage_newsletter.services import SubscriberImporter, enqueue_issue, segments
+
+
+@pytest.fixture
+def subscribers():
+    return {
+        preferences: NewsletterSubscriber.objects.create(
+            email=f"{preferences.replace(',', '-').lower()}@example.com",
+            preferences=preferences,
+            confirmed=True,
+        )
+        for preferences in ("NEWS", "DEALS", "NEWS,DEALS", "DEALS,TIPS")
+    }
+
+
+def test_preference_set_conversions():
+    preferences = PreferenceSet.parse(" deals, NEWS ")
+
+    assert preferences == {"NEWS", "DEALS"}
+    assert preferences.mask == 3
+    assert str(preferences) == "NEWS,DEALS"
+    assert PreferenceSet.from_mask(6) == {"DEALS", "TIPS"}
+    assert PreferenceSet.parse(["TIPS"]).mask == 4
+    assert PreferenceSet.parse("") == set()
+    with pytest.raises(ValidationError):
+        PreferenceSet.parse("NEWS,SPORTS")
+
+
+@pytest.mark.django_db
+def test_preferences_are_stored_as_a_bitmask(subscribers):
+    subscriber = subscribers["NEWS,DEALS"]
+    subscriber.refresh_from_db()
+
+    assert subscriber.preferences == {"NEWS", "DEALS"}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT preferences FROM {NewsletterSubscriber._meta.db_table} "
+            "WHERE id = %s",
+            [subscriber.pk],
+        )
+        assert cursor.fetchone() == (3,)
+
+
+@pytest.mark.django_db
+def test_has_any_and_has_all_lookups(subscribers):
+    def emails(queryset):
+        return sorted(queryset.values_list("email", flat=True))
+
+    objects = NewsletterSubscriber.objects
+    assert emails(objects.has_any_preference("TIPS", "NEWS")) == [
+        "deals-tips@example.com",
+        "news-deals@example.com",
+        "news@example.com",
+    ]
+    assert emails(objects.has_all_preferences("NEWS", "DEALS")) == [
+        "news-deals@example.com"
+    ]
+    assert emails(objects.for_preference("TIPS")) == ["deals-tips@example.com"]
+    assert emails(objects.filter(preferences="DEALS")) == ["deals@example.com"]
+    assert not objects.has_any_preference().exists()
+
+
+@pytest.mark.django_db
+def test_targeted_segment_is_an_indexed_in_list():
+    queryset = NewsletterSubscriber.objects.active().confirmed().for_preference("TIPS")
+
+    sql, params = queryset.values("pk").query.sql_with_params()
+
+    assert "IN (%s, %s, %s, %s)" in sql
+    assert [param for param in params if param not in (True, False)] == [4, 5, 6, 7]
+    assert "newsletter_preference_idx" in queryset.explain()
+
+
+@pytest.mark.django_db
+def test_full_clean_rejects_empty_and_unknown_preferences():
+    subscriber = NewsletterSubscriber(email="a@example.com", preferences="")
+    with pytest.raises(ValidationError) as empty:
+        subscriber.full_clean()
+    assert "preferences" in empty.value.message_dict
+
+    subscriber.preferences = "NEWS,SPORTS"
+    with pytest.raises(ValidationError) as unknown:
+        subscriber.full_clean()
+    assert "preferences" in unknown.value.message_dict
+
+
+@pytest.mark.django_db
+def test_model_form_uses_checkboxes(subscribers):
+    Form = modelform_factory(NewsletterSubscriber, fields=["email", "preferences"])
+    form = Form(instance=subscribers["NEWS,DEALS"])
+
+    assert 'type="checkbox"' in str(form["preferences"])
+    assert form["preferences"].value() == ["NEWS", "DEALS"]
+
+    form = Form(
+        data={"email": "b@example.com", "preferences": ["TIPS", "DEALS"]},
+    )
+    assert form.is_valid(), form.errors
+    assert form.save().preferences == {"DEALS", "TIPS"}
+
+
+@pytest.mark.django_db
+def test_segment_counts_count_every_preference(subscribers, django_assert_num_queries):
+    assert segments.get_segment_counts("preferences") == {
+        "NEWS": 2,
+        "DEALS": 3,
+        "TIPS": 1,
+    }
+    NewsletterSubscriber.objects.create(
+        email="all@example.com", preferences="NEWS,DEALS,TIPS"
+    )
+
+    with django_assert_num_queries(0):
+        assert segments.get_segment_counts("preferences") == {
+            "NEWS": 3,
+            "DEALS": 4,
+            "TIPS": 2,
+        }
+        assert (
+            segments.get_filtered_count(
+                {"preferences__has_any": "DEALS"}, NewsletterSubscriber.objects.none()
+            )
+            == 4
+        )
+
+
+def get_preference_choices(user, params):
+    model_admin = NewsletterSubscriberAdmin(NewsletterSubscriber, AdminSite())
+    request = RequestFactory().get("/", params)
+    request.user = user
+
+    changelist = model_admin.get_changelist_instance(request)
+    spec = next(
+        spec for spec in changelist.filter_specs if spec.field_path == "preferences"
+    )
+    return changelist, list(spec.choices(changelist))
+
+
+@pytest.mark.django_db
+def test_admin_filters_by_preference(subscribers, django_user_model):
+    user = django_user_model.objects.create_superuser("admin", "admin@example.com")
+    changelist, choices = get_preference_choices(
+        user, {"preferences__has_any": "DEALS"}
+    )
+
+    assert changelist.result_count == 3
+    assert [choice["display"] for choice in choices] == [
+        "All",
+        "News",
+        "Deals",
+        "Tips",
+    ]
+    assert [choice["selected"] for choice in choices] == [False, False, True, False]
+    assert (
+        changelist.model_admin.preference_labels(subscribers["DEALS,TIPS"])
+        == "Deals, Tips"
+    )
+
+
+@pytest.mark.skipif(django.VERSION < (5, 0), reason="Admin facets need Django 5.0")
+@pytest.mark.django_db
+def test_admin_counts_preference_facets(subscribers, django_user_model):
+    user = django_user_model.objects.create_superuser("admin", "admin@example.com")
+    _changelist, choices = get_preference_choices(
+        user, {"preferences__has_any": "DEALS", "_facets": "1"}
+    )
+
+    assert [choice["display"] for choice in choices] == [
+        "All",
+        "News (2)",
+        "Deals (3)",
+        "Tips (1)",
+    ]
+
+
+@pytest.mark.django_db
+def test_enqueue_issue_targets_preferences(subscribers):
+    issue = NewsletterIssue.objects.create(
+        subject="Tips", body="<p>Tips</p>", target_preferences=["TIPS", "NEWS"]
+    )
+
+    assert enqueue_issue(issue) == 3
+    assert sorted(
+        NewsletterDelivery.objects.values_list("subscriber__email", flat=True)
+    ) == ["deals-tips@example.com", "news-deals@example.com", "news@example.com"]
+
+    everyone = NewsletterIssue.objects.create(subject="All", body="<p>All</p>")
+    assert everyone.target_preferences == set()
+    assert enqueue_issue(everyone) == 4
+
+
+@pytest.mark.django_db
+def test_import_and_export_multiple_preferences(tmp_path):
+    SubscriberImporter().run(
+        [
+            {"email": "csv@example.com", "preferences": "NEWS,TIPS"},
+            {"email": "jsonl@example.com", "preferences": ["DEALS"]},
+        ]
+    )
+    path = tmp_path / "export.jsonl"
+
+    call_command(
+        "export_newsletter_subscribers",
+        format="jsonl",
+        preferences=["TIPS"],
+        output=str(path),
+    )
+    out = StringIO()
+    call_command("export_newsletter_subscribers", stdout=out)
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(row["email"], row["preferences"]) for row in rows] == [
+        ("csv@example.com", ["NEWS", "TIPS"])
+    ]
+    assert '"NEWS,TIPS"' in out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_converts_single_preferences():
+    executor = MigrationExecutor(connection)
+    executor.migrate([("sage_newsletter", "0008_canonical_email")])
+    apps = executor.loader.project_state(
+        ("sage_newsletter", "0008_canonical_email")
+    ).apps
+    Subscriber = apps.get_model("sage_newsletter", "NewsletterSubscriber")
+    for preferences in ("NEWS", "DEALS", "TIPS"):
+        Subscriber.objects.create(
+            email=f"{preferences.lower()}@example.com", preferences=preferences
+        )
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    assert dict(NewsletterSubscriber.objects.values_list("email", "preferences")) == {
+        "news@example.com": {"NEWS"},
+        "deals@example.com": {"DEALS"},
+        "tips@example.com": {"TIPS"},
+    }
@@ -0,0 +1,232 @@
+import smtplib
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from sage_newsletter.helpers.text_choices import DeliveryStatus
+from sage_newsletter.models import (
+    NewsletterDelivery,
+    NewsletterIssue,
+    NewsletterSubscriber,
+)
+from sage_newsletter.services import DeliveryWorker, DomainLimiter, enqueue_issue
+from sage_newsletter.services.queue import WorkResult
+
+
+class FlakyBackend(EmailBackend):
+    """A locmem backend that refuses to deliver to one address."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "broken@example.com" in message.to:
+                raise smtplib.SMTPRecipientsRefused({"broken@example.com": (550, b"")})
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def issue():
+    for index in range(5):
+        NewsletterSubscriber.objects.create(
+            email=f"subscriber{index}@example.com", confirmed=True
+        )
+    return NewsletterIssue.objects.create(subject="Issue 1", body="<p>Hello</p>")
+
+
+@pytest.mark.django_db
+def test_enqueue_issue_queues_active_confirmed_subscribers_once(issue):
+    NewsletterSubscriber.objects.create(email="unconfirmed@example.com")
+    NewsletterSubscriber.objects.create(
+        email="inactive@example.com", confirmed=True, is_active=False
+    )
+
+    assert enqueue_issue(issue, batch_size=2) == 5
+    enqueue_issue(issue)
+
+    assert issue.deliveries.count() == 5
+    assert not issue.deliveries.exclude(status=DeliveryStatus.PENDING).exists()
+
+
+@pytest.mark.django_db
+def test_worker_drains_the_queue(issue):
+    enqueue_issue(issue)
+    now = timezone.now()
+
+    result = DeliveryWorker(batch_size=2, threads=3).run(once=True)
+
+    assert (result.sent, result.failed, result.batches) == (5, 0, 3)
+    assert len(mail.outbox) == 5
+    assert mail.outbox[0].subject == "Issue 1"
+    assert mail.outbox[0].alternatives[0][0] == "<p>Hello</p>"
+    assert issue.deliveries.filter(status=DeliveryStatus.SENT, attempts=1).count() == 5
+    assert not NewsletterSubscriber.objects.filter(last_sent__lt=now).exists()
+    assert DeliveryWorker().run(once=True).sent == 0
+
+
+@pytest.mark.django_db
+def test_worker_claims_and_records_a_batch_in_bulk(issue):
+    enqueue_issue(issue)
+    worker = DeliveryWorker(batch_size=10, threads=2)
+
+    with CaptureQueriesContext(connection) as captured:
+        worker.process_batch()
+
+    statements = [query["sql"].split()[0] for query in captured.captured_queries]
+    # Claim: SELECT candidates, UPDATE lease, SELECT claimed rows, their
+    # issue and their suppressions. Record: one UPDATE of the deliveries and
+    # one of last_sent.
+    assert statements.count("SELECT") == 4
+    assert statements.count("UPDATE") == 3
+    assert statements.count("INSERT") == 0
+
+
+@pytest.mark.django_db
+def test_claims_do_not_overlap_and_expired_leases_are_reclaimed(issue):
+    enqueue_issue(issue)
+    now = timezone.now()
+    first = DeliveryWorker(batch_size=3, lease=60)
+    second = DeliveryWorker(batch_size=3, lease=60)
+
+    claimed = first.claim(now)
+    others = second.claim(now)
+
+    assert len(claimed) == 3
+    assert len(others) == 2
+    assert not {d.pk for d in claimed} & {d.pk for d in others}
+    assert second.claim(now + timedelta(seconds=30)) == []
+
+    # The first worker crashed, its lease runs out and the rows come back.
+    reclaimed = DeliveryWorker(batch_size=10).claim(now + timedelta(seconds=61))
+    assert {d.pk for d in reclaimed} == {d.pk for d in claimed} | {d.pk for d in others}
+    assert {d.attempts for d in reclaimed} == {2}
+
+
+@pytest.mark.django_db
+def test_failed_deliveries_are_retried_then_failed(issue):
+    broken = NewsletterSubscriber.objects.create(
+        email="broken@example.com", confirmed=True
+    )
+    enqueue_issue(issue)
+    worker = DeliveryWorker(
+        connection=lambda **kwargs: FlakyBackend(**kwargs),
+        max_attempts=2,
+        retry_delay=60,
+    )
+
+    result = worker.process_batch()
+
+    assert (result.sent, result.retried, result.failed) == (5, 1, 0)
+    delivery = NewsletterDelivery.objects.get(subscriber=broken)
+    assert delivery.status == DeliveryStatus.PENDING
+    assert delivery.lease_token is None
+    assert "broken@example.com" in delivery.last_error
+    assert delivery.next_attempt_at > timezone.now() + timedelta(seconds=50)
+    assert worker.process_batch() is None
+
+    NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+        next_attempt_at=timezone.now()
+    )
+    result = worker.process_batch()
+
+    assert (result.sent, result.retried, result.failed) == (0, 0, 1)
+    delivery.refresh_from_db()
+    assert delivery.status == DeliveryStatus.FAILED
+    assert delivery.attempts == 2
+
+
+@pytest.mark.django_db
+def test_render_errors_fail_the_delivery_and_free_the_domain(issue):
+    enqueue_issue(issue)
+    broken = NewsletterSubscriber.objects.get(email="subscriber0@example.com")
+    limiter = DomainLimiter({"example.com": {"connections": 1}})
+
+    def render(delivery):
+        if delivery.subscriber_id == broken.pk:
+            raise ValueError("bad template")
+        return mail.EmailMessage("Hi", "Hello", to=[delivery.subscriber.email])
+
+    result = DeliveryWorker(render, threads=2, limiter=limiter).process_batch()
+
+    assert (result.sent, result.retried) == (4, 1)
+    assert limiter.in_flight == {"example.com": 0}
+    delivery = NewsletterDelivery.objects.get(subscriber=broken)
+    assert delivery.status == DeliveryStatus.PENDING
+    assert delivery.last_error == "bad template"
+
+
+@pytest.mark.django_db
+def test_losing_a_claim_race_retries_instead_of_reporting_idle(issue):
+    enqueue_issue(issue)
+    now = timezone.now()
+    rival = DeliveryWorker(batch_size=2)
+    worker = DeliveryWorker(batch_size=2)
+    rival_claims = []
+
+    class RacingQuerySet(type(NewsletterDelivery.objects.all())):
+        def update(self, **kwargs):
+            # The rival claims the same candidates first, as can happen
+            # without SKIP LOCKED.
+            if not rival_claims:
+                rival_claims.append(rival.claim(now))
+            return super().update(**kwargs)
+
+    def get_claimable_queryset(now):
+        queryset = DeliveryWorker.get_claimable_queryset(worker, now)
+        queryset.__class__ = RacingQuerySet
+        return queryset
+
+    worker.get_claimable_queryset = get_claimable_queryset
+
+    claimed = worker.claim(now)
+
+    rival_pks = {delivery.pk for delivery in rival_claims[0]}
+    assert len(rival_pks) == 2
+    assert len(claimed) == 2
+    assert not {delivery.pk for delivery in claimed} & rival_pks
+
+
+@pytest.mark.django_db
+def test_stale_workers_do_not_overwrite_a_newer_claim(issue):
+    enqueue_issue(issue)
+    now = timezone.now()
+    stale = DeliveryWorker(batch_size=10, lease=60)
+    claimed = stale.claim(now)
+    reclaimed = DeliveryWorker(batch_size=10).claim(now + timedelta(seconds=61))
+
+    result = WorkResult()
+    stale.record(claimed[:3], [(claimed[3], "timeout")], now, result)
+
+    assert not issue.deliveries.exclude(status=DeliveryStatus.SENDING).exists()
+    assert set(issue.deliveries.values_list("lease_token", flat=True)) == {
+        reclaimed[0].lease_token
+    }
+
+
+@pytest.mark.django_db
+def test_expired_last_attempts_and_unsubscribed_deliveries_fail(issue):
+    enqueue_issue(issue)
+    now = timezone.now()
+    crashed = DeliveryWorker(batch_size=2, lease=60, max_attempts=1).claim(now)
+    # The worker crashed during its only attempt and the lease ran out.
+    issue.deliveries.filter(status=DeliveryStatus.SENDING).update(
+        leased_until=now - timedelta(seconds=1)
+    )
+    NewsletterSubscriber.objects.filter(email="subscriber4@example.com").update(
+        is_active=False
+    )
+
+    result = DeliveryWorker(max_attempts=1).process_batch()
+
+    assert (result.sent, result.failed) == (2, 3)
+    failed = issue.deliveries.filter(status=DeliveryStatus.FAILED)
+    assert dict(failed.values_list("subscriber__email", "last_error")) == {
+        crashed[0].subscriber.email: "The lease of the last attempt expired.",
+        crashed[1].subscriber.email: "The lease of the last attempt expired.",
+        "subscriber4@example.com": "The subscriber has unsubscribed.",
+    }
+    assert set(failed.values_list("attempts", flat=True)) == {1, 0}
+    assert len(mail.outbox) == 2
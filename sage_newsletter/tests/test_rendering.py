@@ -0,0 +1,97 @@
+import pytest
+from django.core import mail
+from django.test import override_settings
+
+from sage_newsletter.models import NewsletterIssue, NewsletterSubscriber
+from sage_newsletter.services import DeliveryWorker, IssueRenderer, enqueue_issue
+
+pytestmark = pytest.mark.urls("sage_newsletter.tests.urls")
+
+
+class CountingRenderer(IssueRenderer):
+    def __init__(self, *args, **kwargs):
+        self.variants = []
+        super().__init__(*args, **kwargs)
+
+    def render_variant(self, issue, updated_at, language, preferences):
+        self.variants.append((language, preferences))
+        return super().render_variant(issue, updated_at, language, preferences)
+
+
+@pytest.fixture
+def issue():
+    return NewsletterIssue.objects.create(
+        subject=(
+            "{{ issue.pk }}: "
+            "{% if 'DEALS' in preferences %}Deals{% else %}News{% endif %}"
+        ),
+        body="<p>{{ language }} {{ preferences }} for $email, only $5</p>",
+    )
+
+
+@pytest.mark.django_db
+def test_issue_is_rendered_once_per_variant(issue):
+    renderer = CountingRenderer()
+    variants = [
+        ("en", "NEWS"),
+        ("en", "NEWS"),
+        ("fa", "NEWS"),
+        ("en", "DEALS"),
+        ("fa", "NEWS"),
+    ]
+    for index, (language, preferences) in enumerate(variants):
+        subscriber = NewsletterSubscriber(
+            email=f"subscriber{index}@example.com",
+            language=language,
+            preferences=preferences,
+        )
+        renderer.render(issue, subscriber)
+
+    assert renderer.variants == [("en", {"NEWS"}), ("fa", {"NEWS"}), ("en", {"DEALS"})]
+
+
+@pytest.mark.django_db
+def test_render_substitutes_recipient_tokens(issue):
+    subscriber = NewsletterSubscriber(
+        email="a&b@example.com", language="fa", preferences="DEALS"
+    )
+
+    subject, text, html = IssueRenderer().render(issue, subscriber)
+
+    assert subject == f"{issue.pk}: Deals"
+    assert text == "fa DEALS for a&b@example.com, only $5"
+    assert html == "<p>fa DEALS for a&amp;b@example.com, only $5</p>"
+
+
+@pytest.mark.django_db
+def test_editing_an_issue_renders_it_again(issue):
+    renderer = CountingRenderer()
+    subscriber = NewsletterSubscriber(email="news@example.com", language="en")
+    renderer.render(issue, subscriber)
+
+    issue.body = "<p>Updated</p>"
+    issue.save()
+    _subject, text, _html = renderer.render(issue, subscriber)
+
+    assert text == "Updated"
+    assert len(renderer.variants) == 2
+
+
+@pytest.mark.django_db
+@override_settings(NEWSLETTER_SITE_URL="https://example.com")
+def test_worker_sends_rendered_issues():
+    subscriber = NewsletterSubscriber.objects.create(
+        email="news@example.com", confirmed=True
+    )
+    issue = NewsletterIssue.objects.create(
+        subject="Weekly", body='<a href="$unsubscribe_url">Unsubscribe</a>'
+    )
+    enqueue_issue(issue)
+
+    DeliveryWorker().run(once=True)
+
+    url = f"https://example.com/newsletter/unsubscribe/{subscriber.unsubscribe_token}/"
+    message = mail.outbox[0]
+    assert message.subject == "Weekly"
+    assert message.alternatives[0][0] == f'<a href="{url}">Unsubscribe</a>'
+    assert message.extra_headers["List-Unsubscribe"] == f"<{url}>"
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.test import override_settings
+
+from sage_newsletter.helpers.timezones import get_send_hour
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import (
+    NewsletterDispatcher,
+    SubscriberImporter,
+    schedule_send_hours,
+    subscribe,
+)
+
+WINTER = datetime(2026, 1, 15, 12, tzinfo=dt_timezone.utc)
+SUMMER = datetime(2026, 7, 15, 12, tzinfo=dt_timezone.utc)
+
+
+def build_message(subscriber):
+    return EmailMessage("Hi", "Hello", to=[subscriber.email])
+
+
+@pytest.mark.parametrize(
+    "name, now, expected",
+    [
+        ("Europe/Berlin", WINTER, 8),
+        ("Europe/Berlin", SUMMER, 7),
+        ("America/New_York", WINTER, 14),
+        ("Asia/Kolkata", WINTER, 3),
+        ("Asia/Tokyo", SUMMER, 0),
+    ],
+)
+def test_send_hour_is_the_utc_hour_of_the_local_send_time(name, now, expected):
+    assert get_send_hour(name, "en", now) == expected
+
+
+@override_settings(
+    TIME_ZONE="UTC",
+    NEWSLETTER_LANGUAGE_TIMEZONES={"fa": "Asia/Tehran"},
+    NEWSLETTER_LOCAL_SEND_HOUR=10,
+)
+def test_send_hour_falls_back_to_language_and_time_zone():
+    assert get_send_hour("", "fa", WINTER) == 6
+    assert get_send_hour("", "en", WINTER) == 10
+    assert get_send_hour("Mars/Olympus", "fa", WINTER) == 6
+
+
+@pytest.mark.django_db
+def test_send_hour_is_bucketed_on_save_and_signup():
+    subscriber = NewsletterSubscriber.objects.create(
+        email="tokyo@example.com", timezone="Asia/Tokyo"
+    )
+    assert subscriber.send_hour == 0
+
+    subscriber.timezone = "Asia/Kolkata"
+    subscriber.save()
+    subscriber.refresh_from_db()
+    assert subscriber.send_hour == 3
+
+    with override_settings(NEWSLETTER_LANGUAGE_TIMEZONES={"fa": "Asia/Tokyo"}):
+        subscriber, _status = subscribe("signup@example.com", language="fa")
+    assert subscriber.send_hour == 0
+
+
+@pytest.mark.django_db
+def test_full_clean_rejects_unknown_time_zones():
+    subscriber = NewsletterSubscriber(email="a@example.com", timezone="Mars/Olympus")
+
+    with pytest.raises(ValidationError) as error:
+        subscriber.full_clean()
+
+    assert "timezone" in error.value.message_dict
+
+
+@pytest.mark.django_db
+def test_local_time_dispatch_only_sends_to_the_current_bucket(mailoutbox):
+    now = datetime(2026, 1, 15, 0, 10, tzinfo=dt_timezone.utc)
+    for email, timezone in (
+        ("tokyo@example.com", "Asia/Tokyo"),
+        ("kolkata@example.com", "Asia/Kolkata"),
+    ):
+        NewsletterSubscriber.objects.create(
+            email=email, timezone=timezone, confirmed=True
+        )
+    # Served by yesterday's run later in the same hour, still due today.
+    NewsletterSubscriber.objects.create(
+        email="daily@example.com",
+        timezone="Asia/Tokyo",
+        frequency="DAILY",
+        last_sent=now - timedelta(days=1) + timedelta(minutes=30),
+        confirmed=True,
+    )
+
+    result = NewsletterDispatcher(build_message, local_time=True).dispatch(now)
+
+    assert result.sent == 2
+    assert sorted(message.to[0] for message in mailoutbox) == [
+        "daily@example.com",
+        "tokyo@example.com",
+    ]
+    with override_settings(NEWSLETTER_LOCAL_TIME_DELIVERY=True):
+        later = NewsletterDispatcher(build_message).dispatch(now + timedelta(hours=3))
+    assert later.sent == 1
+    assert mailoutbox[-1].to == ["kolkata@example.com"]
+
+
+@pytest.mark.django_db
+def test_send_window_lookup_uses_the_bucket_index():
+    queryset = NewsletterSubscriber.objects.in_send_window(WINTER).due(WINTER)
+
+    assert "newsletter_send_hour_idx" in queryset.explain()
+
+
+@pytest.mark.django_db
+def test_schedule_send_hours_moves_stale_buckets(django_assert_num_queries):
+    berlin = NewsletterSubscriber.objects.create(
+        email="berlin@example.com", timezone="Europe/Berlin"
+    )
+    NewsletterSubscriber.objects.create(
+        email="tokyo@example.com", timezone="Asia/Tokyo"
+    )
+    NewsletterSubscriber.objects.filter(pk=berlin.pk).update(send_hour=0)
+
+    assert schedule_send_hours(now=WINTER) == 1
+    berlin.refresh_from_db()
+    assert berlin.send_hour == 8
+
+    assert schedule_send_hours(now=SUMMER) == 1
+    with django_assert_num_queries(1):
+        assert schedule_send_hours(now=SUMMER) == 0
+    berlin.refresh_from_db()
+    assert berlin.send_hour == 7
+
+
+@pytest.mark.django_db
+def test_schedule_command_reports_moved_subscribers():
+    subscriber = NewsletterSubscriber.objects.create(
+        email="tokyo@example.com", timezone="Asia/Tokyo"
+    )
+    NewsletterSubscriber.objects.filter(pk=subscriber.pk).update(send_hour=5)
+    out = StringIO()
+
+    call_command("schedule_newsletter_send_hours", stdout=out)
+
+    assert "Moved 1 subscribers to another send hour." in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_updates_time_zone_and_send_hour():
+    NewsletterSubscriber.objects.create(
+        email="moving@example.com", timezone="Asia/Tokyo"
+    )
+
+    result = SubscriberImporter().run(
+        [
+            {"email": "moving@example.com", "timezone": "Asia/Kolkata"},
+            {"email": "bad@example.com", "timezone": "Mars/Olympus"},
+        ]
+    )
+
+    assert result.skipped == 1
+    subscriber = NewsletterSubscriber.objects.get(email="moving@example.com")
+    assert (subscriber.timezone, subscriber.send_hour) == ("Asia/Kolkata", 3)
+
+
+@pytest.mark.django_db
+def test_import_keeps_the_time_zone_when_the_language_changes():
+    NewsletterSubscriber.objects.create(
+        email="tokyo@example.com", timezone="Asia/Tokyo", language="en"
+    )
+
+    SubscriberImporter().run([{"email": "tokyo@example.com", "language": "fa"}])
+
+    subscriber = NewsletterSubscriber.objects.get(email="tokyo@example.com")
+    assert (subscriber.timezone, subscriber.language) == ("Asia/Tokyo", "fa")
+    assert subscriber.send_hour == get_send_hour("Asia/Tokyo", "fa")
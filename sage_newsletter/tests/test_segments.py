@@ -0,0 +1,109 @@
+import django
+import pytest
+from django.contrib.admin import AdminSite
+from django.test import RequestFactory
+
+from sage_newsletter.actions import NewsletterSubscriptionActions
+from sage_newsletter.admin import NewsletterSubscriberAdmin
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import segments, subscribe
+
+
+@pytest.fixture
+def subscribers():
+    return [
+        NewsletterSubscriber.objects.create(email="a@example.com", frequency="DAILY"),
+        NewsletterSubscriber.objects.create(email="b@example.com", confirmed=True),
+        NewsletterSubscriber.objects.create(
+            email="c@example.com", is_active=False, preferences="DEALS"
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_segment_counts_are_cached(subscribers, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        counts = segments.get_segment_counts("frequency")
+    assert counts == {"DAILY": 1, "WEEKLY": 2, "MONTHLY": 0}
+
+    with django_assert_num_queries(0):
+        assert segments.get_segment_counts("frequency") == counts
+
+
+@pytest.mark.django_db
+def test_segment_counts_follow_saves_and_deletes(
+    subscribers, django_assert_num_queries
+):
+    segments.get_segment_counts("preferences")
+    segments.get_total_count()
+
+    NewsletterSubscriber.objects.create(email="d@example.com", preferences="DEALS")
+    subscribers[0].delete()
+    subscribe("e@example.com", preferences="TIPS")
+
+    with django_assert_num_queries(0):
+        assert segments.get_segment_counts("preferences") == {
+            "NEWS": 1,
+            "DEALS": 2,
+            "TIPS": 1,
+        }
+        assert segments.get_total_count() == 4
+
+
+@pytest.mark.django_db
+def test_segment_counts_follow_bulk_actions_and_reactivation(
+    subscribers, django_assert_num_queries
+):
+    segments.get_segment_counts("confirmed")
+    segments.get_segment_counts("is_active")
+
+    NewsletterSubscriptionActions.confirm_subscriptions(
+        None, None, NewsletterSubscriber.objects.all()
+    )
+    subscribe("c@example.com")
+
+    with django_assert_num_queries(0):
+        assert segments.get_segment_counts("confirmed") == {True: 3, False: 0}
+        assert segments.get_segment_counts("is_active") == {True: 3, False: 0}
+
+
+@pytest.mark.django_db
+def test_filtered_counts_are_cached_until_a_change(
+    subscribers, django_assert_num_queries
+):
+    filters = {"is_active__exact": "1", "frequency__exact": "WEEKLY"}
+    queryset = NewsletterSubscriber.objects.filter(is_active=True, frequency="WEEKLY")
+
+    assert segments.get_filtered_count(filters, queryset) == 1
+    with django_assert_num_queries(0):
+        assert segments.get_filtered_count(filters, queryset) == 1
+
+    NewsletterSubscriber.objects.create(email="d@example.com")
+
+    assert segments.get_filtered_count(filters, queryset) == 2
+
+
+@pytest.mark.skipif(django.VERSION < (5, 0), reason="Admin facets need Django 5.0")
+@pytest.mark.django_db
+def test_admin_changelist_counts_from_cache(
+    subscribers, django_user_model, django_assert_num_queries
+):
+    user = django_user_model.objects.create_superuser("admin", "admin@example.com")
+    model_admin = NewsletterSubscriberAdmin(NewsletterSubscriber, AdminSite())
+    request = RequestFactory().get("/", {"confirmed__exact": "1", "_facets": "1"})
+    request.user = user
+
+    def load_changelist():
+        changelist = model_admin.get_changelist_instance(request)
+        list(changelist.result_list)
+        facets = [list(spec.choices(changelist)) for spec in changelist.filter_specs]
+        return changelist, facets
+
+    changelist, facets = load_changelist()
+    assert changelist.result_count == 1
+    assert changelist.full_result_count is None
+    assert facets[0][1]["display"] == "Yes (1)"
+
+    # With warm caches only the page of results is fetched.
+    with django_assert_num_queries(1):
+        load_changelist()
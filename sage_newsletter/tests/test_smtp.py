@@ -0,0 +1,222 @@
+import asyncio
+import os
+import signal
+import smtplib
+import socket
+from types import SimpleNamespace
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage
+
+from sage_newsletter.models import NewsletterIssue, NewsletterSubscriber
+from sage_newsletter.services import (
+    DeliveryWorker,
+    DomainLimiter,
+    NewsletterDispatcher,
+    enqueue_issue,
+)
+from sage_newsletter.services import smtp
+from sage_newsletter.services.smtp import AsyncSMTPEmailBackend, close_pools
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+
+class Handler:
+    """Collects the delivered envelopes and refuses one recipient."""
+
+    def __init__(self, pipelining=False):
+        self.pipelining = pipelining
+        self.envelopes = []
+        self.peers = set()
+        self.delay = 0
+        self.active = self.max_active = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        if self.pipelining:
+            responses.insert(-1, "250-PIPELINING")
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == "refused@example.com":
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        self.envelopes.append(envelope)
+        self.peers.add(session.peer)
+        return "250 Message accepted"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """A local SMTP server standing in for the real relay."""
+
+    def __init__(self, pipelining=False):
+        self.handler = Handler(pipelining)
+        self.port = free_port()
+        self.start()
+
+    def start(self):
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=self.port)
+        self.controller.start()
+
+    def restart(self):
+        self.controller.stop()
+        self.start()
+
+
+@pytest.fixture
+def server(request):
+    server = Server(pipelining=getattr(request, "param", False))
+    yield server
+    close_pools()
+    server.controller.stop()
+
+
+def backend(server, **kwargs):
+    return AsyncSMTPEmailBackend(
+        host="127.0.0.1", port=server.port, username="", password="", **kwargs
+    )
+
+
+def message(to, body="Hello"):
+    return EmailMessage("News", body, "news@example.com", [to])
+
+
+@pytest.mark.parametrize("server", [False, True], indirect=True)
+def test_messages_are_sent_over_pooled_connections(server):
+    connection = backend(server, pool_size=2)
+
+    sent = connection.send_messages(
+        [message(f"user{i}@example.com", body=".dot\nline") for i in range(6)]
+    )
+    sent += connection.send_messages([message("late@example.com")])
+
+    assert sent == 7
+    handler = server.handler
+    assert len(handler.envelopes) == 7
+    assert len(handler.peers) <= 2
+    assert connection.get_pool().opened <= 2
+    assert b"\r\n.dot\r\nline" in handler.envelopes[0].content
+
+
+def test_refusals_are_raised_and_keep_the_connection(server):
+    connection = backend(server, pool_size=1)
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        connection.send_messages([message("refused@example.com")])
+    assert connection.send_messages([message("user@example.com")]) == 1
+    assert (
+        backend(server, fail_silently=True).send_messages(
+            [message("refused@example.com"), message("other@example.com")]
+        )
+        == 1
+    )
+    assert connection.get_pool().opened == 1
+
+
+def test_dropped_connections_are_replaced(server):
+    connection = backend(server, pool_size=1)
+    connection.send_messages([message("first@example.com")])
+
+    # Restarting the server drops the pooled connection.
+    server.restart()
+    assert connection.send_messages([message("second@example.com")]) == 1
+    assert connection.get_pool().opened == 2
+
+
+def test_asend_messages_from_another_event_loop(server):
+    sent = asyncio.run(backend(server).asend_messages([message("async@example.com")]))
+
+    assert sent == 1
+    assert server.handler.envelopes[0].rcpt_tos == ["async@example.com"]
+
+
+@pytest.mark.django_db
+def test_dispatcher_sends_through_the_transport(server):
+    for email in ["a@example.com", "refused@example.com", "b@example.com"]:
+        NewsletterSubscriber.objects.create(email=email, confirmed=True)
+
+    result = NewsletterDispatcher(
+        lambda subscriber: message(subscriber.email),
+        connection=lambda **kwargs: backend(server, **kwargs),
+    ).dispatch()
+
+    assert (result.sent, result.failed) == (2, 1)
+    assert len(server.handler.envelopes) == 2
+
+
+@pytest.mark.django_db
+def test_dispatcher_keeps_the_pool_busy(server):
+    server.handler.delay = 0.1
+    for index in range(8):
+        NewsletterSubscriber.objects.create(
+            email=f"user{index}@example.com", confirmed=True
+        )
+
+    result = NewsletterDispatcher(
+        lambda subscriber: message(subscriber.email),
+        connection=lambda **kwargs: backend(server, pool_size=4, **kwargs),
+        limiter=DomainLimiter({"example.com": {"connections": 3}}),
+    ).dispatch()
+
+    assert result.sent == 8
+    # One send_messages() call per message would keep one message in flight.
+    assert server.handler.max_active == 3
+
+
+@pytest.mark.django_db
+def test_worker_thread_keeps_the_pool_busy(server):
+    server.handler.delay = 0.1
+    issue = NewsletterIssue.objects.create(subject="News", body="<p>Hello</p>")
+    for index in range(6):
+        NewsletterSubscriber.objects.create(
+            email=f"user{index}@example.com", confirmed=True
+        )
+    enqueue_issue(issue)
+
+    result = DeliveryWorker(
+        lambda delivery: message(delivery.subscriber.email),
+        threads=1,
+        connection=lambda **kwargs: backend(server, pool_size=3, **kwargs),
+    ).run(once=True)
+
+    assert result.sent == 6
+    assert server.handler.max_active == 3
+
+
+def test_starttls_needs_python_3_11(monkeypatch):
+    monkeypatch.setattr(smtp, "sys", SimpleNamespace(version_info=(3, 10, 14)))
+
+    with pytest.raises(ImproperlyConfigured):
+        AsyncSMTPEmailBackend(host="127.0.0.1", port=25, use_tls=True)
+    AsyncSMTPEmailBackend(host="127.0.0.1", port=25, use_ssl=True)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork()")
+def test_forked_children_start_their_own_loop(server):
+    assert backend(server).send_messages([message("parent@example.com")]) == 1
+
+    pid = os.fork()
+    if pid == 0:
+        # The child is killed instead of hanging on the parent's loop.
+        signal.alarm(10)
+        sent = backend(server).send_messages([message("child@example.com")])
+        os._exit(0 if sent == 1 else 1)
+    _pid, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert server.handler.envelopes[-1].rcpt_tos == ["child@example.com"]
@@ -0,0 +1,68 @@
+import pytest
+
+from sage_newsletter.helpers.text_choices import SubscriptionStatus
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import subscription
+from sage_newsletter.services import subscribe
+
+
+@pytest.fixture(params=[True, False], ids=["upsert", "fallback"])
+def upsert_support(request, monkeypatch):
+    """Runs a test against both the ON CONFLICT path and the fallback."""
+    if not request.param:
+        monkeypatch.setattr(subscription, "supports_upsert", lambda connection: False)
+    return request.param
+
+
+@pytest.mark.django_db
+def test_subscribe_creates_new_subscriber(upsert_support):
+    subscriber, status = subscribe("new@example.com", language="fa")
+
+    assert status == SubscriptionStatus.NEW
+    assert subscriber.pk is not None
+    stored = NewsletterSubscriber.objects.get(email="new@example.com")
+    assert stored.pk == subscriber.pk
+    assert stored.language == "fa"
+    assert stored.is_active is True
+    assert stored.unsubscribe_token == subscriber.unsubscribe_token
+
+
+@pytest.mark.django_db
+def test_subscribe_reactivates_inactive_subscriber(upsert_support):
+    existing = NewsletterSubscriber.objects.create(
+        email="inactive@example.com", is_active=False, preferences="DEALS"
+    )
+
+    subscriber, status = subscribe("inactive@example.com", preferences="TIPS")
+
+    assert status == SubscriptionStatus.REACTIVATED
+    assert subscriber.pk == existing.pk
+    assert subscriber.unsubscribe_token == existing.unsubscribe_token
+    assert subscriber.date_subscribed == existing.date_subscribed
+    existing.refresh_from_db()
+    assert existing.is_active is True
+    assert existing.preferences == {"DEALS"}
+
+
+@pytest.mark.django_db
+def test_subscribe_reports_already_active_subscriber(upsert_support):
+    NewsletterSubscriber.objects.create(email="active@example.com")
+
+    subscriber, status = subscribe("active@example.com")
+
+    assert status == SubscriptionStatus.ALREADY_ACTIVE
+    assert subscriber is None
+    assert NewsletterSubscriber.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_subscribe_is_a_single_statement(django_assert_num_queries):
+    NewsletterSubscriber.objects.create(email="inactive@example.com", is_active=False)
+
+    # Each after the indexed suppression lookup.
+    with django_assert_num_queries(2):
+        subscribe("new@example.com")
+    with django_assert_num_queries(2):
+        subscribe("inactive@example.com")
+    with django_assert_num_queries(2):
+        subscribe("inactive@example.com")
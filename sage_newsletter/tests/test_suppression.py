@@ -0,0 +1,191 @@
+import json
+from pathlib import Path
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from sage_newsletter.helpers.text_choices import DeliveryStatus, SubscriptionStatus
+from sage_newsletter.models import (
+    NewsletterIssue,
+    NewsletterSubscriber,
+    NewsletterSuppression,
+)
+from sage_newsletter.services import (
+    DeliveryWorker,
+    NewsletterDispatcher,
+    asubscribe,
+    enqueue_issue,
+    get_suppressed,
+    ingest_events,
+    iter_payload_events,
+    segments,
+    subscribe,
+)
+
+pytestmark = pytest.mark.urls("sage_newsletter.tests.urls")
+
+FIXTURE = Path(__file__).parent / "fixtures" / "suppression_webhook.json"
+WEBHOOK_URL = "/newsletter/webhooks/suppressions/"
+
+
+@pytest.fixture
+def payload():
+    return json.loads(FIXTURE.read_text())
+
+
+@pytest.fixture
+def subscribers():
+    return NewsletterSubscriber.objects.bulk_create(
+        NewsletterSubscriber(email=email, confirmed=True)
+        for email in [
+            "Bounced@Example.com",
+            "complained@example.com",
+            "mailbox-full@example.com",
+            "delivered@example.com",
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_ingest_deduplicates_and_deactivates_in_bulk(payload, subscribers):
+    with CaptureQueriesContext(connection) as context:
+        result = ingest_events(iter_payload_events(payload))
+
+    statements = [query["sql"].split()[0] for query in context.captured_queries]
+    assert statements.count("INSERT") == 1
+    assert statements.count("UPDATE") == 1
+
+    assert (result.received, result.ignored) == (7, 2)
+    assert (result.suppressed, result.deactivated) == (3, 2)
+    assert dict(NewsletterSuppression.objects.values_list("email", "reason")) == {
+        "bounced@example.com": "BOUNCE",
+        "complained@example.com": "COMPLAINT",
+        "stranger@example.com": "COMPLAINT",
+    }
+    assert set(
+        NewsletterSubscriber.objects.filter(is_active=True).values_list(
+            "email", flat=True
+        )
+    ) == {"mailbox-full@example.com", "delivered@example.com"}
+    assert segments.get_segment_counts("is_active") == {True: 2, False: 2}
+
+
+@pytest.mark.django_db
+def test_ingest_is_idempotent(payload, subscribers):
+    ingest_events(iter_payload_events(payload))
+    result = ingest_events(iter_payload_events(payload), batch_size=2)
+
+    assert (result.suppressed, result.deactivated) == (0, 0)
+    assert NewsletterSuppression.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_get_suppressed_ignores_case(payload):
+    ingest_events(iter_payload_events(payload))
+
+    assert get_suppressed(["BOUNCED@example.com", "delivered@example.com"]) == {
+        "bounced@example.com"
+    }
+    assert get_suppressed([]) == set()
+
+
+@pytest.mark.django_db
+def test_dispatcher_skips_suppressed_addresses(subscribers):
+    NewsletterSuppression.objects.create(email="bounced@example.com", reason="BOUNCE")
+
+    result = NewsletterDispatcher(
+        lambda subscriber: EmailMessage("News", "Hi", to=[subscriber.email])
+    ).dispatch()
+
+    assert (result.sent, result.suppressed) == (3, 1)
+    assert "Bounced@Example.com" not in [message.to[0] for message in mail.outbox]
+
+
+@pytest.mark.django_db
+def test_queue_skips_suppressed_addresses(subscribers):
+    issue = NewsletterIssue.objects.create(subject="News", body="<p>Hi</p>")
+    NewsletterSuppression.objects.create(email="bounced@example.com", reason="BOUNCE")
+
+    assert enqueue_issue(issue) == 3
+    NewsletterSuppression.objects.create(
+        email="delivered@example.com", reason="COMPLAINT"
+    )
+    result = DeliveryWorker().process_batch()
+
+    assert (result.sent, result.failed) == (2, 1)
+    delivery = issue.deliveries.get(status=DeliveryStatus.FAILED)
+    assert delivery.subscriber.email == "delivered@example.com"
+    assert delivery.last_error == "The address is suppressed."
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("subscribe", [subscribe, async_to_sync(asubscribe)])
+def test_suppressed_addresses_cannot_subscribe(subscribe, subscribers):
+    ingest_events([{"email": "bounced@example.com", "type": "bounce"}])
+    NewsletterSuppression.objects.create(email="new@example.com", reason="BOUNCE")
+
+    assert subscribe("bounced@example.com") == (None, SubscriptionStatus.SUPPRESSED)
+    assert subscribe("new@example.com") == (None, SubscriptionStatus.SUPPRESSED)
+    assert not NewsletterSubscriber.objects.get(email="bounced@example.com").is_active
+    assert not NewsletterSubscriber.objects.filter(email="new@example.com").exists()
+    assert len(mail.outbox) == 0
+
+
+@pytest.mark.django_db
+@override_settings(NEWSLETTER_WEBHOOK_SECRET="s3cret")
+def test_webhook_ingests_payload(client, payload, subscribers):
+    response = client.post(
+        WEBHOOK_URL,
+        payload,
+        content_type="application/json",
+        headers={"X-Newsletter-Webhook-Secret": "s3cret"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "received": 7,
+        "ignored": 2,
+        "suppressed": 3,
+        "deactivated": 2,
+    }
+
+
+@pytest.mark.django_db
+def test_webhook_rejects_bad_requests(client, payload):
+    assert client.post(WEBHOOK_URL, payload).status_code == 404
+    with override_settings(NEWSLETTER_WEBHOOK_SECRET="s3cret"):
+        forbidden = client.post(
+            WEBHOOK_URL,
+            payload,
+            content_type="application/json",
+            headers={"X-Newsletter-Webhook-Secret": "wrong"},
+        )
+        malformed = client.post(
+            WEBHOOK_URL,
+            {"type": "bounce"},
+            content_type="application/json",
+            headers={"X-Newsletter-Webhook-Secret": "s3cret"},
+        )
+
+    assert forbidden.status_code == 403
+    assert malformed.status_code == 400
+    assert not NewsletterSuppression.objects.exists()
+
+
+@pytest.mark.django_db
+def test_ingest_command(tmp_path, payload, subscribers, capsys):
+    path = tmp_path / "events.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in payload["events"]))
+
+    call_command("ingest_newsletter_suppressions", str(path))
+    call_command("ingest_newsletter_suppressions", str(FIXTURE))
+
+    output = capsys.readouterr().out
+    assert "3 addresses suppressed, 2 subscribers deactivated" in output
+    assert "0 addresses suppressed, 0 subscribers deactivated" in output
@@ -0,0 +1,149 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, override_settings
+from django.views.generic import TemplateView
+
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.throttling import (
+    SlidingWindowThrottle,
+    get_throttles,
+    parse_rate,
+    resolve_client_ip,
+)
+from sage_newsletter.views import AsyncNewsletterViewMixin, NewsletterViewMixin
+
+from .test_view import add_middleware
+
+
+class ThrottledView(NewsletterViewMixin, TemplateView):
+    template_name = "test_template.html"
+    newsletter_success_url_name = "home"
+    newsletter_throttle_rates = {"ip": "3/m", "email": "2/m"}
+
+
+class AsyncThrottledView(AsyncNewsletterViewMixin, TemplateView):
+    template_name = "test_template.html"
+    newsletter_success_url_name = "home"
+    newsletter_throttle_rates = {"ip": "3/m", "email": "2/m"}
+
+
+def build_request(email, ip="10.0.0.1"):
+    request = RequestFactory().post("/", data={"email": email}, REMOTE_ADDR=ip)
+    add_middleware(request)
+    return request
+
+
+def post(view_class, email, ip="10.0.0.1", request=None):
+    request = request or build_request(email, ip)
+    view = view_class()
+    view.setup(request)
+    if view.view_is_async:
+        return request, async_to_sync(view.post)(request)
+    return request, view.post(request)
+
+
+def test_parse_rate():
+    assert parse_rate("5/m") == (5, 60)
+    assert parse_rate("100/hour") == (100, 3600)
+    with pytest.raises(ImproperlyConfigured):
+        parse_rate("fast")
+
+
+def test_sliding_window_weights_the_previous_window():
+    throttle = SlidingWindowThrottle("test", "4/m")
+
+    assert all(throttle.allow("client", now=50) for _ in range(4))
+    assert not throttle.allow("client", now=59)
+
+    # 15s into the next window, 75% of the four earlier requests still count.
+    assert throttle.allow("client", now=75)
+    assert not throttle.allow("client", now=76)
+    # 45s into it they weigh 1, leaving room for two more requests.
+    assert throttle.allow("client", now=105)
+    assert throttle.allow("client", now=105)
+    assert not throttle.allow("client", now=106)
+    assert throttle.allow("other", now=106)
+
+
+def test_rejected_requests_are_not_counted():
+    throttle = SlidingWindowThrottle("test", "2/m")
+
+    assert throttle.allow("victim", now=0) and throttle.allow("victim", now=1)
+    assert not any(throttle.allow("victim", now=2) for _ in range(50))
+    # Only the two allowed requests weigh on the next window.
+    assert throttle.allow("victim", now=90)
+
+
+def test_async_sliding_window():
+    throttle = SlidingWindowThrottle("test", "1/m")
+
+    assert async_to_sync(throttle.aallow)("client", now=0)
+    assert not async_to_sync(throttle.aallow)("client", now=1)
+    assert not async_to_sync(throttle.aallow)("client", now=2)
+    assert async_to_sync(throttle.aallow)("client", now=120)
+
+
+def test_throttling_is_opt_in():
+    assert get_throttles() == {}
+    with override_settings(NEWSLETTER_THROTTLE_RATES={"ip": "1/m", "email": None}):
+        assert list(get_throttles()) == ["ip"]
+
+
+def get_forwarded_ip(request):
+    return request.META["HTTP_X_FORWARDED_FOR"].split(",")[0].strip()
+
+
+def test_client_ip_resolver_is_configurable():
+    request = RequestFactory().post(
+        "/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.7, 10.0.0.1"
+    )
+
+    assert resolve_client_ip(request) == "10.0.0.1"
+    with override_settings(
+        NEWSLETTER_CLIENT_IP_RESOLVER=f"{__name__}.get_forwarded_ip"
+    ):
+        assert resolve_client_ip(request) == "203.0.113.7"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_class", [ThrottledView, AsyncThrottledView])
+def test_signups_are_throttled_per_email(view_class, django_assert_num_queries):
+    post(view_class, "flood@example.com")
+    post(view_class, "flood@example.com")
+
+    request = build_request("flood@example.com")
+    with django_assert_num_queries(0):
+        request, response = post(view_class, "flood@example.com", request=request)
+
+    assert response.status_code == 302
+    assert [m.message for m in request._messages] == [
+        "Too many subscription attempts. Please try again later."
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_class", [ThrottledView, AsyncThrottledView])
+def test_signups_are_throttled_per_ip(view_class):
+    for number in range(3):
+        post(view_class, f"user{number}@example.com")
+
+    request, _response = post(view_class, "user3@example.com")
+    _request, other_ip = post(view_class, "user4@example.com", ip="10.0.0.2")
+
+    assert not NewsletterSubscriber.objects.filter(email="user3@example.com").exists()
+    assert NewsletterSubscriber.objects.filter(email="user4@example.com").exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_class", [ThrottledView, AsyncThrottledView])
+def test_ip_rejections_do_not_use_up_the_email_rate(view_class):
+    for number in range(3):
+        post(view_class, f"user{number}@example.com")
+    for _attempt in range(3):
+        post(view_class, "victim@example.com")
+
+    _request, response = post(view_class, "victim@example.com", ip="10.0.0.2")
+
+    assert response.status_code == 302
+    assert NewsletterSubscriber.objects.filter(email="victim@example.com").exists()
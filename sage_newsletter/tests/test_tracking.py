@@ -0,0 +1,199 @@
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from sage_newsletter.models import (
+    NewsletterDelivery,
+    NewsletterEvent,
+    NewsletterIssue,
+    NewsletterSubscriber,
+)
+from sage_newsletter.services import (
+    EventBuffer,
+    IssueRenderer,
+    aggregate_events,
+    make_tracking_token,
+    read_tracking_token,
+    tracking,
+)
+
+pytestmark = pytest.mark.urls("sage_newsletter.tests.urls")
+
+
+class SyncThread:
+    """Runs the target of a background flush in the calling thread."""
+
+    def __init__(self, target, daemon=None):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+@pytest.fixture
+def delivery():
+    issue = NewsletterIssue.objects.create(
+        subject="Issue",
+        body='<html><body><a href="https://example.com/a?x=1&amp;y=2">A</a></body></html>',
+    )
+    subscriber = NewsletterSubscriber.objects.create(email="reader@example.com")
+    return NewsletterDelivery.objects.create(issue=issue, subscriber=subscriber)
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    buffer = EventBuffer(max_size=100, interval=60)
+    monkeypatch.setattr(tracking, "_buffer", buffer)
+    yield buffer
+    buffer.flush()
+
+
+@pytest.mark.django_db
+def test_click_redirects_without_database_writes(
+    client, delivery, buffer, django_assert_num_queries
+):
+    token = make_tracking_token(delivery, "https://example.com/a")
+
+    with django_assert_num_queries(0):
+        response = client.get(f"/newsletter/track/click/{token}/")
+        pixel = client.get(f"/newsletter/track/open/{make_tracking_token(delivery)}/")
+
+    assert response.status_code == 302
+    assert response["Location"] == "https://example.com/a"
+    assert pixel["Content-Type"] == "image/gif"
+    with CaptureQueriesContext(connection) as captured:
+        assert buffer.flush() == 2
+    statements = [query["sql"].split()[0] for query in captured.captured_queries]
+    assert statements.count("INSERT") == 1
+    assert statements.count("SELECT") == 0
+    assert sorted(NewsletterEvent.objects.values_list("kind", "url")) == [
+        ("CLICK", "https://example.com/a"),
+        ("OPEN", ""),
+    ]
+
+
+@pytest.mark.django_db
+def test_invalid_tokens_record_nothing(client, delivery, buffer):
+    forged = make_tracking_token(delivery, "https://example.com/a") + "x"
+
+    assert client.get(f"/newsletter/track/click/{forged}/").status_code == 404
+    assert client.get(f"/newsletter/track/open/{forged}/").status_code == 200
+    assert (
+        client.get(
+            f"/newsletter/track/click/{make_tracking_token(delivery)}/"
+        ).status_code
+        == 404
+    )
+    assert buffer.flush() == 0
+
+
+@pytest.mark.django_db
+def test_buffer_flushes_when_full(delivery, monkeypatch):
+    monkeypatch.setattr(
+        tracking,
+        "threading",
+        SimpleNamespace(Thread=SyncThread, Timer=threading.Timer, Lock=threading.Lock),
+    )
+    monkeypatch.setattr(EventBuffer, "flush_in_background", EventBuffer.flush)
+    buffer = EventBuffer(max_size=3, interval=60)
+    event = dict(delivery=delivery, subscriber=delivery.subscriber, kind="OPEN")
+
+    for _ in range(2):
+        buffer.add(NewsletterEvent(**event))
+    assert not NewsletterEvent.objects.exists()
+
+    buffer.add(NewsletterEvent(**event))
+    assert NewsletterEvent.objects.count() == 3
+    assert buffer.timer is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flush_drops_events_of_deleted_deliveries(delivery):
+    other = NewsletterDelivery.objects.create(
+        issue=delivery.issue,
+        subscriber=NewsletterSubscriber.objects.create(email="gone@example.com"),
+    )
+    buffer = EventBuffer(max_size=100, interval=60)
+    for target in (delivery, other, delivery):
+        buffer.add(
+            NewsletterEvent(
+                delivery_id=target.pk, subscriber_id=target.subscriber_id, kind="OPEN"
+            )
+        )
+    NewsletterSubscriber.objects.filter(email="gone@example.com").delete()
+
+    assert buffer.flush() == 2
+    assert NewsletterEvent.objects.filter(delivery=delivery).count() == 2
+
+
+@pytest.mark.django_db
+def test_aggregate_events(delivery):
+    now = timezone.now()
+    other = NewsletterSubscriber.objects.create(
+        email="other@example.com", open_count=4, last_opened=now
+    )
+    NewsletterEvent.objects.bulk_create(
+        [
+            NewsletterEvent(
+                delivery=delivery,
+                subscriber=delivery.subscriber,
+                kind="OPEN",
+                created_at=now - timedelta(hours=2),
+            ),
+            NewsletterEvent(
+                delivery=delivery,
+                subscriber=delivery.subscriber,
+                kind="CLICK",
+                url="https://example.com/a",
+                created_at=now - timedelta(hours=1),
+            ),
+            NewsletterEvent(
+                delivery=delivery,
+                subscriber=other,
+                kind="OPEN",
+                created_at=now - timedelta(days=1),
+            ),
+        ]
+    )
+
+    result = aggregate_events(batch_size=2)
+
+    assert (result.events, result.batches) == (3, 2)
+    reader = NewsletterSubscriber.objects.get(pk=delivery.subscriber_id)
+    assert (reader.open_count, reader.click_count) == (1, 1)
+    assert reader.last_opened == now - timedelta(hours=1)
+    other.refresh_from_db()
+    assert (other.open_count, other.last_opened) == (5, now)
+    assert aggregate_events().events == 0
+
+
+@pytest.mark.django_db
+@override_settings(NEWSLETTER_TRACKING=True, NEWSLETTER_SITE_URL="https://news.test")
+def test_tracked_message_links(delivery):
+    html = IssueRenderer().build_message(delivery).alternatives[0][0]
+
+    assert "https://example.com/a" not in html
+    assert '<img src="https://news.test/newsletter/track/open/' in html
+    assert html.index("<img") < html.index("</body>")
+    href = html.split('href="')[1].split('"')[0].replace("&amp;", "&")
+    token = urlsplit(href).path.split("/")[-2]
+    assert read_tracking_token(token) == (
+        delivery.pk,
+        delivery.subscriber_id,
+        "https://example.com/a?x=1&y=2",
+    )
+
+
+@pytest.mark.django_db
+def test_untracked_message_keeps_links(delivery):
+    html = IssueRenderer().build_message(delivery).alternatives[0][0]
+
+    assert 'href="https://example.com/a?x=1&amp;y=2"' in html
+    assert "<img" not in html
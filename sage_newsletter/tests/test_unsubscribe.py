@@ -0,0 +1,96 @@
+import uuid
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.test import Client, override_settings
+
+from sage_newsletter.models import NewsletterSubscriber
+from sage_newsletter.services import NewsletterDispatcher, segments, unsubscribe
+
+pytestmark = pytest.mark.urls("sage_newsletter.tests.urls")
+
+
+@pytest.fixture
+def subscriber():
+    return NewsletterSubscriber.objects.create(
+        email="active@example.com", confirmed=True
+    )
+
+
+@pytest.mark.django_db
+def test_unsubscribe_is_a_single_update(subscriber, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert unsubscribe(subscriber.unsubscribe_token) is True
+
+    subscriber.refresh_from_db()
+    assert subscriber.is_active is False
+    assert unsubscribe(subscriber.unsubscribe_token) is False
+    assert unsubscribe(uuid.uuid4()) is False
+
+
+@pytest.mark.django_db
+def test_unsubscribe_moves_segment_counts(subscriber):
+    assert segments.get_segment_counts("is_active") == {True: 1, False: 0}
+
+    unsubscribe(subscriber.unsubscribe_token)
+    unsubscribe(subscriber.unsubscribe_token)
+
+    assert segments.get_segment_counts("is_active") == {True: 0, False: 1}
+
+
+@pytest.mark.django_db
+def test_unsubscribe_page_does_not_unsubscribe(
+    client, subscriber, django_assert_num_queries
+):
+    url = f"/newsletter/unsubscribe/{subscriber.unsubscribe_token}/"
+
+    with django_assert_num_queries(0):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.context["unsubscribed"] is False
+    subscriber.refresh_from_db()
+    assert subscriber.is_active is True
+    assert client.get("/newsletter/unsubscribe/not-a-token/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_one_click_unsubscribe(subscriber):
+    client = Client(enforce_csrf_checks=True)
+    url = f"/newsletter/unsubscribe/{subscriber.unsubscribe_token}/"
+
+    response = client.post(url, {"List-Unsubscribe": "One-Click"})
+    retry = client.post(url, {"List-Unsubscribe": "One-Click"})
+
+    assert response.status_code == 200
+    assert response.context["unsubscribed"] is True
+    assert retry.status_code == 200
+    subscriber.refresh_from_db()
+    assert subscriber.is_active is False
+
+
+def build_message(subscriber):
+    return EmailMessage("Newsletter", "Hello", "news@example.com", [subscriber.email])
+
+
+@pytest.mark.django_db
+@override_settings(NEWSLETTER_SITE_URL="https://example.com")
+def test_dispatched_messages_carry_list_unsubscribe_headers(subscriber):
+    NewsletterDispatcher(build_message).dispatch()
+
+    headers = mail.outbox[0].extra_headers
+    assert headers["List-Unsubscribe"] == (
+        f"<https://example.com/newsletter/unsubscribe/{subscriber.unsubscribe_token}/>"
+    )
+    assert headers["List-Unsubscribe-Post"] == "List-Unsubscribe=One-Click"
+    assert "List-Unsubscribe-Post: List-Unsubscribe=One-Click" in (
+        mail.outbox[0].message().as_string()
+    )
+
+
+@pytest.mark.django_db
+def test_dispatch_without_site_url_adds_no_headers(subscriber):
+    NewsletterDispatcher(build_message).dispatch()
+
+    assert "List-Unsubscribe" not in mail.outbox[0].extra_headers
@@ -1,13 +1,15 @@
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.messages.middleware import MessageMiddleware
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
 from django.test import RequestFactory
 from django.urls import reverse
-from django.views.generic import TemplateView
+from django.views.generic import DetailView, ListView, TemplateView
 from sage_newsletter.forms import NewsletterSubscriptionForm
 from sage_newsletter.models import NewsletterSubscriber
-from sage_newsletter.views import NewsletterViewMixin
+from sage_newsletter.views import AsyncNewsletterViewMixin, NewsletterViewMixin
 
 
 class TestNewsletterView(NewsletterViewMixin, TemplateView):
@@ -16,7 +18,7 @@ class TestNewsletterView(NewsletterViewMixin, TemplateView):
     """
 
     template_name = "test_template.html"
-    success_url_name = "home"  # Assuming 'home' is a valid URL name
+    newsletter_success_url_name = "home"  # Assuming 'home' is a valid URL name
 
 
 def add_middleware(request):
@@ -85,21 +87,290 @@ def test_post_valid_form():
     assert NewsletterSubscriber.objects.filter(email="test@example.com").exists()
 
 
-# @pytest.mark.django_db
-# def test_post_invalid_form():
-#     """
-#     Test that an invalid form submission re-renders the template with errors.
-#     """
-#     view = TestNewsletterView()
-#     request = RequestFactory().post("/", data={"email": ""})  # Invalid because email is required
+@pytest.mark.django_db
+def test_post_reactivates_inactive_subscriber():
+    """
+    Test that reactivating an inactive address shows the reactivation message.
+    """
+    NewsletterSubscriber.objects.create(email="test@example.com", is_active=False)
+    view = TestNewsletterView()
+    request = RequestFactory().post("/", data={"email": "test@example.com"})
+    add_middleware(request)
+    view.setup(request)
+
+    response = view.post(request)
+
+    assert response.status_code == 302
+    assert (
+        list(request._messages)[0].message
+        == "We've reactivated your email address. Thanks for subscribing again!"
+    )
+    assert NewsletterSubscriber.objects.get(email="test@example.com").is_active
+
+
+@pytest.mark.django_db
+def test_post_invalid_form():
+    """
+    Test that an invalid form submission re-renders the template with errors.
+    """
+    view = TestNewsletterView()
+    request = RequestFactory().post(
+        "/", data={"email": ""}
+    )  # Invalid because email is required
+
+    # Add session and message middleware
+    add_middleware(request)
+
+    view.setup(request)
+
+    response = view.post(request)
+
+    assert response.status_code == 200, "The response should render the template again."
+    assert (
+        "newsletter_form" in response.context_data
+    ), "The form should be in the context."
+    assert response.context_data[
+        "newsletter_form"
+    ].errors, "The form should contain errors."
+
+
+class TestNewsletterListView(NewsletterViewMixin, ListView):
+    """
+    A ListView using the NewsletterViewMixin.
+    """
+
+    model = NewsletterSubscriber
+    template_name = "test_template.html"
+    newsletter_success_url_name = "home"
+
+
+class TestNewsletterDetailView(NewsletterViewMixin, DetailView):
+    """
+    A DetailView using the NewsletterViewMixin.
+    """
+
+    model = NewsletterSubscriber
+    template_name = "test_template.html"
+    newsletter_success_url_name = "home"
+
+
+# Expected queries per view for a rendered GET, a valid POST and a rendered
+# invalid POST. The DetailView loads its object and the ListView its rows once
+# per rendered page; signups are a suppression lookup and a single upsert.
+QUERY_COUNTS = [
+    (TestNewsletterView, 0, 2, 2),
+    (TestNewsletterListView, 1, 2, 3),
+    (TestNewsletterDetailView, 1, 2, 3),
+]
+
+
+def dispatch(view_class, request, handler, pk):
+    view = view_class()
+    view.setup(request, pk=pk)
+    return getattr(view, handler)(request, pk=pk)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "view_class,get_queries,valid_queries,invalid_queries", QUERY_COUNTS
+)
+def test_view_query_counts(
+    view_class, get_queries, valid_queries, invalid_queries, django_assert_num_queries
+):
+    """
+    Test that GET, valid POST and invalid POST run the minimal number of queries.
+    """
+    subscriber = NewsletterSubscriber.objects.create(email="active@example.com")
+    get_request = RequestFactory().get("/")
+    valid_request = RequestFactory().post("/", data={"email": "new@example.com"})
+    invalid_request = RequestFactory().post("/", data={"email": "active@example.com"})
+    for request in (valid_request, invalid_request):
+        add_middleware(request)
+
+    with django_assert_num_queries(get_queries):
+        response = dispatch(view_class, get_request, "get", subscriber.pk)
+        response.render()
+    assert response.status_code == 200
+    assert b'name="email"' in response.content
+
+    with django_assert_num_queries(valid_queries):
+        response = dispatch(view_class, valid_request, "post", subscriber.pk)
+    assert response.status_code == 302
+
+    with django_assert_num_queries(invalid_queries):
+        response = dispatch(view_class, invalid_request, "post", subscriber.pk)
+        response.render()
+    assert response.status_code == 200
+    assert b"already subscribed and active" in response.content
+
+
+@pytest.mark.django_db
+def test_detail_view_context_reuses_object(django_assert_num_queries):
+    """
+    Test that building the context does not fetch the DetailView object again.
+    """
+    subscriber = NewsletterSubscriber.objects.create(email="active@example.com")
+    view = TestNewsletterDetailView()
+    view.setup(RequestFactory().get("/"), pk=subscriber.pk)
+
+    with django_assert_num_queries(1):
+        view.object = view.get_object()
+        context = view.get_context_data()
+
+    assert context["object"] == subscriber
+
+
+class TestAsyncNewsletterView(AsyncNewsletterViewMixin, TemplateView):
+    """
+    A simple async test view to use the AsyncNewsletterViewMixin.
+    """
+
+    template_name = "test_template.html"
+    newsletter_success_url_name = "home"
+
+
+class TestAsyncNewsletterDetailView(AsyncNewsletterViewMixin, DetailView):
+    """
+    An async DetailView using the AsyncNewsletterViewMixin.
+    """
+
+    model = NewsletterSubscriber
+    template_name = "test_template.html"
+    newsletter_success_url_name = "home"
 
-#     # Add session and message middleware
-#     add_middleware(request)
 
-#     view.setup(request)
+def test_async_view_is_async():
+    """
+    Test that every handler of the async mixin is a coroutine.
+    """
+    assert TestAsyncNewsletterView.view_is_async
+    assert TestAsyncNewsletterDetailView.view_is_async
+
+
+@pytest.mark.django_db
+def test_async_post_valid_form():
+    """
+    Test that the async view subscribes the address and redirects.
+    """
+    view = TestAsyncNewsletterView()
+    request = RequestFactory().post("/", data={"email": "async@example.com"})
+    add_middleware(request)
+    view.setup(request)
+
+    response = async_to_sync(view.post)(request)
+
+    assert response.status_code == 302
+    assert (
+        list(request._messages)[0].message
+        == "You have successfully subscribed to the newsletter."
+    )
+    assert NewsletterSubscriber.objects.filter(email="async@example.com").exists()
+
+
+@pytest.mark.django_db
+def test_async_post_reactivates_inactive_subscriber():
+    """
+    Test that the async view reactivates an inactive address.
+    """
+    NewsletterSubscriber.objects.create(email="async@example.com", is_active=False)
+    view = TestAsyncNewsletterView()
+    request = RequestFactory().post("/", data={"email": "async@example.com"})
+    add_middleware(request)
+    view.setup(request)
+
+    response = async_to_sync(view.post)(request)
+
+    assert response.status_code == 302
+    assert (
+        list(request._messages)[0].message
+        == "We've reactivated your email address. Thanks for subscribing again!"
+    )
+    assert NewsletterSubscriber.objects.get(email="async@example.com").is_active
+
+
+@pytest.mark.django_db
+def test_async_post_already_active_rerenders_form():
+    """
+    Test that the async view re-renders the bound form for an active address.
+    """
+    NewsletterSubscriber.objects.create(email="async@example.com")
+    view = TestAsyncNewsletterView()
+    request = RequestFactory().post("/", data={"email": "async@example.com"})
+    add_middleware(request)
+    view.setup(request)
+
+    response = async_to_sync(view.post)(request)
+
+    assert response.status_code == 200
+    form = response.context_data["newsletter_form"]
+    assert form.errors["email"] == [
+        "This email address is already subscribed and active."
+    ]
+
+
+@pytest.mark.django_db
+def test_async_detail_view_get_fetches_object_once(django_assert_num_queries):
+    """
+    Test that the async DetailView fetches its object once with the async ORM.
+    """
+    subscriber = NewsletterSubscriber.objects.create(email="detail@example.com")
+    view = TestAsyncNewsletterDetailView()
+    request = RequestFactory().get("/")
+    view.setup(request, pk=subscriber.pk)
+
+    with django_assert_num_queries(1):
+        response = async_to_sync(view.get)(request, pk=subscriber.pk)
+
+    assert response.context_data["object"] == subscriber
+    assert isinstance(
+        response.context_data["newsletter_form"], NewsletterSubscriptionForm
+    )
+
+
+@pytest.mark.django_db
+def test_async_detail_view_get_missing_object():
+    """
+    Test that the async DetailView raises Http404 for a missing object.
+    """
+    view = TestAsyncNewsletterDetailView()
+    request = RequestFactory().get("/")
+    view.setup(request, pk=404)
+
+    with pytest.raises(Http404):
+        async_to_sync(view.get)(request, pk=404)
+
+
+class TestAsyncNewsletterTemplateNamesView(TestAsyncNewsletterView):
+    """
+    An async view choosing its templates in get_template_names().
+    """
+
+    template_name = None
+
+    def get_template_names(self):
+        return ["newsletter/missing.html", "test_template.html"]
+
+
+@pytest.mark.django_db
+def test_async_view_renders_get_template_names():
+    """
+    Test that the async handlers render through render_to_response().
+    """
+    NewsletterSubscriber.objects.create(email="async@example.com")
+    view = TestAsyncNewsletterTemplateNamesView()
+    request = RequestFactory().get("/")
+    view.setup(request)
+
+    response = async_to_sync(view.get)(request)
+
+    assert response.template_name == view.get_template_names()
+    assert response.render().status_code == 200
+
+    request = RequestFactory().post("/", data={"email": "async@example.com"})
+    add_middleware(request)
+    view.setup(request)
 
-#     response = view.post(request)
+    response = async_to_sync(view.post)(request)
 
-#     assert response.status_code == 200, "The response should render the template again."
-#     assert "newsletter_form" in response.context_data, "The form should be in the context."
-#     assert response.context_data["newsletter_form"].errors, "The form should contain errors."
+    assert response.template_name == view.get_template_names()
+    assert response.render().status_code == 200
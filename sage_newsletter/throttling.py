@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Parses a rate such as ``"5/m"`` into ``(requests, period in seconds)``.
+
+    Raises:
+        ImproperlyConfigured: If the rate is malformed.
+
+    """
+    try:
+        requests, period = rate.split("/")
+        return int(requests), PERIODS[period[0].lower()]
+    except (AttributeError, ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(
+            f"Invalid newsletter throttle rate {rate!r}, expected e.g. '5/m'."
+        )
+
+
+class SlidingWindowThrottle:
+    """A sliding-window request counter stored in Django's cache framework.
+
+    Each identifier gets one counter per fixed window. A request is allowed
+    while the current window's count plus the previous window's count,
+    weighted by how much of the previous window still overlaps the sliding
+    window, stays within the rate. That needs one ``get_many`` and one atomic
+    ``incr`` per check and no database access. Rejected requests are not
+    counted, so flooding an identifier cannot lock it out beyond the rate.
+
+    The counters live in the cache named by ``NEWSLETTER_THROTTLE_CACHE``
+    (``"default"`` by default), so any cache backend can be plugged in; a
+    local-memory cache is enough for tests and single-process deployments.
+
+    Args:
+        scope (str): Namespace of the counters, e.g. ``"ip"``.
+        rate (str): Allowed requests per period, e.g. ``"5/m"``.
+
+    """
+
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.num_requests, self.period = parse_rate(rate)
+        self.cache = caches[getattr(settings, "NEWSLETTER_THROTTLE_CACHE", "default")]
+
+    def get_keys(self, ident, now):
+        window = int(now // self.period)
+        prefix = f"sage_newsletter:throttle:{self.scope}:{ident}"
+        return f"{prefix}:{window}", f"{prefix}:{window - 1}"
+
+    def get_weight(self, now):
+        return 1 - (now % self.period) / self.period
+
+    def is_full(self, counts, current_key, previous_key, now):
+        previous = counts.get(previous_key, 0) * self.get_weight(now)
+        return previous + counts.get(current_key, 0) + 1 > self.num_requests
+
+    def allow(self, ident, now=None):
+        """Counts a request from `ident` and tells whether it is allowed."""
+        now = time.time() if now is None else now
+        current_key, previous_key = self.get_keys(ident, now)
+        counts = self.cache.get_many([current_key, previous_key])
+        if self.is_full(counts, current_key, previous_key, now):
+            return False
+        self.cache.add(current_key, 0, self.period * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # The counter expired between add() and incr().
+            self.cache.set(current_key, 1, self.period * 2)
+            current = 1
+        previous = counts.get(previous_key, 0)
+        return previous * self.get_weight(now) + current <= self.num_requests
+
+    async def aallow(self, ident, now=None):
+        """Asynchronous version of :meth:`allow`."""
+        now = time.time() if now is None else now
+        current_key, previous_key = self.get_keys(ident, now)
+        counts = await self.cache.aget_many([current_key, previous_key])
+        if self.is_full(counts, current_key, previous_key, now):
+            return False
+        await self.cache.aadd(current_key, 0, self.period * 2)
+        try:
+            current = await self.cache.aincr(current_key)
+        except ValueError:
+            await self.cache.aset(current_key, 1, self.period * 2)
+            current = 1
+        previous = counts.get(previous_key, 0)
+        return previous * self.get_weight(now) + current <= self.num_requests
+
+
+def get_client_ip(request):
+    """Returns ``REMOTE_ADDR``, the default client IP of the ``ip`` scope."""
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def resolve_client_ip(request):
+    """Returns the client IP the ``ip`` throttle scope is keyed on.
+
+    Behind a reverse proxy every request shares the proxy's ``REMOTE_ADDR``,
+    so the ``NEWSLETTER_CLIENT_IP_RESOLVER`` setting can name a callable,
+    e.g. ``"myproject.utils.get_forwarded_ip"``, that takes the request and
+    returns the address. Defaults to :func:`get_client_ip`.
+
+    """
+    path = getattr(settings, "NEWSLETTER_CLIENT_IP_RESOLVER", None)
+    return (import_string(path) if path else get_client_ip)(request)
+
+
+def get_throttles(rates=None):
+    """Builds one throttle per configured scope.
+
+    Rates come from `rates` or the ``NEWSLETTER_THROTTLE_RATES`` setting, e.g.
+    ``{"ip": "20/h", "email": "5/h"}``. Throttling is opt-in: without either
+    no scope is throttled, and a scope whose rate is None is skipped.
+
+    Returns:
+        dict: Throttles keyed by scope.
+
+    """
+    if rates is None:
+        rates = getattr(settings, "NEWSLETTER_THROTTLE_RATES", {})
+    return {
+        scope: SlidingWindowThrottle(scope, rate)
+        for scope, rate in rates.items()
+        if rate is not None
+    }
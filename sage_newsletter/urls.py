@@ -0,0 +1,27 @@
+from django.urls import path
+
+from .views import (
+    NewsletterClickView,
+    NewsletterConfirmView,
+    NewsletterOpenView,
+    NewsletterSuppressionWebhookView,
+    NewsletterUnsubscribeView,
+)
+
+app_name = "sage_newsletter"
+
+urlpatterns = [
+    path("confirm/<str:token>/", NewsletterConfirmView.as_view(), name="confirm"),
+    path(
+        "unsubscribe/<uuid:token>/",
+        NewsletterUnsubscribeView.as_view(),
+        name="unsubscribe",
+    ),
+    path(
+        "webhooks/suppressions/",
+        NewsletterSuppressionWebhookView.as_view(),
+        name="suppression_webhook",
+    ),
+    path("track/open/<str:token>/", NewsletterOpenView.as_view(), name="track_open"),
+    path("track/click/<str:token>/", NewsletterClickView.as_view(), name="track_click"),
+]
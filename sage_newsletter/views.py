@@ -1,11 +1,40 @@
+import base64
+import hmac
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ImproperlyConfigured
-from django.shortcuts import redirect, render
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    JsonResponse,
+)
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.utils.translation import gettext_lazy as _
-from django.views.generic import DetailView
+from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import DetailView, View
 from django.views.generic.base import ContextMixin
+from django.views.generic.list import MultipleObjectMixin
 
 from .forms import NewsletterSubscriptionForm
+from .helpers.text_choices import ConfirmationStatus, TrackingEventKind
+from .metrics import instrument
+from .services.confirmation import confirm_subscription
+from .services.suppression import ingest_events, iter_payload_events
+from .services.tracking import read_tracking_token, record_event
+from .services.unsubscribe import unsubscribe
+from .throttling import get_throttles, resolve_client_ip
+
+# A transparent 1x1 GIF.
+PIXEL = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
 
 
 class NewsletterViewMixin(ContextMixin):
@@ -15,11 +44,17 @@ class NewsletterViewMixin(ContextMixin):
     subscription form. It can be mixed into any Django view to add these
     capabilities.
 
+    Signups can be throttled per client IP and per email address before the
+    form touches the database, by setting `newsletter_throttle_rates` or the
+    ``NEWSLETTER_THROTTLE_RATES`` setting (see
+    :mod:`sage_newsletter.throttling`).
+
     """
 
     newsletter_form_class = NewsletterSubscriptionForm
     newsletter_form_context_object = "newsletter_form"
     newsletter_success_url_name = None
+    newsletter_throttle_rates = None
 
     def __init__(self, *args, **kwargs):
         """Initialize the view.
@@ -40,6 +75,8 @@ class NewsletterViewMixin(ContextMixin):
 
         This method extends the base `get_context_data` method to add the newsletter
         subscription form to the context, making it available in the template.
+        The form is only built if the template actually uses it, and the
+        DetailView object is fetched at most once per request.
 
         Args:
             **kwargs: Keyword arguments from the view.
@@ -47,14 +84,58 @@ class NewsletterViewMixin(ContextMixin):
         Returns:
             dict: The context dictionary with the form included.
 
+        """
+        self.prepare_newsletter_view()
+        context = super().get_context_data(**kwargs)
+        context.setdefault(
+            self.newsletter_form_context_object,
+            SimpleLazyObject(self.get_newsletter_form),
+        )
+        return context
+
+    def prepare_newsletter_view(self):
+        """Loads what the view's own GET handler would, once per request.
+
+        DetailViews get their `object` and ListViews their (lazy) `object_list`
+        unless the handler already set them, so rendering the form never
+        repeats the lookups of the page it is embedded in.
+
         """
         if isinstance(self, DetailView):
-            self.object = self.get_object()
+            if getattr(self, "object", None) is None:
+                self.object = self.get_object()
         else:
             self.object = None
-        context = super().get_context_data(**kwargs)
-        context[self.newsletter_form_context_object] = self.newsletter_form_class()
-        return context
+        if isinstance(self, MultipleObjectMixin) and not hasattr(self, "object_list"):
+            self.object_list = self.get_queryset()
+
+    def get_newsletter_form(self):
+        """Returns an unbound newsletter subscription form."""
+        return self.newsletter_form_class()
+
+    def render_newsletter_form(self, form):
+        """Renders the page with a bound form after a failed signup.
+
+        Returns:
+            TemplateResponse: The lazily rendered page.
+
+        """
+        self.prepare_newsletter_view()
+        context = self.get_context_data(**{self.newsletter_form_context_object: form})
+        return self.render_newsletter_response(context)
+
+    def render_newsletter_response(self, context):
+        """Renders `context` with the view's own ``render_to_response()``.
+
+        Views without one render :attr:`template_name` directly.
+
+        Returns:
+            TemplateResponse: The lazily rendered page.
+
+        """
+        if hasattr(self, "render_to_response"):
+            return self.render_to_response(context)
+        return TemplateResponse(self.request, self.template_name, context)
 
     def post(self, request, *args, **kwargs):
         """Handles POST requests for newsletter subscription.
@@ -70,35 +151,300 @@ class NewsletterViewMixin(ContextMixin):
 
         Returns:
             HttpResponseRedirect: Redirects to the specified URL on success.
-            HttpResponse: Renders the template with context on failure.
+            TemplateResponse: Renders the template with context on failure.
 
         """
-        form = self.newsletter_form_class(request.POST)
-        if form.is_valid():
-            form.save()
-            if hasattr(form, "reactivated") and form.reactivated:
-                messages.success(
-                    request,
-                    _(
-                        "We've reactivated your email address. Thanks for subscribing again!"
-                    ),
-                )
-            else:
-                messages.success(
-                    request, _("You have successfully subscribed to the newsletter.")
-                )
-            return redirect(request.path)
-
-        # Check if the view has a get_queryset method
-        if hasattr(self, "get_queryset"):
-            self.object_list = self.get_queryset()
+        with instrument("signup.post", mode="sync") as measurement:
+            if not self.newsletter_throttle_allows(request):
+                return self.newsletter_throttled()
 
-        # Handling for DetailView
-        if isinstance(self, DetailView):
-            self.object = self.get_object()
+            form = self.newsletter_form_class(request.POST)
+            if form.is_valid() and form.subscribe():
+                measurement.rows = 1
+                return self.newsletter_form_valid(form)
+            return self.render_newsletter_form(form)
+
+    def get_newsletter_throttle_idents(self, request):
+        """Returns the identifier of the client for each throttle scope."""
+        return {
+            "ip": resolve_client_ip(request),
+            "email": request.POST.get("email", "").strip().lower(),
+        }
+
+    def newsletter_throttle_allows(self, request):
+        """Counts the signup against the throttle scopes in order.
+
+        Counting stops at the first scope that rejects the signup, so a
+        client over its ``ip`` rate does not use up the rate of the email
+        addresses it submits.
+
+        Returns:
+            bool: False if any scope exceeded its rate.
+
+        """
+        idents = self.get_newsletter_throttle_idents(request)
+        for scope, throttle in get_throttles(self.newsletter_throttle_rates).items():
+            ident = idents.get(scope)
+            if ident and not throttle.allow(ident):
+                return False
+        return True
+
+    def newsletter_throttled(self):
+        """Rejects a throttled signup without touching the database.
+
+        Returns:
+            HttpResponseRedirect: Redirects back to the current page with an
+            error message.
+
+        """
+        messages.error(
+            self.request,
+            _("Too many subscription attempts. Please try again later."),
+        )
+        return redirect(self.request.path)
+
+    def newsletter_form_valid(self, form):
+        """Adds the success message for a stored subscription and redirects.
+
+        Args:
+            form (NewsletterSubscriptionForm): The validated form.
+
+        Returns:
+            HttpResponseRedirect: Redirects back to the current page.
+
+        """
+        if hasattr(form, "reactivated") and form.reactivated:
+            messages.success(
+                self.request,
+                _(
+                    "We've reactivated your email address. Thanks for subscribing again!"
+                ),
+            )
         else:
-            self.object = None
+            messages.success(
+                self.request, _("You have successfully subscribed to the newsletter.")
+            )
+        return redirect(self.request.path)
+
+
+class AsyncNewsletterViewMixin(NewsletterViewMixin):
+    """An asynchronous variant of :class:`NewsletterViewMixin`.
+
+    Both GET and POST handlers are coroutines, so the view runs natively under
+    ASGI. Subscriptions are stored with the async ORM and the DetailView object
+    is fetched with ``aget()``; responses come from ``render_to_response()``
+    as ``TemplateResponse`` objects, so template rendering happens after the
+    handler completes.
+
+    Views overriding ``get_object()`` should override :meth:`aget_object` as
+    well.
+
+    """
+
+    async def aget_object(self, queryset=None):
+        """Asynchronously returns the object a DetailView is displaying.
+
+        Mirrors ``SingleObjectMixin.get_object()`` but fetches the row with
+        ``aget()``.
+
+        Raises:
+            Http404: If no object matches the URL arguments.
+
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            queryset = queryset.filter(**{self.get_slug_field(): slug})
+        if pk is None and slug is None:
+            raise AttributeError(
+                f"Generic detail view {self.__class__.__name__} must be called "
+                "with either an object pk or a slug in the URLconf."
+            )
+        try:
+            return await queryset.aget()
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                _("No %(verbose_name)s found matching the query")
+                % {"verbose_name": queryset.model._meta.verbose_name}
+            )
+
+    async def anewsletter_throttle_allows(self, request):
+        """Asynchronous version of :meth:`newsletter_throttle_allows`."""
+        idents = self.get_newsletter_throttle_idents(request)
+        for scope, throttle in get_throttles(self.newsletter_throttle_rates).items():
+            ident = idents.get(scope)
+            if ident and not await throttle.aallow(ident):
+                return False
+        return True
+
+    async def get_newsletter_context_data(self, **kwargs):
+        """Builds the template context without blocking the event loop.
+
+        Paginated list views count their rows while building the context, so
+        list views build it in a worker thread.
+
+        """
+        if isinstance(self, DetailView) and getattr(self, "object", None) is None:
+            self.object = await self.aget_object()
+        if isinstance(self, MultipleObjectMixin):
+            return await sync_to_async(self.get_context_data)(**kwargs)
+        return self.get_context_data(**kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        """Handles GET requests asynchronously."""
+        context = await self.get_newsletter_context_data(**kwargs)
+        return self.render_newsletter_response(context)
+
+    async def post(self, request, *args, **kwargs):
+        """Handles POST requests for newsletter subscription asynchronously.
+
+        Returns:
+            HttpResponseRedirect: Redirects to the current page on success.
+            TemplateResponse: Renders the template with the bound form on failure.
+
+        """
+        # The async ORM runs queries in worker threads, out of the counter's sight.
+        with instrument(
+            "signup.post", count_queries=False, mode="async"
+        ) as measurement:
+            if not await self.anewsletter_throttle_allows(request):
+                return self.newsletter_throttled()
+
+            form = self.newsletter_form_class(request.POST)
+            if form.is_valid() and await form.asubscribe():
+                measurement.rows = 1
+                return self.newsletter_form_valid(form)
+
+            context = await self.get_newsletter_context_data(
+                **{self.newsletter_form_context_object: form}
+            )
+            return self.render_newsletter_response(context)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class NewsletterConfirmView(View):
+    """Confirms a subscription from the link of the double opt-in email.
+
+    GET shows a page asking to confirm, so link scanners opening the URL do
+    not confirm anyone. POST verifies the signed token in the URL without a
+    database lookup, and a valid one confirms the subscriber with a single
+    ``UPDATE``. Like the unsubscribe view it is exempt from CSRF checks
+    because the token is the only credential. Confirming again shows the
+    same confirmation page.
+
+    """
+
+    template_name = "sage_newsletter/confirm.html"
+
+    def get(self, request, token):
+        return TemplateResponse(request, self.template_name, {"status": None})
+
+    def post(self, request, token):
+        status = confirm_subscription(token)
+        confirmed = status in (
+            ConfirmationStatus.CONFIRMED,
+            ConfirmationStatus.ALREADY_CONFIRMED,
+        )
+        return TemplateResponse(
+            request,
+            self.template_name,
+            {"status": status},
+            status=200 if confirmed else 400,
+        )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class NewsletterUnsubscribeView(View):
+    """Unsubscribes the owner of an ``unsubscribe_token``.
+
+    GET shows a page asking to confirm, so link scanners opening the URL do
+    not unsubscribe anyone. POST deactivates the subscription with a single
+    ``UPDATE`` and is what mailbox providers send for RFC 8058 one-click
+    unsubscribes; it is exempt from CSRF checks because the token in the URL
+    is the only credential. Unknown or already used tokens get the same
+    response, so retries are safe.
+
+    """
+
+    template_name = "sage_newsletter/unsubscribe.html"
+
+    def get(self, request, token):
+        return TemplateResponse(request, self.template_name, {"unsubscribed": False})
+
+    def post(self, request, token):
+        unsubscribe(token)
+        return TemplateResponse(request, self.template_name, {"unsubscribed": True})
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class NewsletterSuppressionWebhookView(View):
+    """Ingests a batch of bounce and complaint events posted by the mail provider.
+
+    The JSON body is a list of events or an object holding them under
+    ``"events"`` (see :func:`~sage_newsletter.services.suppression.parse_event`).
+    Requests must carry the ``NEWSLETTER_WEBHOOK_SECRET`` setting in the
+    ``X-Newsletter-Webhook-Secret`` header; without the setting the endpoint
+    does not exist. The whole batch is applied with a few bulk queries and the
+    counters of :class:`~sage_newsletter.services.suppression.SuppressionResult`
+    are returned.
+
+    """
+
+    secret_header = "X-Newsletter-Webhook-Secret"
+
+    def post(self, request):
+        secret = getattr(settings, "NEWSLETTER_WEBHOOK_SECRET", None)
+        if not secret:
+            raise Http404
+        if not hmac.compare_digest(
+            request.headers.get(self.secret_header, "").encode(), secret.encode()
+        ):
+            return HttpResponseForbidden()
+        try:
+            events = list(iter_payload_events(json.loads(request.body)))
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        result = ingest_events(events)
+        return JsonResponse(vars(result))
+
+
+class NewsletterOpenView(View):
+    """Serves the open tracking pixel of a delivery.
+
+    The hit is added to the in-process event buffer (see
+    :class:`~sage_newsletter.services.tracking.EventBuffer`), so the pixel is
+    returned without a database query. Invalid tokens get the same pixel and
+    record nothing.
+
+    """
+
+    def get(self, request, token):
+        data = read_tracking_token(token)
+        if data is not None:
+            delivery_id, subscriber_id, _url = data
+            record_event(TrackingEventKind.OPEN, delivery_id, subscriber_id)
+        response = HttpResponse(PIXEL, content_type="image/gif")
+        response["Cache-Control"] = "no-store, private"
+        return response
+
+
+class NewsletterClickView(View):
+    """Records a link click of a delivery and redirects to the link.
+
+    The target is part of the signed token, so only links of sent newsletters
+    are redirected to. Like the open pixel, the hit is buffered and the
+    redirect is returned without waiting on a database write.
+
+    """
 
-        context = self.get_context_data()
-        context[self.newsletter_form_context_object] = form
-        return render(request, self.template_name, context)
+    def get(self, request, token):
+        data = read_tracking_token(token)
+        if data is None or not data[2]:
+            raise Http404
+        delivery_id, subscriber_id, url = data
+        record_event(TrackingEventKind.CLICK, delivery_id, subscriber_id, url=url)
+        return HttpResponseRedirect(url)